@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of EUDAT B2Share.
+# Copyright (C) 2016 CERN.
+#
+# B2Share is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of the
+# License, or (at your option) any later version.
+#
+# B2Share is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with B2Share; if not, write to the Free Software Foundation, Inc.,
+# 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+#
+# In applying this license, CERN does not
+# waive the privileges and immunities granted to it by virtue of its status
+# as an Intergovernmental Organization or submit itself to any jurisdiction.
+
+"""B2Share shared cache.
+
+Values shared between all the processes of a B2Share instance are stored in
+the Redis server configured with ``CACHE_REDIS_URL`` when ``CACHE_TYPE`` is
+``'redis'``.
+
+The shared cache is an optimization only. When Redis is not configured or not
+reachable every read is a miss and every write is ignored.
+"""
+
+from __future__ import absolute_import
+
+import json
+import threading
+
+import redis
+from flask import current_app
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_redis_client():
+    """Return the Redis client of the current application's cache.
+
+    Returns:
+        :class:`redis.StrictRedis`: the client or None if the shared cache is
+            disabled.
+    """
+    if current_app.config.get('CACHE_TYPE') != 'redis':
+        return None
+    url = current_app.config.get('CACHE_REDIS_URL')
+    if not url:
+        return None
+    client = _clients.get(url)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(url)
+            if client is None:
+                client = redis.StrictRedis.from_url(
+                    url,
+                    socket_timeout=current_app.config.get(
+                        'CACHE_REDIS_SOCKET_TIMEOUT', 1),
+                )
+                _clients[url] = client
+    return client
+
+
+def clear_shared_cache():
+    """Remove every value stored by B2Share in the shared cache."""
+    client = get_redis_client()
+    if client is None:
+        return
+    try:
+        keys = list(client.scan_iter(match='b2share:*'))
+        if keys:
+            client.delete(*keys)
+    except redis.RedisError as e:
+        current_app.logger.warning('Shared cache unavailable: {}'.format(e))
+
+
+class SharedCache(object):
+    """Namespace of JSON values in the shared cache."""
+
+    def __init__(self, prefix, default_timeout=None):
+        """Constructor.
+
+        Args:
+            prefix (str): prefix of every key of this cache.
+            default_timeout (int): default time to live in seconds. None
+                means that values never expire.
+        """
+        self.prefix = prefix
+        self.default_timeout = default_timeout
+
+    def _key(self, key):
+        return 'b2share:{}:{}'.format(self.prefix, key)
+
+    def _call(self, method, *args, **kwargs):
+        """Call a Redis method, ignoring connection errors."""
+        client = get_redis_client()
+        if client is None:
+            return None
+        try:
+            return getattr(client, method)(*args, **kwargs)
+        except redis.RedisError as e:
+            current_app.logger.warning(
+                'Shared cache "{}" unavailable: {}'.format(self.prefix, e))
+            return None
+
+    def get(self, key):
+        """Retrieve a value.
+
+        Returns:
+            the value or None if it is not in the cache.
+        """
+        value = self._call('get', self._key(key))
+        if value is None:
+            return None
+        return json.loads(value.decode('utf-8'))
+
+    def get_many(self, keys):
+        """Retrieve multiple values.
+
+        Returns:
+            list: the values, None for the keys not in the cache.
+        """
+        keys = list(keys)
+        if not keys:
+            return []
+        values = self._call('mget', [self._key(key) for key in keys])
+        if values is None:
+            return [None] * len(keys)
+        return [json.loads(value.decode('utf-8'))
+                if value is not None else None for value in values]
+
+    def set(self, key, value, timeout=None):
+        """Store a value.
+
+        Args:
+            key (str): key of the value.
+            value: any JSON serializable value.
+            timeout (int): time to live in seconds. Uses the cache's default
+                timeout if None.
+        """
+        timeout = timeout or self.default_timeout
+        self._call('set', self._key(key), json.dumps(value), ex=timeout)
+
+    def add(self, key, value, timeout=None):
+        """Store a value only if the key is not already in the cache.
+
+        Returns:
+            bool: True if the value was stored.
+        """
+        timeout = timeout or self.default_timeout
+        return bool(self._call('set', self._key(key), json.dumps(value),
+                               ex=timeout, nx=True))
+
+    def delete(self, *keys):
+        """Remove values."""
+        if keys:
+            self._call('delete', *[self._key(key) for key in keys])
+
+    def incr(self, key):
+        """Increment an integer value and return it.
+
+        Returns:
+            int: the new value or None if the shared cache is unavailable.
+        """
+        return self._call('incr', self._key(key))
+
+    def zadd(self, key, member, score):
+        """Add a member to a sorted set or update its score.
+
+        Args:
+            key (str): key of the sorted set.
+            member (str): the member.
+            score (float): score by which the members are sorted.
+        """
+        self._call('zadd', self._key(key), score, member)
+
+    def zrangebyscore(self, key, max_score, count):
+        """List the members of a sorted set up to a maximum score.
+
+        Returns:
+            list: at most count members (str) with the lowest scores, empty
+                if the shared cache is unavailable.
+        """
+        members = self._call('zrangebyscore', self._key(key), '-inf',
+                             max_score, start=0, num=count)
+        return [member.decode('utf-8') for member in members or []]
+
+    def zrem(self, key, member):
+        """Remove a member from a sorted set.
+
+        Returns:
+            bool: True if the member was removed by this call.
+        """
+        return bool(self._call('zrem', self._key(key), member))
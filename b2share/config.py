@@ -140,6 +140,16 @@ B2SHARE_DEPOSIT_REST_ENDPOINTS = dict(
 
 INDEXER_RECORD_TO_INDEX='b2share.modules.records.indexer:record_to_index'
 
+#: Number of queued records retrieved and enriched together when bulk
+#: indexing, see b2share.modules.records.indexer.B2ShareRecordIndexer.
+B2SHARE_INDEXER_BULK_CHUNK_SIZE = 500
+
+#: If True, the records modified in a transaction are sent to the bulk
+#: indexing queue once it is committed. Otherwise they are indexed with one
+#: bulk request right after the commit, so that the following searches see
+#: them. See b2share.modules.records.outbox.
+B2SHARE_INDEXER_ASYNC = False
+
 #: Files REST permission factory
 FILES_REST_PERMISSION_FACTORY = \
     'b2share.modules.files.permissions:files_permission_factory'
@@ -278,9 +288,18 @@ OAISERVER_METADATA_FORMATS = {
     }
 }
 
+#: Seconds during which the OAI-PMH serialization of a record revision is
+#: cached, see b2share.modules.records.serializers.cache.
+B2SHARE_SERIALIZATION_CACHE_TTL = 30 * 24 * 3600
+#: If True, the OAI-PMH serializations of the published records are cached
+#: in the background every time they are modified.
+B2SHARE_SERIALIZATION_CACHE_WARM = True
+
 # Cache
 # =====
 CACHE_TYPE='redis'
+#: Redis server shared by the processes of this instance, see b2share.cache.
+CACHE_REDIS_URL = 'redis://localhost:6379/0'
 
 # Celery
 # ======
@@ -292,12 +311,16 @@ CELERY_RESULT_BACKEND = "redis://localhost:6379/1"
 CELERY_ACCEPT_CONTENT = ['json', 'msgpack', 'yaml']
 #: Beat schedule
 CELERY_BEAT_SCHEDULE = {
+    'embargo-release': {
+        'task': 'b2share.modules.records.tasks.release_embargoes',
+        'schedule': timedelta(minutes=1),
+    },
     'embargo-updater': {
         'task': 'b2share.modules.records.tasks.update_expired_embargoes',
         'schedule': crontab(minute=2, hour=0),
     },
     'indexer': {
-        'task': 'invenio_indexer.tasks.process_bulk_queue',
+        'task': 'b2share.modules.records.tasks.process_bulk_queue',
         'schedule': timedelta(minutes=5),
     },
     'process-file-downloads': {
@@ -306,7 +329,7 @@ CELERY_BEAT_SCHEDULE = {
         'args': [['file-download', 'record-view']]
     },
     'aggregate-daily-file-downloads': {
-        'task': 'invenio_stats.tasks.aggregate_events',
+        'task': 'b2share.modules.stats.tasks.aggregate_events',
         'schedule': timedelta(minutes=15),
         'args': [['file-download-agg', 'record-view-agg']]
     },
@@ -444,6 +467,7 @@ STATS_EVENTS = {
         'processor_config':{
             'preprocessors':[
                 'b2share.modules.stats.processors:skip_deposit',
+                'b2share.modules.stats.processors:add_community',
                 'invenio_stats.processors:flag_robots',
                 'invenio_stats.processors:anonymize_user',
                 'invenio_stats.contrib.event_builders:build_file_unique_id',
@@ -472,7 +496,20 @@ STATS_EVENTS = {
 
 STATS_AGGREGATIONS = {
     'file-download-agg': {
-        'templates': 'contrib/aggregations/aggr_file_download/v2'
+        'templates': 'contrib/aggregations/aggr_file_download/v2',
+        # same as invenio-stats' configuration but with the community copied
+        # from the events. See b2share.modules.stats.processors.add_community
+        'aggregator_config': dict(
+            event='file-download',
+            aggregation_field='unique_id',
+            aggregation_interval='day',
+            copy_fields=dict(
+                file_key='file_key',
+                bucket_id='bucket_id',
+                file_id='file_id',
+                community='community',
+            ),
+        ),
     },
     'record-view-agg': {},
 }
@@ -105,13 +105,11 @@ class Community(object):
                     CommunityMetadata.name.like(name)
                     ).order_by(CommunityMetadata.name)
         elif start is not None and stop is not None:
-            if name is None:
-                metadata = CommunityMetadata.query.order_by(
-                    CommunityMetadata.name).limit(stop)[start:]
-            else:
-                metadata = CommunityMetadata.query.filter(
-                    CommunityMetadata.name.like(name)
-                ).order_by(CommunityMetadata.name).limit(stop)[start:]
+            query = CommunityMetadata.query
+            if name is not None:
+                query = query.filter(CommunityMetadata.name.like(name))
+            metadata = query.order_by(CommunityMetadata.name).offset(
+                int(start)).limit(int(stop) - int(start))
         else:
             # one of them is None this cannot happen
             raise ValueError("Neither or both start and stop should be None")
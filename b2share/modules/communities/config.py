@@ -24,3 +24,10 @@
 """B2Share Communities module configuration."""
 
 from __future__ import absolute_import, print_function
+
+B2SHARE_COMMUNITIES_REGISTRY_CHECK_INTERVAL = 10
+"""Seconds between two checks that no other process modified the communities.
+See b2share.modules.communities.registry."""
+
+B2SHARE_COMMUNITIES_REGISTRY_TTL = 600
+"""Seconds after which the in memory communities are reloaded in any case."""
@@ -27,6 +27,9 @@ from werkzeug.utils import cached_property
 from . import config
 
 from .cli import communities as communities_cmd
+from .registry import CommunityRegistry, invalidate_community_registry
+from .signals import after_community_delete, after_community_insert, \
+    after_community_update
 
 
 class _B2ShareCommunitiesState(object):
@@ -40,6 +43,11 @@ class _B2ShareCommunitiesState(object):
         """
         self.app = app
 
+    @cached_property
+    def registry(self):
+        """In memory registry of the communities."""
+        return CommunityRegistry(self.app)
+
 
 class B2ShareCommunities(object):
     """B2Share Communities extension."""
@@ -54,6 +62,9 @@ class B2ShareCommunities(object):
         self.init_config(app)
         app.cli.add_command(communities_cmd)
         app.extensions['b2share-communities'] = _B2ShareCommunitiesState(app)
+        for signal in (after_community_insert, after_community_update,
+                       after_community_delete):
+            signal.connect(invalidate_community_registry)
 
     def init_config(self, app):
         """Initialize configuration."""
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of EUDAT B2Share.
+# Copyright (C) 2016 University of Tuebingen, CERN
+# Copyright (C) 2015 University of Tuebingen.
+#
+# B2Share is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of the
+# License, or (at your option) any later version.
+#
+# B2Share is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with B2Share; if not, write to the Free Software Foundation, Inc.,
+# 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+#
+# In applying this license, CERN does not
+# waive the privileges and immunities granted to it by virtue of its status
+
+"""Process local registry of the communities.
+
+Communities are few and rarely modified, yet they are looked up when
+serializing records, creating deposits or listing communities. The registry
+keeps a snapshot of every community in memory.
+
+The snapshot is reloaded:
+
+* once a transaction modifying a community is committed, see
+  :py:func:`invalidate_community_registry`.
+* when another process increments the registry generation stored in the
+  shared cache. The generation is checked every
+  ``B2SHARE_COMMUNITIES_REGISTRY_CHECK_INTERVAL`` seconds.
+* when the snapshot is older than ``B2SHARE_COMMUNITIES_REGISTRY_TTL``
+  seconds.
+
+The registry returns read-only :class:`Community` objects. Use
+:py:meth:`Community.get` in order to modify a community.
+"""
+
+from __future__ import absolute_import
+
+import threading
+import time
+from collections import namedtuple
+
+from flask import current_app
+
+from b2share.cache import SharedCache
+from b2share.utils import run_after_commit
+
+from .api import Community
+from .errors import CommunityDeletedError
+from .models import Community as CommunityMetadata
+
+CommunityData = namedtuple('CommunityData', [
+    'id', 'name', 'description', 'logo', 'created', 'updated', 'deleted',
+    'publication_workflow', 'restricted_submission',
+])
+"""Immutable copy of a community's database model."""
+
+_Snapshot = namedtuple('_Snapshot', ['communities', 'by_id', 'by_name',
+                                     'generation', 'loaded'])
+
+
+class CommunityRegistry(object):
+    """In memory snapshot of all the communities."""
+
+    def __init__(self, app):
+        """Constructor.
+
+        Args:
+            app: the Flask application.
+        """
+        self.app = app
+        self.shared = SharedCache('communities')
+        self._snapshot = None
+        self._checked = 0
+        self._lock = threading.Lock()
+
+    def _load(self, generation):
+        """Load every community from the database."""
+        communities = [
+            Community(CommunityData(
+                id=model.id, name=model.name,
+                description=model.description, logo=model.logo,
+                created=model.created, updated=model.updated,
+                deleted=model.deleted,
+                publication_workflow=model.publication_workflow,
+                restricted_submission=model.restricted_submission,
+            )) for model in CommunityMetadata.query.order_by(
+                CommunityMetadata.name)
+        ]
+        return _Snapshot(
+            communities=communities,
+            by_id={str(community.id): community for community in communities},
+            by_name={community.name: community for community in communities},
+            generation=generation,
+            loaded=time.time(),
+        )
+
+    def _current(self):
+        """Return the current snapshot, reloading it if it is outdated."""
+        snapshot = self._snapshot
+        now = time.time()
+        config = self.app.config
+        if snapshot is not None and \
+                now - self._checked < \
+                config['B2SHARE_COMMUNITIES_REGISTRY_CHECK_INTERVAL'] and \
+                now - snapshot.loaded < \
+                config['B2SHARE_COMMUNITIES_REGISTRY_TTL']:
+            return snapshot
+        generation = self.shared.get('generation')
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.generation != generation or \
+                    now - snapshot.loaded >= \
+                    config['B2SHARE_COMMUNITIES_REGISTRY_TTL']:
+                snapshot = self._snapshot = self._load(generation)
+            self._checked = now
+        return snapshot
+
+    def get(self, id=None, name=None, with_deleted=False):
+        """Retrieve a community by its id or name.
+
+        Communities which are not in the snapshot, for example communities
+        created by the current transaction, are retrieved from the database.
+
+        See :py:meth:`b2share.modules.communities.api.Community.get` for the
+        arguments and raised exceptions.
+        """
+        if not id and not name:
+            raise ValueError('"id" or "name" should be set.')
+        if id and name:
+            raise ValueError('"id" and "name" should not be both set.')
+        snapshot = self._current()
+        if id:
+            community = snapshot.by_id.get(str(id))
+        else:
+            community = snapshot.by_name.get(name)
+        if community is None:
+            return Community.get(id=id, name=name, with_deleted=with_deleted)
+        if community.deleted and not with_deleted:
+            raise CommunityDeletedError(id)
+        return community
+
+    def get_all(self, start=None, stop=None):
+        """List the communities ordered by name.
+
+        Args:
+            start (int): index of the first returned community.
+            stop (int): index after the last returned community.
+
+        Returns:
+            list: the communities.
+        """
+        if (start is None) != (stop is None):
+            raise ValueError("Neither or both start and stop should be None")
+        communities = self._current().communities
+        if start is None:
+            return list(communities)
+        return communities[int(start):int(stop)]
+
+    def invalidate(self):
+        """Reload the communities in every process."""
+        self._snapshot = None
+        self.shared.incr('generation')
+
+
+def invalidate_community_registry(community):
+    """Invalidate the registry once the modified community is committed.
+
+    Receiver of the community modification signals.
+    """
+    state = current_app.extensions.get('b2share-communities')
+    if state is not None:
+        run_after_commit(state.registry.invalidate)
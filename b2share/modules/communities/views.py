@@ -38,6 +38,7 @@ from werkzeug.exceptions import HTTPException
 from werkzeug.local import LocalProxy
 
 from .api import Community
+from .proxies import current_community_registry
 from .errors import CommunityDeletedError, CommunityDoesNotExistError, \
     InvalidCommunityError
 from .permissions import communities_create_all_permission, \
@@ -63,9 +64,10 @@ def pass_community(f):
     def inner(self, community_id, *args, **kwargs):
         try:
             if is_valid_uuid(community_id):
-                community = Community.get(id=community_id)
+                community = current_community_registry.get(id=community_id)
             else:
-                community = Community.get(name=community_id)
+                community = current_community_registry.get(
+                    name=community_id)
         except (CommunityDoesNotExistError):
             abort(404)
         except (CommunityDeletedError):
@@ -148,7 +150,7 @@ class CommunityListResource(ContentNegotiatedMethodView):
         from .serializers import community_to_dict
         start = request.args.get('start') or 0
         stop = request.args.get('stop') or 100
-        community_list = Community.get_all(start, stop)
+        community_list = current_community_registry.get_all(start, stop)
         community_dict_list = [community_to_dict(c) for c in community_list]
         response_dict = _generic_search_result(community_dict_list)
         response = jsonify(response_dict)
@@ -52,6 +52,12 @@ state`` which can be either **draft**, **submitted** or **published**. The
 publication state is registered within the deposit's metadata in the
 ``publication_state`` field.
 
+Ingest pipelines can create many deposits at once by calling
+``POST /api/records/bulk`` with one deposit per line (JSON Lines), or with the
+``b2share deposit bulk-create`` command. The deposits are created in chunked
+transactions and indexed with one bulk request per chunk, see
+:py:mod:`b2share.modules.deposit.bulk`.
+
 
 Workflow
 ^^^^^^^^
@@ -30,14 +30,15 @@ from enum import Enum
 from urllib.parse import urlparse, urlunparse
 from sqlalchemy.exc import IntegrityError
 
-from flask import url_for, g, current_app
+from flask import url_for, g, current_app, has_request_context
 from flask_login import current_user
-from jsonschema.validators import validator_for, validate as validate_schema
+from jsonschema.validators import validate as validate_schema
 from jsonschema.exceptions import ValidationError
 from b2share.modules.schemas.api import CommunitySchema
 from b2share.modules.deposit.minters import b2share_deposit_uuid_minter
 from b2share.modules.deposit.fetchers import b2share_deposit_uuid_fetcher
 from jsonpatch import apply_patch
+from werkzeug.utils import cached_property
 
 from invenio_db import db
 from invenio_files_rest.models import Bucket, FileInstance, ObjectVersion
@@ -45,7 +46,6 @@ from invenio_deposit.api import Deposit as InvenioDeposit, has_status, preserve
 from invenio_records_files.api import Record
 from invenio_records_files.models import RecordsBuckets
 from invenio_records.errors import MissingModelError
-from invenio_indexer.api import RecordIndexer
 from invenio_pidrelations.contrib.versioning import PIDVersioning
 from invenio_pidstore.models import PersistentIdentifier, PIDStatus
 from invenio_pidstore.resolver import Resolver
@@ -57,21 +57,25 @@ from .errors import (InvalidDepositError,
                      DraftExistsVersioningError,
                      IncorrectRecordVersioningError,
                      RecordNotFoundVersioningError)
-from b2share.modules.communities.api import Community
+from b2share.modules.communities.proxies import current_community_registry
 from b2share.modules.communities.errors import CommunityDoesNotExistError
 from b2share.modules.communities.workflows import publication_workflows
 from b2share.modules.records.api import B2ShareRecord
 from b2share.modules.records.errors import InvalidRecordError
 from b2share.modules.records.utils import is_publication
 from b2share.modules.records.providers import RecordUUIDProvider
+from b2share.modules.records.outbox import queue_record_index
 from b2share.modules.access.policies import is_under_embargo
 from b2share.modules.schemas.errors import CommunitySchemaDoesNotExistError
 from b2share.modules.schemas.api import CommunitySchema
+from b2share.modules.schemas.proxies import current_schema_validators
+from b2share.modules.schemas.validators import parse_community_schema_url
 from b2share.modules.deposit.minters import b2share_deposit_uuid_minter
 from b2share.modules.deposit.fetchers import b2share_deposit_uuid_fetcher
 from b2share.modules.deposit.providers import DepositUUIDProvider
 from b2share.modules.handle.proxies import current_handle
 from b2share.modules.handle.errors import EpicPIDError
+from b2share.utils import run_after_commit
 
 
 class PublicationStates(Enum):
@@ -98,6 +102,9 @@ class Deposit(InvenioDeposit):
 
     def __init__(self, *args, **kwargs):
         super(Deposit, self).__init__(*args, **kwargs)
+        self.patched_pointers = None
+        """JSON pointers modified by the patch which created this deposit
+        instance. Only them are validated when the draft is committed."""
 
     @property
     def record_schema(self):
@@ -123,22 +130,19 @@ class Deposit(InvenioDeposit):
         :params patch: Dictionary of record metadata.
         :returns: A new :class:`Record` instance.
         """
-        data = dict(self)
-        # Copying temporarily 'external_pids' field in order to give the
-        # illusion that this field actually exist.
-        # TODO: Note that the 'external_pids' field should in the end
-        # be part of the root schema.
-        external_pids = generate_external_pids(self)
-        if external_pids:
-            data['external_pids'] = external_pids
-        data = apply_patch(data, patch)
+        # The patch is applied only once per request, see PatchedDeposit.
+        patched = get_patched_deposit(self, patch)
+        data = dict(patched.data)
 
         # if the 'external_pids' field was not modified we can discard it.
         if 'external_pids' in data and \
                 data['external_pids'] == data['_deposit'].get('external_pids'):
             del data['external_pids']
 
-        return self.__class__(data, model=self.model)
+        deposit = self.__class__(data, model=self.model)
+        if current_app.config['B2SHARE_DEPOSIT_INCREMENTAL_VALIDATION']:
+            deposit.patched_pointers = patched.pointers
+        return deposit
 
     @contextmanager
     def _process_files(self, record_id, data):
@@ -151,7 +155,13 @@ class Deposit(InvenioDeposit):
         with super(Deposit, self)._process_files(record_id, data):
             if not self.files:
                 data['_files'] = []
-            create_file_pids(data)
+            deferred = current_app.config['B2SHARE_HANDLE_DEFERRED_FILE_PIDS']
+            create_file_pids(data, deferred=deferred)
+            if deferred and data['_deposit'].get('file_pids_status'):
+                from b2share.modules.records.tasks import \
+                    create_record_file_pids
+                run_after_commit(
+                    lambda: create_record_file_pids.delay(str(record_id)))
             yield data
 
     @property
@@ -295,31 +305,38 @@ class Deposit(InvenioDeposit):
         data['publication_state'] = PublicationStates.draft.name
 
     def validate(self, **kwargs):
-        if ('publication_state' in self and
-                self['publication_state'] == PublicationStates.draft.name):
-            if 'community' not in self:
-                raise ValidationError('Missing required field "community"')
-            try:
-                community_id = uuid.UUID(self['community'])
-            except (ValueError, KeyError) as e:
-                raise InvalidDepositError('Community ID is not a valid UUID.') \
-                    from e
-            default_validator = validator_for(
-                CommunitySchema.get_community_schema(community_id).build_json_schema())
-            if 'required' not in default_validator.VALIDATORS:
-                raise NotImplementedError('B2Share does not support schemas '
-                                          'which have no "required" keyword.')
-            DraftDepositValidator = type(
-                'DraftDepositValidator',
-                (default_validator,),
-                dict(VALIDATORS=copy.deepcopy(default_validator.VALIDATORS))
-            )
-            # function ignoring the validation of the given keyword
-            ignore = lambda *args, **kwargs: None
-            DraftDepositValidator.VALIDATORS['required'] = ignore
-            DraftDepositValidator.VALIDATORS['minItems'] = ignore
-            kwargs['validator'] = DraftDepositValidator
-        return super(Deposit, self).validate(**kwargs)
+        """Validate the deposit with the cached community schema validators.
+
+        Draft deposits ignore the "required" and "minItems" keywords so that
+        users can save incomplete metadata.
+        """
+        if self.get('$schema') is None:
+            return
+        draft = ('publication_state' in self and
+                 self['publication_state'] == PublicationStates.draft.name)
+        if draft and 'community' not in self:
+            raise ValidationError('Missing required field "community"')
+        if 'community' not in self:
+            return super(Deposit, self).validate(**kwargs)
+        try:
+            community_id = uuid.UUID(self['community'])
+        except (ValueError, KeyError) as e:
+            raise InvalidDepositError('Community ID is not a valid UUID.') \
+                from e
+        schema_community_id, schema_version = \
+            parse_community_schema_url(self['$schema'])
+        if schema_community_id != str(community_id):
+            schema_version = None
+        compiled = current_schema_validators.get(community_id,
+                                                 schema_version)
+        # The patched pointers are only valid for the first validation after
+        # the patch.
+        pointers, self.patched_pointers = self.patched_pointers, None
+        if draft and pointers is not None:
+            return compiled.validate_draft_paths(self, self['$schema'],
+                                                 pointers, **kwargs)
+        return compiled.validate(self, self['$schema'], draft=draft,
+                                 **kwargs)
 
     def commit(self):
         """Store changes on current instance in database.
@@ -369,7 +386,8 @@ class Deposit(InvenioDeposit):
 
         if 'community' in self:
             try:
-                community = Community.get(self['community'])
+                community = current_community_registry.get(
+                    self['community'])
             except CommunityDoesNotExistError as e:
                 raise InvalidDepositError('Community {} does not exist.'.format(
                     self['community'])) from e
@@ -400,15 +418,9 @@ class Deposit(InvenioDeposit):
             # Reindex previous version. This is needed in order to update
             # the is_last_version flag
             if previous_version_pid is not None:
-                self.indexer.index_by_id(previous_version_uuid)
-
-            # save the action for later indexing
-            if g:
-                g.deposit_action = 'publish'
+                queue_record_index(previous_version_uuid)
         else:
             super(Deposit, self).commit()
-            if g:
-                g.deposit_action = 'update-metadata'
         return self
 
     def publish(self):
@@ -460,30 +472,49 @@ class Deposit(InvenioDeposit):
             bucket.remove()
 
 
-def create_file_pids(record_metadata):
+def create_file_pids(record_metadata, deferred=False):
+    """Create the missing Handle PIDs of a record's files.
+
+    The PIDs are created in parallel, see
+    :py:meth:`b2share.modules.handle.ext._B2ShareHandleState.create_handles`.
+    The ``_deposit.file_pids_status`` field of the record is set to
+    ``'pending'`` until they are created, and to ``'failed'`` if some of them
+    could not be created.
+
+    Args:
+        record_metadata (dict): the record metadata.
+        deferred (bool): if True the PIDs are not created, the record is only
+            marked as pending. They are created later by
+            :py:func:`b2share.modules.records.tasks.create_record_file_pids`.
+    """
     from flask import current_app
     throw_on_failure = current_app.config.get(
         'CFG_FAIL_ON_MISSING_FILE_PID', False)
     external_pids = record_metadata['_deposit'].get('external_pids', [])
     external_keys = { x.get('key') for x in external_pids }
-    for f in record_metadata.get('_files'):
-        if f.get('ePIC_PID') or f.get('key') in external_keys:
-            continue
-        file_url = url_for('invenio_files_rest.object_api',
-                           bucket_id=f.get('bucket'), key=f.get('key'),
-                           _external=True)
-        try:
-            file_pid = current_handle.create_handle(
-                file_url, checksum=f.get('checksum'), fixed=True
-            )
-            if file_pid is None:
-                raise EpicPIDError("EPIC PID allocation for file failed")
+    files = [f for f in record_metadata.get('_files')
+             if not f.get('ePIC_PID') and f.get('key') not in external_keys]
+    record_metadata['_deposit'].pop('file_pids_status', None)
+    if not files:
+        return
+    if deferred:
+        record_metadata['_deposit']['file_pids_status'] = 'pending'
+        return
+    file_pids = current_handle.create_handles([dict(
+        location=url_for('invenio_files_rest.object_api',
+                         bucket_id=f.get('bucket'), key=f.get('key'),
+                         _external=True),
+        checksum=f.get('checksum'),
+        fixed=True,
+    ) for f in files])
+    for f, file_pid in zip(files, file_pids):
+        if not isinstance(file_pid, EpicPIDError):
             f['ePIC_PID'] = file_pid
-        except EpicPIDError as e:
-            if throw_on_failure:
-                raise e
-            else:
-                current_app.logger.warning(e)
+        elif throw_on_failure:
+            raise file_pid
+        else:
+            current_app.logger.warning(file_pid)
+            record_metadata['_deposit']['file_pids_status'] = 'failed'
 
 
 def create_b2safe_file(external_pids, bucket):
@@ -588,6 +619,127 @@ def generate_external_pids(record):
     return external_pids
 
 
+_missing = object()
+
+
+def _patched_fields(patch):
+    """List the top level fields which a JSON patch reads or modifies.
+
+    Returns:
+        set: the field names or None if the patch targets the whole document.
+    """
+    fields = set()
+    for operation in patch:
+        for pointer in [operation.get('path'), operation.get('from')]:
+            if pointer is None:
+                continue
+            if not pointer.startswith('/'):
+                return None
+            fields.add(pointer.split('/')[1].replace('~1', '/')
+                       .replace('~0', '~'))
+    return fields
+
+
+class PatchedDeposit(object):
+    """Result of applying a JSON patch to a deposit.
+
+    The patched metadata shares with the deposit every top level field which
+    the patch does not touch. Only the touched fields are copied before being
+    patched, and only they are compared in order to detect modifications.
+
+    The field "external_pids" is generated from the deposit's files only if
+    the patch touches it. This gives the illusion that this field actually
+    exists.
+    TODO: Note that the 'external_pids' field should in the end be part of
+    the root schema.
+    """
+
+    def __init__(self, deposit, patch):
+        """Constructor.
+
+        Args:
+            deposit (:class:`Deposit`): the deposit, which is not modified.
+            patch (list): the JSON patch.
+
+        Raises:
+            :class:`jsonpatch.JsonPatchException`,
+            :class:`jsonpatch.JsonPointerException`: invalid patch.
+        """
+        self.deposit = deposit
+        self.patch = patch
+        self.fields = _patched_fields(patch)
+        """Top level fields touched by the patch, None for all."""
+        self.pointers = None
+        """JSON pointers touched by the patch, None for the whole document.
+        """
+        if self.fields is not None:
+            self.pointers = [pointer for operation in patch
+                             for pointer in [operation.get('path'),
+                                             operation.get('from')]
+                             if pointer is not None]
+        self.external_pids = []
+        data = dict(deposit)
+        if self.fields is None or 'external_pids' in self.fields:
+            self.external_pids = generate_external_pids(deposit)
+            if self.external_pids:
+                data['external_pids'] = self.external_pids
+        if self.fields is None:
+            data = copy.deepcopy(data)
+        else:
+            for field in self.fields:
+                if field in data:
+                    data[field] = copy.deepcopy(data[field])
+        self.data = apply_patch(data, patch, in_place=True)
+        """Patched metadata, including "external_pids" if the patch touched
+        it."""
+
+    @cached_property
+    def changed_fields(self):
+        """Top level fields whose value is modified by the patch."""
+        fields = self.fields
+        if fields is None:
+            fields = set(self.data).union(self.deposit)
+        original = dict(self.deposit)
+        if self.external_pids:
+            original['external_pids'] = self.external_pids
+        return {field for field in fields
+                if self.data.get(field, _missing) !=
+                original.get(field, _missing)}
+
+    @property
+    def metadata_changed(self):
+        """True if the patch modifies other fields than the publication state
+        and the external files."""
+        return bool(self.changed_fields -
+                    {'publication_state', 'external_pids'})
+
+    @property
+    def external_pids_changed(self):
+        """True if the patch modifies the external files."""
+        return 'external_pids' in self.changed_fields
+
+
+def get_patched_deposit(deposit, patch):
+    """Apply a JSON patch to a deposit only once per request.
+
+    The permission check and the update of a deposit both need the patched
+    deposit. The first call computes it and the following calls with the same
+    deposit revision and patch reuse it.
+
+    Returns:
+        :class:`PatchedDeposit`: the patched deposit.
+    """
+    if not has_request_context():
+        return PatchedDeposit(deposit, patch)
+    patched = getattr(g, 'patched_deposit', None)
+    if (patched is None or patched.deposit.id != deposit.id or
+            patched.deposit.revision_id != deposit.revision_id or
+            patched.patch != patch):
+        patched = PatchedDeposit(deposit, patch)
+        g.patched_deposit = patched
+    return patched
+
+
 copy_data_from_previous.extra_removed_fields = [
     'publication_state', 'publication_date', '$schema'
 ]
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of EUDAT B2Share.
+# Copyright (C) 2016 CERN.
+#
+# B2Share is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of the
+# License, or (at your option) any later version.
+#
+# B2Share is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with B2Share; if not, write to the Free Software Foundation, Inc.,
+# 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+#
+# In applying this license, CERN does not
+# waive the privileges and immunities granted to it by virtue of its status
+# as an Intergovernmental Organization or submit itself to any jurisdiction.
+
+"""Bulk creation of deposits.
+
+Ingest pipelines create many small deposits. Creating them with one HTTP
+request each commits and indexes every deposit separately. Instead,
+:py:func:`create_deposits` creates a batch of deposits chunk by chunk:
+
+* every deposit is created in a savepoint so that an invalid deposit does not
+  abort the rest of its chunk.
+* every chunk is committed once. The created deposits and the published
+  records are then indexed with one bulk request, see
+  :py:mod:`b2share.modules.records.outbox`.
+* the metadata is validated with the cached community schema validators, see
+  :py:mod:`b2share.modules.schemas.validators`.
+"""
+
+from __future__ import absolute_import, print_function
+
+import json
+import uuid
+
+from flask import current_app
+from invenio_db import db
+from invenio_rest.errors import RESTException
+from jsonschema.exceptions import ValidationError
+
+from b2share.modules.communities.errors import CommunityDeletedError, \
+    CommunityDoesNotExistError
+from b2share.modules.records.outbox import discard_record_index, \
+    queue_record_index
+
+from .api import Deposit
+from .minters import b2share_deposit_uuid_minter
+from .permissions import CreateDepositPermission
+
+
+class _OutboxIndexer(object):
+    """Indexer queueing the deposits in the transaction's index outbox."""
+
+    def index(self, record):
+        queue_record_index(record.id)
+
+    def delete(self, record):
+        discard_record_index(record.id)
+
+
+class BulkDeposit(Deposit):
+    """Deposit indexed once its chunk is committed instead of immediately.
+    """
+
+    indexer = _OutboxIndexer()
+
+
+class BulkItemError(Exception):
+    """Exception raised when one deposit of a batch cannot be created."""
+
+    def __init__(self, status, message):
+        super(BulkItemError, self).__init__(message)
+        self.status = status
+        self.message = message
+
+
+def load_jsonl(lines):
+    """Parse a batch of deposits in JSON Lines format.
+
+    Args:
+        lines: the lines of the batch, as str. Empty lines are ignored.
+
+    Returns:
+        list: the metadata of each deposit.
+
+    Raises:
+        ValueError: a line is not a valid JSON object.
+    """
+    items = []
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            raise ValueError('Line {}: invalid JSON: {}'.format(number, e))
+        if not isinstance(data, dict):
+            raise ValueError('Line {}: not a JSON object.'.format(number))
+        items.append(data)
+    return items
+
+
+def _create_deposit(data, record_uuid, owner_id=None, submit=False,
+                    check_permission=True):
+    """Create one deposit of a batch in the current transaction.
+
+    Returns:
+        :class:`BulkDeposit`: the created deposit.
+
+    Raises:
+        :class:`BulkItemError`: the deposit is invalid or forbidden.
+    """
+    if not data.get('community'):
+        raise BulkItemError(400, 'Missing required field "community".')
+    try:
+        uuid.UUID(str(data['community']))
+    except ValueError:
+        raise BulkItemError(400, 'Community ID is not a valid UUID.')
+    try:
+        permission = CreateDepositPermission(record=data)
+    except (CommunityDoesNotExistError, CommunityDeletedError):
+        raise BulkItemError(
+            400, 'Community {} does not exist.'.format(data['community']))
+    if check_permission and not permission.can():
+        raise BulkItemError(403, 'Deposit creation is not allowed.')
+
+    b2share_deposit_uuid_minter(record_uuid, data=data)
+    if owner_id is not None:
+        data['_deposit']['owners'] = [owner_id]
+        data['_deposit']['created_by'] = owner_id
+    deposit = BulkDeposit.create(data, id_=record_uuid)
+    if submit:
+        deposit.submit()
+    return deposit
+
+
+def create_deposits(items, owner_id=None, submit=False, chunk_size=None,
+                    check_permission=True):
+    """Create a batch of deposits.
+
+    Args:
+        items (list): the metadata of each deposit, as accepted by the
+            deposit creation REST API.
+        owner_id (int): id of the deposits' owner. If None the owner is the
+            current user.
+        submit (bool): if True every deposit is also submitted, which
+            publishes it if its community uses the "direct_publish" workflow.
+            A deposit which cannot be submitted is not created.
+        chunk_size (int): number of deposits created per transaction. Defaults
+            to ``B2SHARE_DEPOSIT_BULK_CHUNK_SIZE``.
+        check_permission (bool): if True, deposits which the current user
+            is not allowed to create are rejected.
+
+    Returns:
+        list: one dict per item, in the same order, with the keys "status"
+            (HTTP status code), and either "id" (deposit id) and
+            "publication_state" or "message" (error description).
+    """
+    chunk_size = chunk_size or \
+        current_app.config['B2SHARE_DEPOSIT_BULK_CHUNK_SIZE']
+    results = []
+    for start in range(0, len(items), chunk_size):
+        for data in items[start:start + chunk_size]:
+            record_uuid = uuid.uuid4()
+            try:
+                with db.session.begin_nested():
+                    deposit = _create_deposit(
+                        data, record_uuid, owner_id=owner_id, submit=submit,
+                        check_permission=check_permission)
+            except (BulkItemError, ValidationError, RESTException) as e:
+                # the savepoint is rolled back, do not index the deposit.
+                discard_record_index(record_uuid)
+                if isinstance(e, BulkItemError):
+                    results.append({'status': e.status,
+                                    'message': e.message})
+                elif isinstance(e, ValidationError):
+                    results.append({'status': 400, 'message': e.message})
+                else:
+                    results.append({'status': e.code,
+                                    'message': e.get_description()})
+            else:
+                results.append({
+                    'status': 201,
+                    'id': deposit['_deposit']['id'],
+                    'publication_state': deposit['publication_state'],
+                })
+        db.session.commit()
+    return results
@@ -26,15 +26,20 @@
 
 from __future__ import absolute_import, print_function
 
+import json
+
 import click
 from flask.cli import with_appcontext
 from flask import current_app
 import requests
 
+from invenio_accounts.models import User
 from invenio_db import db
 from invenio_deposit.cli import deposit
 
+from b2share.modules.deposit.bulk import create_deposits, load_jsonl
 from b2share.modules.deposit.utils import delete_deposit
+from b2share.utils import get_base_url
 
 
 @deposit.command('delete')
@@ -53,4 +58,38 @@ def delete(deposit_pid):
         raise click.ClickException("It is not possible to delete deposit_pid: {}".format(deposit_pid))
 
    
-        
\ No newline at end of file
+        
+
+@deposit.command('bulk-create')
+@with_appcontext
+@click.argument('batch', type=click.File('r'))
+@click.option('-o', '--owner', required=True,
+              help='email of the owner of the created deposits.')
+@click.option('-s', '--submit', is_flag=True, default=False,
+              help='submit the created deposits.')
+@click.option('--chunk-size', default=None, type=int,
+              help='number of deposits created per transaction.')
+def bulk_create(batch, owner, submit, chunk_size):
+    """Create deposits from a JSON Lines file.
+
+    BATCH contains the metadata of one deposit per line. The status of every
+    deposit is printed as one JSON line, in the same order.
+    """
+    user = User.query.filter(User.email == owner).one_or_none()
+    if user is None:
+        raise click.BadParameter('No user with email {}.'.format(owner),
+                                 param_hint='owner')
+    try:
+        items = load_jsonl(batch)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    with current_app.test_request_context('/', base_url=get_base_url()):
+        results = create_deposits(items, owner_id=user.id, submit=submit,
+                                  chunk_size=chunk_size,
+                                  check_permission=False)
+    for result in results:
+        click.echo(json.dumps(result))
+    failed = sum(1 for result in results if result['status'] != 201)
+    click.secho('{} deposits created, {} failed.'.format(
+        len(results) - failed, failed), err=True,
+        fg='red' if failed else 'green')
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of EUDAT B2Share.
+# Copyright (C) 2016 CERN.
+#
+# B2Share is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of the
+# License, or (at your option) any later version.
+#
+# B2Share is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with B2Share; if not, write to the Free Software Foundation, Inc.,
+# 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+#
+# In applying this license, CERN does not
+# waive the privileges and immunities granted to it by virtue of its status
+# as an Intergovernmental Organization or submit itself to any jurisdiction.
+
+"""B2Share Deposit module configuration."""
+
+from __future__ import absolute_import, print_function
+
+B2SHARE_DEPOSIT_ACL_CACHE_TTL = 24 * 3600
+"""Seconds during which the communities whose deposits a user can read are
+cached. The cache is also invalidated when access rights or roles change."""
+
+B2SHARE_DEPOSIT_BULK_CHUNK_SIZE = 100
+"""Number of deposits created per transaction by the bulk creation API."""
+
+B2SHARE_DEPOSIT_BULK_MAX_ITEMS = 1000
+"""Maximum number of deposits in one bulk creation request."""
+
+B2SHARE_DEPOSIT_INCREMENTAL_VALIDATION = True
+"""If True, a draft modified with a JSON patch is validated only where the
+patch modifies it. Submitted and published deposits are always fully
+validated."""
@@ -25,12 +25,16 @@
 
 from __future__ import absolute_import, print_function
 
+from invenio_db import db
 from invenio_records_rest.utils import PIDConverter
 from invenio_records_rest import utils
+from sqlalchemy import event
 
 from .views import create_blueprint
+from .permissions import invalidate_readable_communities_on_change
 
 from .cli import deposit as deposit_cmd
+from . import config
 
 
 class B2ShareDeposit(object):
@@ -46,7 +50,10 @@ class B2ShareDeposit(object):
         self.init_config(app)
         app.cli.add_command(deposit_cmd)
         app.extensions['b2share-deposit'] = self
-        
+        if not event.contains(db.session, 'after_flush',
+                              invalidate_readable_communities_on_change):
+            event.listen(db.session, 'after_flush',
+                         invalidate_readable_communities_on_change)
 
         # Register records API blueprints
         endpoints = app.config['B2SHARE_DEPOSIT_REST_ENDPOINTS']
@@ -63,4 +70,6 @@ class B2ShareDeposit(object):
 
     def init_config(self, app):
         """Initialize configuration."""
-        pass
+        for k in dir(config):
+            if k.startswith('B2SHARE_DEPOSIT_'):
+                app.config.setdefault(k, getattr(config, k))
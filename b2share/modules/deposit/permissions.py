@@ -24,27 +24,28 @@
 """Access controls for deposits."""
 
 import json
-from copy import deepcopy
 from collections import namedtuple
 from itertools import chain
 from functools import partial
 
-from jsonpatch import apply_patch
 from flask_principal import UserNeed
 from invenio_access.permissions import (
     superuser_access, ParameterizedActionNeed, DynamicPermission
 )
 from invenio_access.models import ActionUsers, ActionRoles
 from flask_security import current_user
-from invenio_accounts.models import userrole
+from invenio_accounts.models import Role, User, userrole
+from sqlalchemy import inspect
 from b2share.modules.files.permissions import DepositFilesPermission
-from b2share.modules.deposit.api import generate_external_pids
+from b2share.modules.deposit.api import get_patched_deposit
 
-from flask import request, abort
+from flask import request, abort, current_app
+from b2share.cache import SharedCache
+from b2share.utils import run_after_commit
 from b2share.modules.access.permissions import (AuthenticatedNeed,
                                                 OrPermissions, AndPermissions,
                                                 StrictDynamicPermission)
-from b2share.modules.communities.api import Community
+from b2share.modules.communities.proxies import current_community_registry
 from invenio_db import db
 
 from .api import PublicationStates
@@ -114,35 +115,102 @@ update_deposit_metadata_need = update_deposit_metadata_need_factory(None, None)
 ReadableCommunities = namedtuple('ReadableCommunities', ['all', 'communities'])
 
 
-def list_readable_communities(user_id):
-    """List all communities whose records can be read by the given user.
+_readable_communities_cache = SharedCache('readable-communities')
 
-    Args:
-        user_id: id of the user which has read access to the retured
-        communities.
 
-    Returns:
-        ReadableCommunities: list of communities which can be read by the
-        given user with the publication_states limitation when the access
-        is restricted to some states.
-    """
-    result = ReadableCommunities(set(), {})
-    roles_needs = db.session.query(ActionRoles).join(
+def _load_readable_communities(user_id):
+    """Query the communities whose records can be read by the given user."""
+    communities = {}
+    roles_needs = db.session.query(ActionRoles.argument).join(
         userrole, ActionRoles.role_id == userrole.columns['role_id']
     ).filter(
         userrole.columns['user_id'] == user_id,
         ActionRoles.action == 'read-deposit',
     ).all()
-    user_needs = ActionUsers.query.filter(
+    user_needs = db.session.query(ActionUsers.argument).filter(
         ActionUsers.user_id == user_id,
         ActionUsers.action == 'read-deposit',
     ).all()
 
     for need in chain(roles_needs, user_needs):
         argument = json.loads(need.argument)
-        result.communities.setdefault(argument['community'], set()).add(
+        communities.setdefault(argument['community'], set()).add(
             argument['publication_state'])
-    return result
+    return communities
+
+
+def list_readable_communities(user_id):
+    """List all communities whose records can be read by the given user.
+
+    The result is cached until the access rights or roles change, see
+    :py:func:`invalidate_readable_communities`.
+
+    Args:
+        user_id: id of the user which has read access to the retured
+        communities.
+
+    Returns:
+        ReadableCommunities: list of communities which can be read by the
+        given user with the publication_states limitation when the access
+        is restricted to some states.
+    """
+    key = '{}:{}'.format(
+        _readable_communities_cache.get('generation') or 0, user_id)
+    cached = _readable_communities_cache.get(key)
+    if cached is not None:
+        return ReadableCommunities(set(), {
+            community: set(states) for community, states in cached
+        })
+    communities = _load_readable_communities(user_id)
+    _readable_communities_cache.set(key, [
+        [community, sorted(states)]
+        for community, states in communities.items()
+    ], timeout=current_app.config['B2SHARE_DEPOSIT_ACL_CACHE_TTL'])
+    return ReadableCommunities(set(), communities)
+
+
+def invalidate_readable_communities():
+    """Discard the cached readable communities of every user."""
+    _readable_communities_cache.incr('generation')
+
+
+def invalidate_readable_communities_on_change(session, flush_context):
+    """Invalidate the readable communities when access rights are flushed.
+
+    Listens to the "after_flush" event of the database sessions. The cache is
+    invalidated once the modified access rights or roles are committed.
+    """
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, (ActionUsers, ActionRoles)) or (
+                isinstance(obj, User) and
+                inspect(obj).attrs.roles.history.has_changes()) or (
+                isinstance(obj, Role) and
+                inspect(obj).attrs.users.history.has_changes()):
+            run_after_commit(invalidate_readable_communities)
+            return
+
+
+def deposit_read_scope(community, publication_state):
+    """Build the token granting read access to deposits.
+
+    Every indexed deposit stores the token of its community and publication
+    state. The deposits readable by a user are then found with a single
+    "terms" filter on the user's tokens.
+    """
+    return '{}:{}'.format(community, publication_state)
+
+
+def list_readable_scopes(user_id):
+    """List the read tokens of the deposits readable by the given user.
+
+    See :py:func:`deposit_read_scope`.
+    """
+    return sorted(
+        deposit_read_scope(community, publication_state)
+        for community, publication_states in
+        list_readable_communities(user_id).communities.items()
+        for publication_state in publication_states
+    )
 
 
 class CreateDepositPermission(AndPermissions):
@@ -158,7 +226,7 @@ class CreateDepositPermission(AndPermissions):
         self.record = record
         if record is not None:
             needs = set()
-            community = Community.get(record['community'])
+            community = current_community_registry.get(record['community'])
             publication_state = record.get('publication_state', 'draft')
             if publication_state != 'draft' or community.restricted_submission:
                 needs.add(create_deposit_need_factory())
@@ -269,47 +337,34 @@ class UpdateDepositPermission(DepositPermission):
 
     def _load_additional_permissions(self):
         permissions = []
-        new_deposit = None
         # Check submit/publish actions
         if (request.method == 'PATCH' and
             request.content_type == 'application/json-patch+json'):
-            # FIXME: need some optimization on Invenio side. We are applying
-            # the patch twice
+            # The patched deposit is computed once and reused when the
+            # deposit is updated.
             patch = deposit_patch_input_loader(self.deposit)
-            new_deposit = deepcopy(self.deposit)
-            # Generate 'external_pids' field in order to give
-            # the illusion that this field actually exist.
-            external_pids = generate_external_pids(self.deposit)
-            if external_pids:
-                new_deposit['external_pids'] = deepcopy(external_pids)
-            apply_patch(new_deposit, patch, in_place=True)
-            external_pids_changed = False
-            if external_pids:
-                external_pids_changed = (
-                    external_pids != new_deposit['external_pids']
-                )
-                del new_deposit['external_pids']
+            patched = get_patched_deposit(self.deposit, patch)
+            new_state = patched.data['publication_state']
         else:
             abort(400)
 
         # Create permission for updating the state_field
-        if (new_deposit is not None and new_deposit['publication_state']
-                != self.deposit['publication_state']):
+        if new_state != self.deposit['publication_state']:
             state_permission = StrictDynamicPermission()
             state_permission.explicit_needs.add(
                 update_deposit_publication_state_need_factory(
                     community=self.deposit['community'],
                     old_state=self.deposit['publication_state'],
-                    new_state=new_deposit['publication_state']
+                    new_state=new_state
                 )
             )
             # Owners of a record can always "submit" it.
             if (self.deposit['publication_state'] == PublicationStates.draft.name and
-                new_deposit['publication_state'] == PublicationStates.submitted.name or
+                new_state == PublicationStates.submitted.name or
                 # Owners have also the right to move the record from submitted
                 # to draft again.
                 self.deposit['publication_state'] == PublicationStates.submitted.name and
-                new_deposit['publication_state'] == PublicationStates.draft.name):
+                new_state == PublicationStates.draft.name):
                 # Owners are allowed to update
                 for owner_id in self.deposit['_deposit']['owners']:
                     state_permission.explicit_needs.add(UserNeed(owner_id))
@@ -318,17 +373,13 @@ class UpdateDepositPermission(DepositPermission):
         # Create permission for updating generic metadata fields.
         # Only superadmin can modify published draft.
         if self.deposit['publication_state'] != 'published':
-            new_state = new_deposit['publication_state']
             # Check if any metadata has been changed
-            del new_deposit['publication_state']
-            original_metadata = deepcopy(self.deposit)
-            del original_metadata['publication_state']
-            if original_metadata != new_deposit:
+            if patched.metadata_changed:
                 permissions.append(
                     UpdateDepositMetadataPermission(self.deposit, new_state)
                 )
 
-            if external_pids_changed:
+            if patched.external_pids_changed:
                 permissions.append(
                     DepositFilesPermission(self.deposit, 'bucket-update')
                 )
@@ -341,9 +392,7 @@ class UpdateDepositPermission(DepositPermission):
             # Avoid forbidding requests doing nothing. This can be useful if
             # a script replays an action.
             self.permissions.add(
-                UpdateDepositMetadataPermission(
-                    self.deposit, new_deposit['publication_state']
-                )
+                UpdateDepositMetadataPermission(self.deposit, new_state)
             )
 
 
@@ -24,7 +24,8 @@
 
 from functools import partial
 
-from flask import abort, Blueprint, current_app, g, request
+from flask import abort, Blueprint, current_app, jsonify, request, url_for
+from flask_login import current_user
 from invenio_files_rest.errors import InvalidOperationError
 from invenio_pidstore.errors import PIDInvalidAction
 from invenio_pidstore.resolver import Resolver
@@ -36,10 +37,11 @@ from invenio_records_rest.links import default_links_factory
 from invenio_records_rest.views import RecordResource, pass_record
 from invenio_records_rest.views import verify_record_permission
 from invenio_deposit.search import DepositSearch
-from invenio_indexer.api import RecordIndexer
 from invenio_pidrelations.contrib.versioning import PIDVersioning
 from invenio_pidstore.models import PIDStatus
 from b2share.modules.deposit.api import Deposit
+from b2share.modules.deposit.bulk import create_deposits, load_jsonl
+from b2share.modules.deposit.errors import InvalidDepositError
 from b2share.modules.records.providers import RecordUUIDProvider
 
 
@@ -165,26 +167,55 @@ def create_blueprint(endpoints):
         for rule in records_rest_url_rules(endpoint, **options):
             blueprint.add_url_rule(**rule)
 
+    blueprint.add_url_rule('/records/bulk', 'bulk_create',
+                           bulk_create_deposits, methods=['POST'])
+
     return blueprint
 
 
+def bulk_create_deposits():
+    """Create a batch of deposits.
+
+    The request body contains one deposit per line, in JSON Lines format,
+    with the same metadata as accepted when creating a single deposit. If
+    the query argument ``submit`` is "true" the deposits are also submitted.
+
+    The response lists the status of every deposit in the order of the
+    request. See :py:func:`b2share.modules.deposit.bulk.create_deposits`.
+    """
+    if not current_user.is_authenticated:
+        abort(401)
+    if request.mimetype not in ['application/x-ndjson',
+                                'application/jsonlines']:
+        abort(415)
+    try:
+        items = load_jsonl(request.get_data(as_text=True).splitlines())
+    except ValueError as e:
+        raise InvalidDepositError(str(e))
+    if len(items) > current_app.config['B2SHARE_DEPOSIT_BULK_MAX_ITEMS']:
+        abort(413)
+    submit = request.args.get('submit', '').lower() in ['1', 'true']
+    results = create_deposits(items, submit=submit)
+    for index, result in enumerate(results):
+        result['index'] = index
+        if 'id' in result:
+            result['links'] = dict(
+                self=url_for('b2share_deposit_rest.b2dep_item',
+                             pid_value=result['id'], _external=True),
+                publication=url_for('b2share_records_rest.b2rec_item',
+                                    pid_value=result['id'], _external=True),
+            )
+    created = sum(1 for result in results if result['status'] == 201)
+    return jsonify({
+        'created': created,
+        'failed': len(results) - created,
+        'results': results,
+    })
+
+
 class DepositResource(RecordResource):
     """Resource for deposit items."""
 
-    def patch(self, *args, **kwargs):
-        """PATCH the deposit."""
-        pid, record = request.view_args['pid_value'].data
-        result = super(DepositResource, self).patch(*args, **kwargs)
-        record = Deposit.get_record(record['_deposit']['id'])
-        self._index_record(record)
-        return result
-
     def put(self, *args, **kwargs):
         """PUT the deposit."""
         abort(405)
-
-    def _index_record(self, record):
-        """Index the published record if the deposit is published."""
-        if g.deposit_action == 'publish':
-            _, published_record = record.fetch_published()
-            RecordIndexer().index(published_record)
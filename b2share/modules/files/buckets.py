@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of EUDAT B2Share.
+# Copyright (C) 2016 CERN.
+#
+# B2Share is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of the
+# License, or (at your option) any later version.
+#
+# B2Share is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with B2Share; if not, write to the Free Software Foundation, Inc.,
+# 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+#
+# In applying this license, CERN does not
+# waive the privileges and immunities granted to it by virtue of its status
+# as an Intergovernmental Organization or submit itself to any jurisdiction.
+
+"""Cache of the records owning file buckets.
+
+File requests and file download events need the record owning a bucket in
+order to check permissions. This record, and the fields needed to check its
+permissions, rarely change. They are thus cached in memory and in the shared
+cache, see :py:mod:`b2share.cache`.
+
+Cached entries are removed when their record is updated or deleted.
+"""
+
+from __future__ import absolute_import
+
+import threading
+import time
+from collections import OrderedDict
+
+from invenio_records.models import RecordMetadata
+from invenio_records_files.models import RecordsBuckets
+
+from b2share.cache import SharedCache
+from b2share.modules.records.utils import is_deposit, is_publication
+from b2share.utils import run_after_commit
+
+
+def _load_bucket_record(bucket_id):
+    """Load the permission related fields of a bucket's record."""
+    model = RecordMetadata.query.join(
+        RecordsBuckets, RecordsBuckets.record_id == RecordMetadata.id
+    ).filter(RecordsBuckets.bucket_id == bucket_id).one_or_none()
+    if model is None or model.json is None:
+        return None
+    record_type = None
+    if is_publication(model):
+        record_type = 'publication'
+    elif is_deposit(model):
+        record_type = 'deposit'
+    return {
+        'record_id': str(model.id),
+        'type': record_type,
+        'community': model.json.get('community'),
+        'open_access': model.json.get('open_access'),
+        'publication_state': model.json.get('publication_state'),
+        'owners': model.json.get('_deposit', {}).get('owners', []),
+    }
+
+
+def bucket_record_permission_data(bucket_record):
+    """Build from a cached entry the record fields used by permissions.
+
+    Returns:
+        dict: the "community", "open_access", "publication_state" and
+            "_deposit.owners" fields of the record.
+    """
+    return {
+        'community': bucket_record['community'],
+        'open_access': bucket_record['open_access'],
+        'publication_state': bucket_record['publication_state'],
+        '_deposit': {'owners': bucket_record['owners']},
+    }
+
+
+class BucketRecordCache(object):
+    """Cache of bucket id => record owning the bucket."""
+
+    def __init__(self, app):
+        """Constructor.
+
+        Args:
+            app: the Flask application.
+        """
+        self.app = app
+        self.shared = SharedCache('buckets')
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, bucket_id):
+        """Retrieve the record owning a bucket.
+
+        Returns:
+            dict: the record's "record_id", "type" ("publication",
+                "deposit" or None), "community", "open_access",
+                "publication_state" and "owners". None if the bucket is not
+                attached to any record.
+        """
+        bucket_id = str(bucket_id)
+        with self._lock:
+            entry = self._memory.get(bucket_id)
+            if entry is not None:
+                if entry[0] > time.time():
+                    self._memory.move_to_end(bucket_id)
+                    return entry[1]
+                del self._memory[bucket_id]
+        bucket_record = self.shared.get(bucket_id)
+        if bucket_record is None:
+            bucket_record = _load_bucket_record(bucket_id)
+            if bucket_record is None:
+                return None
+            self.shared.set(
+                bucket_id, bucket_record,
+                timeout=self.app.config['B2SHARE_FILES_BUCKET_CACHE_TTL'])
+        with self._lock:
+            self._memory[bucket_id] = (
+                time.time() +
+                self.app.config['B2SHARE_FILES_BUCKET_CACHE_MEMORY_TTL'],
+                bucket_record)
+            while len(self._memory) > \
+                    self.app.config['B2SHARE_FILES_BUCKET_CACHE_SIZE']:
+                self._memory.popitem(last=False)
+        return bucket_record
+
+    def invalidate(self, *bucket_ids):
+        """Remove buckets from the cache."""
+        bucket_ids = [str(bucket_id) for bucket_id in bucket_ids]
+        with self._lock:
+            for bucket_id in bucket_ids:
+                self._memory.pop(bucket_id, None)
+        self.shared.delete(*bucket_ids)
+
+
+def invalidate_record_buckets(record_ids):
+    """Remove the buckets of modified records from the cache.
+
+    The buckets are removed again once the transaction is committed so that
+    concurrent requests do not cache the records' previous version again.
+
+    Args:
+        record_ids (list): ids of the modified records.
+    """
+    from .proxies import current_bucket_records
+    record_ids = list(record_ids)
+    if not record_ids:
+        return
+    bucket_ids = [rb.bucket_id for rb in RecordsBuckets.query.filter(
+        RecordsBuckets.record_id.in_(record_ids))]
+    if bucket_ids:
+        cache = current_bucket_records._get_current_object()
+        cache.invalidate(*bucket_ids)
+        run_after_commit(lambda: cache.invalidate(*bucket_ids))
+
+
+def invalidate_record_buckets_trigger(record):
+    """Remove the buckets of a modified record from the cache."""
+    invalidate_record_buckets([record.id])
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of EUDAT B2Share.
+# Copyright (C) 2016 CERN.
+#
+# B2Share is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of the
+# License, or (at your option) any later version.
+#
+# B2Share is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with B2Share; if not, write to the Free Software Foundation, Inc.,
+# 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+#
+# In applying this license, CERN does not
+# waive the privileges and immunities granted to it by virtue of its status
+# as an Intergovernmental Organization or submit itself to any jurisdiction.
+
+"""B2Share Files module configuration."""
+
+from __future__ import absolute_import, print_function
+
+B2SHARE_FILES_BUCKET_CACHE_SIZE = 10000
+"""Maximum number of buckets whose record is kept in memory by each process.
+"""
+
+B2SHARE_FILES_BUCKET_CACHE_MEMORY_TTL = 30
+"""Seconds during which a bucket's record is kept in memory.
+
+Modified records are removed from the shared cache. Other processes might
+still use the previous version from their memory during this time.
+"""
+
+B2SHARE_FILES_BUCKET_CACHE_TTL = 24 * 3600
+"""Seconds during which a bucket's record is kept in the shared cache."""
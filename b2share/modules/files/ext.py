@@ -25,8 +25,28 @@
 
 from __future__ import absolute_import, print_function
 
+from invenio_records.signals import after_record_update, \
+    before_record_delete
+
+from .buckets import BucketRecordCache, invalidate_record_buckets_trigger
 from .cli import files as files_cmd
 from .views import object_view_object_resources
+from . import config
+
+
+class _B2ShareFilesState(object):
+    """B2Share Files extension state."""
+
+    def __init__(self, app):
+        """Constructor.
+
+        Args:
+            app: the Flask application.
+        """
+        self.app = app
+        self.bucket_records = BucketRecordCache(app)
+        """Cache of the records owning file buckets."""
+
 
 class B2ShareFiles(object):
     """B2Share Files extension."""
@@ -41,6 +61,9 @@ class B2ShareFiles(object):
         self.init_config(app)
         app.cli.add_command(files_cmd)
         app.extensions['b2share-files-rest'] = self
+        app.extensions['b2share-files'] = _B2ShareFilesState(app)
+        after_record_update.connect(invalidate_record_buckets_trigger)
+        before_record_delete.connect(invalidate_record_buckets_trigger)
         @app.before_first_request
         def replace_files_rest_object_view():
             app.view_functions['invenio_files_rest.object_api'] = object_view_object_resources
@@ -48,4 +71,6 @@ class B2ShareFiles(object):
 
     def init_config(self, app):
         """Initialize configuration."""
-        pass
+        for k in dir(config):
+            if k.startswith('B2SHARE_FILES_'):
+                app.config.setdefault(k, getattr(config, k))
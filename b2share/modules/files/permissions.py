@@ -29,16 +29,15 @@ from invenio_access.permissions import (
 )
 from invenio_db import db
 from invenio_files_rest.models import Bucket, MultipartObject, ObjectVersion
-from invenio_records.api import Record
 from invenio_records_files.api import FileObject
-from invenio_records_files.models import RecordsBuckets
 from b2share.modules.access.permissions import (
     DenyAllPermission, StrictDynamicPermission, OrPermissions
 )
 from flask_principal import Permission, UserNeed
 from b2share.modules.deposit.api import PublicationStates
 
-from b2share.modules.records.utils import is_publication, is_deposit
+from .buckets import bucket_record_permission_data
+from .proxies import current_bucket_records
 
 
 read_restricted_files = partial(ParameterizedActionNeed,
@@ -82,12 +81,12 @@ def files_permission_factory(obj, action=None):
     # Retrieve record
     if bucket_id is not None:
         # Record or deposit bucket
-        rb = RecordsBuckets.query.filter_by(bucket_id=bucket_id).one_or_none()
-        if rb is not None:
-            record = Record.get_record(rb.record_id)
-            if is_publication(record.model):
+        bucket_record = current_bucket_records.get(bucket_id)
+        if bucket_record is not None:
+            record = bucket_record_permission_data(bucket_record)
+            if bucket_record['type'] == 'publication':
                 return PublicationFilesPermission(record, action)
-            elif is_deposit(record.model):
+            elif bucket_record['type'] == 'deposit':
                 return DepositFilesPermission(record, action)
 
     return DynamicPermission(superuser_access)
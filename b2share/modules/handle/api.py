@@ -23,7 +23,12 @@
 
 """B2SHARE Handle API."""
 
-import httplib2
+import threading
+import time
+from collections import Counter
+
+import requests
+from requests.adapters import HTTPAdapter
 from simplejson import dumps as jsondumps
 from werkzeug.exceptions import abort
 from flask import current_app
@@ -113,7 +118,8 @@ def check_eudat_entries_in_handle_pid(handle_client, handle_prefix, handle,
     if not old_values.get('EUDAT/CHECKSUM_TIMESTAMP') and checksum_timestamp_iso:
         new_values['EUDAT/CHECKSUM_TIMESTAMP'] = checksum_timestamp_iso
 
-    if update:
+    # all the missing entries are added with a single request
+    if update and new_values:
         try:
             handle_client.modify_handle_value(handle=handle, **new_values)
         except Exception as e:
@@ -125,90 +131,137 @@ def check_eudat_entries_in_handle_pid(handle_client, handle_prefix, handle,
     return new_values
 
 
-def create_epic_handle(location, checksum=None):
-    """Create a new handle for a file.
+class EpicClient(object):
+    """Client of the ePIC handle API.
 
-    Parameters:
-        location: The location (URL) of the file.
-        checksum: Optional parameter, store the checksum of the file as well.
-    Returns:
-        the URI of the new handle, raises a 503 exception if an error occurred.
+    The client is thread-safe and reuses its HTTP connections, thus it
+    should be created once and shared. At most ``max_connections`` requests
+    are sent at the same time, other requests wait for a free connection.
     """
 
-    # httplib2.debuglevel = 4
-
-    # Ensure all these are strings
-    username = str(current_app.config.get('CFG_EPIC_USERNAME'))
-    password = str(current_app.config.get('CFG_EPIC_PASSWORD'))
-    baseurl = str(current_app.config.get('CFG_EPIC_BASEURL'))
-    prefix = str(current_app.config.get('CFG_EPIC_PREFIX'))
-
-    # If the proxy and proxy ports are set in the invenio-local.conf file
-    # read them and set the proxy. If not, do nothing.
-    try:
-        proxy = current_app.config.get('CFG_SITE_PROXY')
-        proxy_port = current_app.config.get('CFG_SITE_PROXYPORT')
-    except:
-        proxy = None
-        proxy_port = 80
+    def __init__(self, baseurl, prefix, username, password, timeout=10,
+                 max_connections=10, proxy=None):
+        """Constructor.
+
+        :param baseurl: URL of the ePIC API handles endpoint.
+        :param prefix: handle prefix.
+        :param username: ePIC API user name.
+        :param password: ePIC API password.
+        :param timeout: timeout of each request in seconds.
+        :param max_connections: maximum number of parallel connections.
+        :param proxy: URL of the HTTP proxy, if any.
+        """
+        if not prefix.endswith('/'):
+            prefix += '/'
+        if not baseurl.endswith('/'):
+            baseurl += '/'
+        self.uri = baseurl + prefix
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.auth = (username, password)
+        adapter = HTTPAdapter(pool_connections=1,
+                              pool_maxsize=max_connections,
+                              pool_block=True)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        if proxy:
+            self.session.proxies = {'http': proxy, 'https': proxy}
+        self.metrics = Counter()
+        """Number of "requests" and "errors" and total "latency" in seconds.
+        """
+        self._metrics_lock = threading.Lock()
+
+    @property
+    def mean_latency(self):
+        """Mean duration of the requests in seconds."""
+        with self._metrics_lock:
+            if not self.metrics['requests']:
+                return 0.0
+            return self.metrics['latency'] / self.metrics['requests']
+
+    def _record(self, started, error=False):
+        with self._metrics_lock:
+            self.metrics['requests'] += 1
+            self.metrics['latency'] += time.time() - started
+            if error:
+                self.metrics['errors'] += 1
+
+    def create_handle(self, location, checksum=None):
+        """Create a new handle.
+
+        :param location: The location (URL) of the handle.
+        :param checksum: Optional parameter, checksum stored in the handle.
+        :returns: the handle, i.e. "<prefix>/<suffix>".
+        """
+        values = [{'type': 'URL', 'parsed_data': location}]
+        if checksum:
+            values.append({'type': 'CHECKSUM', 'parsed_data': checksum})
+        body = jsondumps(values)
+        current_app.logger.debug("EPIC PID json: " + body)
 
-    if proxy is not None:
-        import socks
-        http = httplib2.Http(
-            proxy_info=httplib2.ProxyInfo(socks.PROXY_TYPE_HTTP,
-                                          proxy, proxy_port))
-    else:
-        http = httplib2.Http()
+        started = time.time()
+        try:
+            response = self.session.post(
+                self.uri, data=body, timeout=self.timeout,
+                headers={'Content-Type': 'application/json',
+                         'Accept': 'application/json'})
+        except requests.RequestException as e:
+            self._record(started, error=True)
+            raise EpicPIDError("EPIC PID Exception") from e
+        self._record(started, error=response.status_code != 201)
+        current_app.logger.debug("EPIC PID Request completed")
 
-    http.add_credentials(username, password)
+        if response.status_code != 201:
+            msg = "EPIC PID Not Created: Response status: {}".format(
+                response.status_code)
+            current_app.logger.debug(msg)
+            raise EpicPIDError(msg)
 
-    if not (prefix.endswith('/')):
-        prefix += '/'
-    if baseurl.endswith('/'):
-        uri = baseurl + prefix
-    else:
-        uri = baseurl + '/' + prefix
+        # get the handle as returned by EPIC
+        return '/'.join(
+            urlparse(response.headers['location']).path.split('/')[-2:])
 
-    # for a PUT, add 'If-None-Match': '*' to the header
-    hdrs = {'Content-Type': 'application/json', 'Accept': 'application/json'}
 
-    if checksum:
-        new_handle_json = jsondumps([{'type': 'URL',
-                                      'parsed_data': location},
-                                     {'type': 'CHECKSUM',
-                                      'parsed_data': checksum}])
-    else:
-        new_handle_json = jsondumps([{'type': 'URL',
-                                      'parsed_data': location}])
-
-    current_app.logger.debug("EPIC PID json: " + new_handle_json)
+def epic_client_from_config(config):
+    """Create an :class:`EpicClient` from the application configuration."""
+    # If the proxy and proxy ports are set in the configuration use them.
+    proxy = config.get('CFG_SITE_PROXY')
+    if proxy is not None:
+        proxy = 'http://{}:{}'.format(proxy,
+                                      config.get('CFG_SITE_PROXYPORT') or 80)
+    # Ensure all these are strings
+    return EpicClient(
+        baseurl=str(config.get('CFG_EPIC_BASEURL')),
+        prefix=str(config.get('CFG_EPIC_PREFIX')),
+        username=str(config.get('CFG_EPIC_USERNAME')),
+        password=str(config.get('CFG_EPIC_PASSWORD')),
+        timeout=config['B2SHARE_HANDLE_EPIC_TIMEOUT'],
+        max_connections=config['B2SHARE_HANDLE_EPIC_MAX_CONNECTIONS'],
+        proxy=proxy,
+    )
+
+
+def create_epic_handle(location, checksum=None, epic_client=None):
+    """Create a new handle for a file.
 
+    Parameters:
+        location: The location (URL) of the file.
+        checksum: Optional parameter, store the checksum of the file as well.
+        epic_client: the :class:`EpicClient` sending the request. Defaults
+            to the client of the current application.
+    Returns:
+        the URI of the new handle, raises a 503 exception if an error occurred.
+    """
     if current_app.config.get('TESTING', False) or current_app.config.get('FAKE_EPIC_PID', False):
         # special case for unit/functional testing: it's useful to get a PID,
         # which otherwise will not get allocated due to missing credentials;
         # this also speeds up testing just a bit, by avoiding HTTP requests
         uuid = location.split('/')[-1] # record id
-        fake_pid_url = 'http://example.com/epic/handle/0000/{}'.format(uuid)
-        class FakeResponse(dict):
-            status=201
-        response = FakeResponse(location=fake_pid_url)
+        pid = '0000/{}'.format(uuid)
     else:
-        try:
-            response, content = http.request(
-                uri, method='POST', headers=hdrs, body=new_handle_json)
-        except Exception as e:
-            raise EpicPIDError("EPIC PID Exception") from e
-
-    current_app.logger.debug("EPIC PID Request completed")
-
-    if response.status != 201:
-        msg = "EPIC PID Not Created: Response status: {}".format(response.status)
-        current_app.logger.debug(msg)
-        raise EpicPIDError(msg)
-
-    # get the handle as returned by EPIC
-    hdl = response['location']
-    pid = '/'.join(urlparse(hdl).path.split('/')[-2:])
+        if epic_client is None:
+            epic_client = current_app.extensions['b2share-handle'].epic_client
+        pid = epic_client.create_handle(location, checksum)
 
     CFG_HANDLE_SYSTEM_BASEURL = current_app.config.get(
         'CFG_HANDLE_SYSTEM_BASEURL')
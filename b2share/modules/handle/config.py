@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of EUDAT B2Share.
+# Copyright (C) 2016 CERN.
+#
+# B2Share is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of the
+# License, or (at your option) any later version.
+#
+# B2Share is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with B2Share; if not, write to the Free Software Foundation, Inc.,
+# 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+#
+# In applying this license, CERN does not
+# waive the privileges and immunities granted to it by virtue of its status
+# as an Intergovernmental Organization or submit itself to any jurisdiction.
+
+"""B2Share Handle module configuration."""
+
+from __future__ import absolute_import, print_function
+
+B2SHARE_HANDLE_MAX_WORKERS = 8
+"""Maximum number of Handle PIDs created in parallel by one process."""
+
+B2SHARE_HANDLE_RETRIES = 3
+"""Number of retries of a failed Handle PID creation."""
+
+B2SHARE_HANDLE_RETRY_BACKOFF = 1
+"""Seconds before the first retry of a failed Handle PID creation. The delay
+doubles after each retry."""
+
+B2SHARE_HANDLE_EPIC_TIMEOUT = 10
+"""Timeout in seconds of the ePIC API requests."""
+
+B2SHARE_HANDLE_EPIC_MAX_CONNECTIONS = 10
+"""Maximum number of parallel connections to the ePIC API per process."""
+
+B2SHARE_HANDLE_DEFERRED_FILE_PIDS = False
+"""Create the file PIDs of a published record in a Celery task instead of
+during the publication request.
+
+The record is published without its file PIDs and its
+``_deposit.file_pids_status`` is set to ``'pending'`` until the task
+completes.
+"""
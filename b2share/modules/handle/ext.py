@@ -21,11 +21,17 @@
 
 from __future__ import absolute_import, print_function
 
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 from pyhandle.client.resthandleclient import RESTHandleClient
 from flask import current_app
 
 from .api import (create_handle, create_fake_handle, create_epic_handle,
-    check_eudat_entries_in_handle_pid)
+    check_eudat_entries_in_handle_pid, epic_client_from_config)
+from .errors import EpicPIDError
+from . import config
 
 
 class _B2ShareHandleState(object):
@@ -48,6 +54,19 @@ class _B2ShareHandleState(object):
             self.handle_prefix = credentials.get('prefix')
             assert self.handle_prefix
             self.handle_client = RESTHandleClient(**credentials)
+        self._epic_client = None
+        self._lock = threading.Lock()
+
+    @property
+    def epic_client(self):
+        """ePIC API client shared by all the requests, created on first use.
+        """
+        if self._epic_client is None:
+            with self._lock:
+                if self._epic_client is None:
+                    self._epic_client = epic_client_from_config(
+                        current_app.config)
+        return self._epic_client
 
 
     def create_handle(self, location, checksum=None, fixed=False,
@@ -65,8 +84,67 @@ class _B2ShareHandleState(object):
                           location, checksum, fixed)
         else:
             # assume EPIC API
-            return create_epic_handle(location, checksum)
+            return create_epic_handle(location, checksum,
+                                      epic_client=self.epic_client)
+
 
+    def create_handle_with_retry(self, location, checksum=None, fixed=False):
+        """Create a new handle, retrying with an exponential backoff.
+
+        Raises:
+            :class:`b2share.modules.handle.errors.EpicPIDError`: the handle
+                could not be created after ``B2SHARE_HANDLE_RETRIES``
+                retries.
+        """
+        retries = current_app.config['B2SHARE_HANDLE_RETRIES']
+        delay = current_app.config['B2SHARE_HANDLE_RETRY_BACKOFF']
+        for retry in range(retries + 1):
+            try:
+                handle = self.create_handle(location, checksum=checksum,
+                                            fixed=fixed)
+                if handle is None:
+                    raise EpicPIDError("EPIC PID allocation failed")
+                return handle
+            except EpicPIDError:
+                if retry == retries:
+                    raise
+                current_app.logger.warning(
+                    'Handle creation for {} failed, retrying in {}s.'.format(
+                        location, delay))
+                time.sleep(delay)
+                delay *= 2
+
+    def create_handles(self, handles):
+        """Create multiple handles in parallel.
+
+        At most ``B2SHARE_HANDLE_MAX_WORKERS`` handles are created at the
+        same time. Each creation is retried as in
+        :py:meth:`create_handle_with_retry`.
+
+        Args:
+            handles (list): dicts with the "location" and optional "checksum"
+                and "fixed" arguments of :py:meth:`create_handle`.
+
+        Returns:
+            list: for each requested handle, in the same order, the created
+                handle or the :class:`EpicPIDError` which prevented its
+                creation.
+        """
+        app = current_app._get_current_object()
+
+        def create(kwargs):
+            with app.app_context():
+                try:
+                    return self.create_handle_with_retry(**kwargs)
+                except EpicPIDError as e:
+                    return e
+
+        if len(handles) <= 1:
+            return [create(kwargs) for kwargs in handles]
+        max_workers = min(len(handles),
+                          app.config['B2SHARE_HANDLE_MAX_WORKERS'])
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(create, handles))
 
     def check_eudat_entries_in_handle_pid(self, **kwargs):
         """Checks and update the mandatory EUDAT entries in a Handle PID."""
@@ -91,4 +169,6 @@ class B2ShareHandle(object):
 
     def init_config(self, app):
         """Initialize configuration."""
-        pass
+        for k in dir(config):
+            if k.startswith('B2SHARE_HANDLE_'):
+                app.config.setdefault(k, getattr(config, k))
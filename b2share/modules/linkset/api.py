@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of EUDAT B2Share.
+# Copyright (C) 2016 CERN.
+#
+# B2Share is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of the
+# License, or (at your option) any later version.
+#
+# B2Share is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with B2Share; if not, write to the Free Software Foundation, Inc.,
+# 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+#
+# In applying this license, CERN does not
+# waive the privileges and immunities granted to it by virtue of its status
+# as an Intergovernmental Organization or submit itself to any jurisdiction.
+
+"""Generation and caching of record linksets.
+
+A record's linkset only depends on the record's revision and on whether the
+files are visible to the requesting user. Linksets are thus cached in the
+shared cache with these two values as key.
+"""
+
+from __future__ import absolute_import, print_function
+
+from flask import current_app
+from invenio_db import db
+from invenio_files_rest.models import ObjectVersion
+from invenio_records.api import Record
+from invenio_records.models import RecordMetadata
+from invenio_records_files.models import RecordsBuckets
+
+from b2share.cache import SharedCache
+from b2share.modules.files.permissions import files_permission_factory
+
+linkset_cache = SharedCache('linksets')
+
+
+def linkset_cache_key(record_id, revision_id, with_files):
+    """Build the cache key of a linkset."""
+    return '{}:{}:{}'.format(record_id, revision_id, int(bool(with_files)))
+
+
+def linkset_etag(revision_id, with_files):
+    """Build the ETag of a linkset."""
+    return '{}-{}'.format(revision_id, int(bool(with_files)))
+
+
+def linkset_files_visible(bucket_id):
+    """Check if the linkset lists the files of the given bucket.
+
+    Args:
+        bucket_id (str): id of the record's bucket.
+    """
+    if bucket_id is None:
+        return False
+    return files_permission_factory(bucket_id, 'bucket-read').can()
+
+
+def get_record_linkset_state(record_id):
+    """Read what a record's linkset depends on without loading the record.
+
+    Returns:
+        tuple: (revision_id, bucket_id) or None if the record is deleted.
+            bucket_id is None if the record has no bucket.
+    """
+    row = db.session.query(
+        RecordMetadata.version_id, RecordsBuckets.bucket_id
+    ).outerjoin(
+        RecordsBuckets, RecordsBuckets.record_id == RecordMetadata.id
+    ).filter(
+        RecordMetadata.id == record_id,
+        RecordMetadata.json.isnot(None),
+    ).first()
+    if row is None:
+        return None
+    # same as invenio_records.api.RecordBase.revision_id
+    return row.version_id - 1, (str(row.bucket_id)
+                                if row.bucket_id is not None else None)
+
+
+def get_files_mimetypes(records):
+    """Retrieve the mimetype of the files of many records with one query.
+
+    Args:
+        records: records whose "_files" mimetypes are retrieved.
+
+    Returns:
+        dict: file version id => mimetype.
+    """
+    version_ids = {file['version_id'] for record in records
+                   for file in record.get('_files', [])
+                   if file.get('version_id')}
+    if not version_ids:
+        return {}
+    return {
+        str(obj.version_id): obj.mimetype
+        for obj in ObjectVersion.query.filter(
+            ObjectVersion.version_id.in_(version_ids))
+    }
+
+
+def build_linkset(pid_value, record, with_files, mimetypes):
+    """Build the linkset of a record.
+
+    Args:
+        pid_value (str): the record's PID.
+        record (dict): the record metadata.
+        with_files (bool): True if the files are listed.
+        mimetypes (dict): mimetype of the record's files, see
+            :py:func:`get_files_mimetypes`.
+
+    Returns:
+        dict: the linkset.
+    """
+    base_url = '{}://{}'.format(
+        current_app.config.get('PREFERRED_URL_SCHEME', ''),
+        current_app.config.get('JSONSCHEMAS_HOST', ''))
+    landingpage = '{}/records/{}'.format(base_url, pid_value)
+
+    citations = []
+    doi_identifier = None
+    for pid in record.get('_pid'):
+        if pid.get('type') == 'DOI':
+            doi_identifier = pid.get('value')
+            citations.append({'href': 'https://doi.org/' + doi_identifier})
+
+    if doi_identifier is None and \
+            record.get('alternate_identifiers') is not None:
+        for ai in record.get('alternate_identifiers'):
+            if ai.get('alternate_identifier_type') == 'DOI':
+                doi_identifier = ai.get('alternate_identifier')
+                citations.append(
+                    {'href': 'https://doi.org/' + doi_identifier})
+    if doi_identifier is None:
+        # Identifier is required
+        current_app.logger.error(
+            'No alternate_identifiers for record {}'.format(pid_value))
+
+    rec_license = record.get('license')
+    license = {}
+    if rec_license is not None:
+        license = {'href': rec_license.get('license_uri')}
+    # Todo: According to Signposting spec: License cardinality is 1. What we
+    # will do for the following case?
+    # https://b2share.eudat.eu/api/oai2d?verb=ListRecords&metadataPrefix=oai_dc
+    # <dc:rights>info:eu-repo/semantics/openAccess</dc:rights>
+    # <dc:rights>GNU General Public License 3 (GPL-3.0)</dc:rights>
+
+    describedbys = []
+    if doi_identifier is not None:
+        describedbys.append({
+            'href': 'https://citation.crosscite.org/format?style=bibtex&doi=' +
+            doi_identifier,
+            'type': 'application/x-bibtex',
+        })
+
+    items = []
+    anchors = []
+    if with_files:
+        for file in record.get('_files', []):
+            file_location = '{}/api/files/{}/{}'.format(
+                base_url, file.get('bucket'), file.get('key'))
+            items.append({'href': file_location,
+                          'type': mimetypes.get(file.get('version_id'))})
+            anchors.append({
+                'anchor': file_location,
+                'collection': [{'href': landingpage, 'type': 'text/html'}],
+            })
+
+    element = {
+        'anchor': landingpage,
+        'type': [{'href': 'https://schema.org/AboutPage'}],
+        'cite-as': citations,
+        'item': items,
+        'describedby': describedbys,
+        'license': license,
+    }
+    return {'linkset': [element] + anchors}
+
+
+def get_linkset(pid_value, record_id, revision_id, with_files, record=None):
+    """Retrieve the linkset of a record revision, building it if needed.
+
+    Args:
+        pid_value (str): the record's PID.
+        record_id: the record's id.
+        revision_id (int): the current revision of the record.
+        with_files (bool): True if the files are listed.
+        record (dict): the record metadata. It is loaded only if needed
+            when None.
+
+    Returns:
+        dict: the linkset.
+    """
+    key = linkset_cache_key(record_id, revision_id, with_files)
+    linkset = linkset_cache.get(key)
+    if linkset is None:
+        if record is None:
+            record = Record.get_record(record_id)
+        linkset = build_linkset(
+            pid_value, record, with_files,
+            get_files_mimetypes([record]) if with_files else {})
+        linkset_cache.set(
+            key, linkset,
+            timeout=current_app.config['B2SHARE_LINKSET_CACHE_TTL'])
+    return linkset
+
+
+def warm_linksets(records):
+    """Build and cache the linksets of many records for the current user.
+
+    The buckets and the mimetypes of all the given records' files are
+    retrieved with one query each.
+
+    Args:
+        records: list of records.
+
+    Returns:
+        int: the number of cached linksets.
+    """
+    records = list(records)
+    if not records:
+        return 0
+    # the files are visible as in the linkset view, from the records' buckets
+    bucket_ids = dict(db.session.query(
+        RecordsBuckets.record_id, RecordsBuckets.bucket_id
+    ).filter(RecordsBuckets.record_id.in_([record.id for record in records])))
+    visible = {}
+    for record in records:
+        bucket_id = bucket_ids.get(record.id)
+        visible[record.id] = linkset_files_visible(
+            str(bucket_id) if bucket_id is not None else None)
+    mimetypes = get_files_mimetypes(
+        record for record in records if visible[record.id])
+    timeout = current_app.config['B2SHARE_LINKSET_CACHE_TTL']
+    for record in records:
+        pid_value = next(pid['value'] for pid in record['_pid']
+                         if pid['type'] == 'b2rec')
+        linkset_cache.set(
+            linkset_cache_key(record.id, record.revision_id,
+                              visible[record.id]),
+            build_linkset(pid_value, record, visible[record.id], mimetypes),
+            timeout=timeout)
+    return len(records)
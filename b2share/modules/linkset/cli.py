@@ -21,6 +21,7 @@
 
 
 from __future__ import absolute_import, print_function
+from itertools import islice
 from urllib.parse import urlunsplit
 import click
 
@@ -28,7 +29,9 @@ from flask.cli import with_appcontext
 from flask import current_app, url_for
 
 from b2share.modules.records.api import B2ShareRecord
-from b2share.modules.records.utils import list_db_published_records
+from b2share.modules.records.utils import iter_published_records
+
+from .api import warm_linksets
 
 def get_base_url():
     return urlunsplit((
@@ -73,13 +76,19 @@ def linkset():
 @with_appcontext
 @click.argument('record-pid', required=False, type=str)
 @click.option('--all','-a', required=False, is_flag=True, default=False)
-def check(record_pid=None,all=False):
+@click.option('--warm', '-w', is_flag=True, default=False,
+              help='Build and cache the linksets in bulk before checking '
+              'them.')
+@click.option('--chunk-size', default=500, show_default=True,
+              help='Number of records whose linksets are built together.')
+def check(record_pid=None,all=False, warm=False, chunk_size=500):
     """ Check if the Linkset is created and a json file is returned.
 
     :params record-pid: record id
     """
     if all:
-        records_list=list_db_published_records()
+        records_list=iter_published_records(
+            fields=None if warm else ['_pid'], chunk_size=chunk_size)
     else:
         if record_pid is None:
            raise click.ClickException(
@@ -88,7 +97,17 @@ def check(record_pid=None,all=False):
             records_list=[B2ShareRecord.get_record(record_pid)]
 
     with current_app.test_request_context('/', base_url=get_base_url()+current_app.config.get('APPLICATION_ROOT')):
-        linksets_list = generate_multiple_linksets(records_list)
+        if warm:
+            linksets_list = []
+            records_list = iter(records_list)
+            while True:
+                chunk = list(islice(records_list, chunk_size))
+                if not chunk:
+                    break
+                warm_linksets(chunk)
+                linksets_list.extend(generate_multiple_linksets(chunk))
+        else:
+            linksets_list = generate_multiple_linksets(records_list)
     
     with current_app.test_client() as client:
         check_linkset(client,linksets_list)
@@ -24,6 +24,7 @@ from __future__ import absolute_import, print_function
 from .views import blueprint
 
 from .cli import linkset as linkset_cmd
+from . import config
 
 class B2ShareLinkset(object):
     """B2Share Api Archive extension."""
@@ -42,4 +43,6 @@ class B2ShareLinkset(object):
 
     def init_config(self, app):
         """Initialize configuration."""
-        pass
+        for k in dir(config):
+            if k.startswith('B2SHARE_LINKSET_'):
+                app.config.setdefault(k, getattr(config, k))
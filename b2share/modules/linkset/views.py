@@ -19,12 +19,10 @@
 #
 from b2share.modules.records.providers import RecordUUIDProvider
 from flask import Blueprint, abort, current_app, jsonify, request
-from invenio_files_rest import models as fm
-from invenio_records.api import Record
 from invenio_rest import ContentNegotiatedMethodView
 
-from b2share.modules.files.permissions import files_permission_factory
-from b2share.modules.access.policies import allow_public_file_metadata
+from .api import get_linkset, get_record_linkset_state, linkset_etag, \
+    linkset_files_visible
 
 
 blueprint = Blueprint('b2share_linkset', __name__, url_prefix='/linkset/<path:record_id>/json')
@@ -47,96 +45,36 @@ class ApiLinkset(ContentNegotiatedMethodView):
             **kwargs)
     
     def get(self, **kwargs):
+        """Get the linkset of a record.
 
-        # TODO; code needs to be refactored. 
-        # example : hdl_identifer not used anywhere
-        # original code from https://github.com/EUDAT-B2SHARE/b2share/pull/1813
-
+        The linkset is cached per record revision, see
+        :py:mod:`b2share.modules.linkset.api`.
+        """
         input_record = request.view_args['record_id']
         if input_record is None:
             return abort(400)
-        
-        
-        linkset = []
+
         try:
             rec_pid = RecordUUIDProvider.get(input_record).pid
-            record = Record.get_record(rec_pid.object_uuid)
         except:
             return abort(404, "Record not found!")
+        state = get_record_linkset_state(rec_pid.object_uuid)
+        if state is None:
+            return abort(404, "Record not found!")
+        revision_id, bucket_id = state
+        with_files = linkset_files_visible(bucket_id)
+        etag = linkset_etag(revision_id, with_files)
+        self.check_etag(etag)
         try:
-            landingpage = current_app.config.get(
-                'PREFERRED_URL_SCHEME',
-                '') + '://' + current_app.config.get(
-                'JSONSCHEMAS_HOST', '') + '/records/' + input_record
-
-            citations = []
-            doi_identifier = None
-            for p in record.get('_pid'):
-                if p.get('type') == 'DOI':
-                    doi_identifier = p.get('value')
-                    cite = {'href' : 'https://doi.org/' + doi_identifier}
-                    citations.append(cite)
-
-            if doi_identifier is None and record.get('alternate_identifiers') is not None:
-                for ai in record.get('alternate_identifiers'):
-                    if ai.get('alternate_identifier_type') == 'DOI':
-                        doi_identifier = ai.get('alternate_identifier')
-                        cite = {'href' : 'https://doi.org/' + doi_identifier}
-                        citations.append(cite)
-            hdl_identifer = None
-            if doi_identifier is None:
-                #Identifier is required
-                current_app.logger.error('No alternate_identifiers for record {record_id}'.format(record_id=rec_pid.object_uuid))
-
-            rec_license = record.get('license')
-            license = {}
-            if rec_license is not None:
-                license = { 'href': rec_license.get('license_uri')}
-            #Todo: According to Signposting spec: License cardinality is 1. What we will do for the following case?
-            # https://b2share.eudat.eu/api/oai2d?verb=ListRecords&metadataPrefix=oai_dc
-            # <dc:rights>info:eu-repo/semantics/openAccess</dc:rights>
-            # <dc:rights>GNU General Public License 3 (GPL-3.0)</dc:rights>
-
-            describedbys = []
-            if doi_identifier is not None:
-                describedby = {'href':'https://citation.crosscite.org/format?style=bibtex&doi=' + doi_identifier,
-                                'type':'application/x-bibtex'}
-                describedbys.append(describedby)
-            items = []
-            fs = []
-            bucket = None
-            if len(record.get('_files', [])) > 0:
-                # if record contains files, check for user's permissions to access those files
-                bucket = record.get('_files')[0].get("bucket")
-                user_has_permission = \
-                    allow_public_file_metadata(record) if bucket \
-                    is None else files_permission_factory(
-                        bucket, 'bucket-read').can()
-                if user_has_permission:
-                    for file in record.get('_files', []):
-                        fmimetype = fm.ObjectVersion.get(
-                            file.get('bucket'), file.get('key'),
-                            file.get('version_id')).mimetype
-                        file_location = current_app.config.get(
-                            'PREFERRED_URL_SCHEME',
-                            '') + '://' + current_app.config.get(
-                            'JSONSCHEMAS_HOST', '') + '/api/files/' + file.get(
-                            'bucket') + '/' + file.get('key')
-                        file.update({'file-location': file_location})
-                        item_file = {'href': file_location, 'type':fmimetype}
-                        items.append(item_file)
-                        item_anchor = {'anchor':file_location, 'collection':[{'href':landingpage, 'type':'text/html'}]}
-                        fs.append(item_anchor)
-
-            types = []
-            type_about_page = {'href':'https://schema.org/AboutPage'}
-            types.append(type_about_page)
-            element = {'anchor': landingpage, 'type':types, 'cite-as': citations, 'item':items, 'describedby':describedbys, 'license':license}
-            linkset.append(element)
-            for a in fs:
-                linkset.append(a)
-            return {'linkset': linkset}
+            linkset = get_linkset(input_record, rec_pid.object_uuid,
+                                  revision_id, with_files)
         except:
+            current_app.logger.exception(
+                'Failed to build the linkset of record {}'.format(
+                    input_record))
             return abort(404)
+        response = self.make_response(linkset)
+        response.set_etag(etag)
+        return response
 
 blueprint.add_url_rule('', view_func=ApiLinkset.as_view('linkset'))
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of EUDAT B2Share.
+# Copyright (C) 2016 CERN.
+#
+# B2Share is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of the
+# License, or (at your option) any later version.
+#
+# B2Share is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with B2Share; if not, write to the Free Software Foundation, Inc.,
+# 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+#
+# In applying this license, CERN does not
+# waive the privileges and immunities granted to it by virtue of its status
+# as an Intergovernmental Organization or submit itself to any jurisdiction.
+
+"""Bulk transfer of the ownership of records and deposits.
+
+Both published records and deposits store their owners in
+``_deposit.owners``. The objects owned by a user are found with one database
+query using the JSONB containment operator, modified in one transaction and
+indexed with one bulk request once the transaction is committed, see
+:py:mod:`b2share.modules.records.outbox`.
+"""
+
+from __future__ import absolute_import, print_function
+
+from invenio_db import db
+from invenio_records.models import RecordMetadata
+from sqlalchemy import type_coerce
+from sqlalchemy.dialects.postgresql import JSONB
+
+from b2share.modules.files.buckets import invalidate_record_buckets
+from b2share.modules.records.outbox import queue_record_index
+from b2share.modules.records.utils import _json_path
+
+
+def find_owned_objects(user_id, type=None):
+    """Find the records and deposits owned by a user.
+
+    Args:
+        user_id (int): id of the owner.
+        type (str): "record", "deposit" or None for both.
+
+    Returns:
+        list: the :class:`invenio_records.models.RecordMetadata` of the owned
+            objects.
+    """
+    json_column = type_coerce(RecordMetadata.json, JSONB)
+    query = RecordMetadata.query.filter(
+        RecordMetadata.json.isnot(None),
+        json_column.contains({'_deposit': {'owners': [user_id]}}),
+    )
+    if type == 'record':
+        query = query.filter(
+            _json_path('$schema').astext.like('%#/json_schema'))
+    elif type == 'deposit':
+        query = query.filter(
+            _json_path('$schema').astext.like('%#/draft_json_schema'))
+    return query.order_by(RecordMetadata.id).all()
+
+
+def transfer_ownership(user_id, add_user_id=None, remove=False, type=None):
+    """Change the owners of every record and deposit owned by a user.
+
+    The objects are modified without validating them again as only their
+    owners change, and their file buckets are removed from the cache of
+    :py:mod:`b2share.modules.files.buckets`. The caller has to commit the
+    transaction.
+
+    Args:
+        user_id (int): the objects owned by this user are modified.
+        add_user_id (int): id of a user added to the owners.
+        remove (bool): if True the user is removed from the owners. Objects
+            for which the user would be the only owner are skipped.
+        type (str): "record", "deposit" or None for both.
+
+    Returns:
+        tuple: (updated, skipped) lists of object ids.
+    """
+    updated, skipped = [], []
+    for model in find_owned_objects(user_id, type=type):
+        owners = list(model.json['_deposit']['owners'])
+        if add_user_id is not None and add_user_id not in owners:
+            owners.append(add_user_id)
+        if remove:
+            owners.remove(user_id)
+        if not owners or owners == model.json['_deposit']['owners']:
+            skipped.append(model.id)
+            continue
+        json = dict(model.json)
+        json['_deposit'] = dict(json['_deposit'], owners=owners)
+        model.json = json
+        queue_record_index(model.id)
+        updated.append(model.id)
+    db.session.flush()
+    # the owners are cached with the records' file buckets
+    invalidate_record_buckets(updated)
+    return updated, skipped
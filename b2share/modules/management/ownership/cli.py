@@ -39,8 +39,8 @@ from invenio_accounts.models import User
 from invenio_pidrelations.contrib.versioning import PIDVersioning
 from invenio_pidstore.errors import PIDDoesNotExistError
 
-from b2share.modules.deposit.api import Deposit
-from b2share.utils import ESSearch, to_tabulate
+from b2share.modules.management.ownership.api import transfer_ownership
+from b2share.utils import ESSearch, get_user_emails, to_tabulate
 from b2share.modules.users.cli import get_user
 
 
@@ -49,6 +49,12 @@ def render_error(error, type, pid, action):
                                click.style(pid, fg="blue") + "\t\tAction: {}".format(action))
 
 
+def render_warning(error, obj_id, action):
+    click.echo(click.style(error, fg="red") + "\t\tobject id: " +
+               click.style(str(obj_id), fg="blue") +
+               "\t\tAction: {}".format(action))
+
+
 def pid2record(pid):
     pid = PersistentIdentifier.get('b2rec', pid)
     return B2ShareRecord.get_record(pid.object_uuid)
@@ -93,8 +99,8 @@ def remove_ownership(obj, user_id: int, obj_type='record'):
                 db.session.commit()
             except ValueError as e:
                 db.session.rollback()
-                click.secho("%s\t%s" % (obj['_deposit']['id'], str(User.query.filter(
-                    User.id.in_([user_id])).all()[0].email)))
+                click.secho("%s\t%s" % (obj['_deposit']['id'],
+                                         get_user_emails([user_id])[user_id]))
                 raise ValueError() from e
         else:
             render_error("Record has to have at least one user", 'object id',
@@ -107,14 +113,14 @@ def remove_ownership(obj, user_id: int, obj_type='record'):
 def list_ownership(record_pid):
     version_master = find_version_master(record_pid)
     all_pids = [v.pid_value for v in version_master.children.all()]
+    all_owners = [(single_pid, pid2record(single_pid)['_deposit']['owners'])
+                  for single_pid in all_pids]
+    # resolve the emails of every owner at once
+    emails = get_user_emails({w for _, owners in all_owners for w in owners})
     click.secho("PID\t\t\t\t\tOwners", fg='green')
-    for single_pid in all_pids:
-        record = pid2record(single_pid)
-        owners = record['_deposit']['owners']
+    for single_pid, owners in all_owners:
         click.secho("%s\t%s" % (
-            single_pid,
-            " ".join([str(User.query.filter(
-                User.id.in_([w])).all()[0].email) for w in owners])))
+            single_pid, " ".join([str(emails[w]) for w in owners])))
 
 
 def check_user(user_email):
@@ -308,17 +314,8 @@ def transfer_add(user_email, new_user_email, type=None):
             click.secho(click.style("Initial state:", fg="blue"))
             print(to_tabulate(search))
 
-            #update values for each record/deposit
-            for id in search.keys():
-                obj = Deposit.get_record(id)
-                # try to update
-                try:
-                    with current_app.test_request_context():
-                        add_ownership(obj=obj, user_id=new_user.id,
-                                      obj_type=search[id]['type'])
-                        changed = True
-                except click.ClickException as e:
-                    click.echo(e)
+            # update every record/deposit in one transaction
+            changed = _transfer(user, add_user=new_user, type=type)
     if changed:
         final_search = search_es(user, type=type)
         if final_search is not None:
@@ -356,17 +353,8 @@ def transfer_remove(user_email, type=None):
             click.secho(click.style("Initial state:", fg="blue"))
             print(to_tabulate(search))
 
-            #update values for each record/deposit
-            for id in search.keys():
-                obj = Deposit.get_record(id)
-                # try to delete user
-                try:
-                    with current_app.test_request_context():
-                        remove_ownership(obj=obj, user_id=user.id,
-                                         obj_type=search[id]['type'])
-                        changed = True
-                except click.ClickException as e:
-                    click.echo(e)
+            # remove the user from every record/deposit in one transaction
+            changed = _transfer(user, remove=True, type=type)
     if changed:
         final_search = search_es(user, type=type)
         if final_search is not None:
@@ -380,6 +368,34 @@ def transfer_remove(user_email, type=None):
             "It was not possible to update the ownership", fg="red"))
 
 
+def _transfer(user, add_user=None, remove=False, type=None):
+    """Transfer the ownership of all the objects of a user and commit.
+
+    :params user: User obj owning the objects
+            add_user: User obj added as owner
+            remove: remove the user from the owners
+            type: filter the objects. Possible values (deposit, record or None)
+    :returns: True if at least one object was updated.
+    """
+    try:
+        with current_app.test_request_context():
+            updated, skipped = transfer_ownership(
+                user.id, add_user_id=add_user.id if add_user else None,
+                remove=remove, type=type)
+            db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    for obj_id in skipped:
+        if remove:
+            render_warning("Record has to have at least one user",
+                           obj_id, "skipping remove")
+        else:
+            render_warning("User is already owner of object",
+                           obj_id, "skipping")
+    return bool(updated)
+
+
 def search_es(user, type):
     '''
     use ESSearch to find obj where user is owner
@@ -39,7 +39,7 @@ from invenio_records.api import Record
 from invenio_accounts.models import User
 from invenio_pidstore.errors import PIDDoesNotExistError
 
-from b2share.utils import get_base_url
+from b2share.utils import get_base_url, get_user_emails
 from b2share.modules.management.ownership.cli import find_version_master, pid2record
 
 blueprint = Blueprint('b2share_ownership', __name__)
@@ -63,8 +63,9 @@ def add_ownership(pid, user_id: int):
     current_app.logger.info("OWN-API: User {} is an owner. Changing the ownership ...".format(str(User.query.filter(
         User.id.in_([user_id])).all()[0].email)))
     record['_deposit']['owners'].append(user_id)
-    current_app.logger.info("OWN-API: Updated users: {}".format("\n".join([str(User.query.filter(
-        User.id.in_([i])).all()[0].email) for i in record['_deposit']['owners']])))
+    emails = get_user_emails(record['_deposit']['owners'])
+    current_app.logger.info("OWN-API: Updated users: {}".format("\n".join([
+        str(emails[i]) for i in record['_deposit']['owners']])))
     with current_app.test_request_context('/', base_url=get_base_url()):
         record.commit()
         db.session.commit()
@@ -104,8 +105,9 @@ def pass_record_ownership(f):
         if not current_user.id in record['_deposit']['owners']:
             current_app.logger.warning(
                 "OWN-API: User is not allowed to change ownership. skipping..", exc_info=True)
-            current_app.logger.warning("OWN-API: Owners are: {}".format("\n            ".join([str(User.query.filter(
-                User.id.in_([i])).all()[0].email) for i in record['_deposit']['owners']])), exc_info=True)
+            emails = get_user_emails(record['_deposit']['owners'])
+            current_app.logger.warning("OWN-API: Owners are: {}".format("\n            ".join([
+                str(emails[i]) for i in record['_deposit']['owners']])), exc_info=True)
             abort(403)
         return f(self, record, user, *args, **kwargs)
     return inner
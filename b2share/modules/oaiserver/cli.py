@@ -35,7 +35,7 @@ from invenio_oaiserver.models import OAISet
 from invenio_records.models import RecordMetadata
 from invenio_records_files.api import Record
 
-from b2share.modules.communities.api import Community
+from b2share.modules.communities.proxies import current_community_registry
 from b2share.modules.records.utils import list_db_published_records
 
 
@@ -49,7 +49,7 @@ def oai():
 @with_appcontext
 def update_sets():
     """Check that each community has a corresponding oai set"""
-    for community in Community.get_all():
+    for community in current_community_registry.get_all():
         dirty = False
         oaiset = OAISet.query.filter(OAISet.spec == str(community.id)).one_or_none()
         if not oaiset:
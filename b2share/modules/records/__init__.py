@@ -194,7 +194,10 @@ The different actions which can be performed on a published record are:
 
 A record can automatically switch from ``open_access=False`` to
 ``open_access=True`` if it is under embargo and the embargo date is in the
-past. This is done by a Celery task (see ``b2share.modules.records.tasks``)
+past. This is done by Celery tasks (see ``b2share.modules.records.tasks``)
+running every minute for the embargoes scheduled when the records are
+published or modified, and every night for all the records (see
+``b2share.modules.records.embargo``).
 
 
 **Future Work**: B2SHARE uses B2Access for authentication but it
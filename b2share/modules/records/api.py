@@ -33,7 +33,7 @@ from invenio_records.api import Record
 # from b2share.modules.deposit.fetchers import b2share_deposit_uuid_fetcher
 from b2share.modules.deposit.providers import DepositUUIDProvider
 from b2share.modules.records.fetchers import b2share_record_uuid_fetcher
-from invenio_indexer.api import RecordIndexer
+from b2share.modules.records.outbox import queue_record_index
 from invenio_pidrelations.contrib.versioning import PIDVersioning
 
 from invenio_records_files.api import Record, FilesIterator, FileObject
@@ -121,4 +121,4 @@ class B2ShareRecord(Record):
         else:
             # Reindex the "new" last published version in order to have
             # its "is_last_version" up to date.
-            RecordIndexer().index_by_id(version_master.last_child.object_uuid)
+            queue_record_index(version_master.last_child.object_uuid)
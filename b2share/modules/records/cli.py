@@ -25,6 +25,9 @@
 
 from __future__ import absolute_import, print_function
 
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 import click
 from flask.cli import with_appcontext
 import requests
@@ -41,14 +44,120 @@ from b2share.modules.records.providers import RecordUUIDProvider
 from b2share.modules.records.minters import make_record_url, b2share_pid_minter
 from b2share.modules.communities.api import Community
 from b2share.modules.records.tasks import update_expired_embargoes \
-    as update_expired_embargoes_task
+    as update_expired_embargoes_task, reindex_records_range
+from b2share.modules.records.reindex import count_records, reindex_range, \
+    uuid_ranges, ReindexCheckpoint, ReindexProgress
+from b2share.modules.records.handle_audit import run_handle_audit, \
+    AuditCheckpoint as HandleAuditCheckpoint
 from .utils import list_db_published_records
+from .export import export_formats, gzip_lines, iter_export_lines
 from b2share.modules.handle.proxies import current_handle
 from flask import current_app
 
 from b2share.utils import get_base_url
 
 
+@records.command()
+@with_appcontext
+@click.option('-r', '--ranges', default=64, show_default=True,
+              help='number of record id ranges.')
+@click.option('-j', '--jobs', default=1, show_default=True,
+              help='number of ranges reindexed in parallel.')
+@click.option('--celery', is_flag=True, default=False,
+              help='reindex the ranges with the Celery workers.')
+@click.option('-c', '--checkpoint', type=click.Path(dir_okay=False),
+              default=None,
+              help='file storing the reindexed ranges. An interrupted run '
+              'is resumed from it.')
+@click.option('--chunk-size', default=500, show_default=True,
+              help='number of records per bulk request.')
+def reindex(ranges, jobs, celery, checkpoint, chunk_size):
+    """Reindex all records and deposits.
+
+    The record ids are split in ranges which are reindexed in parallel,
+    either by this process or by the Celery workers.
+    """
+    checkpoint = ReindexCheckpoint(checkpoint, ranges)
+    pending = [(index, start, end)
+               for index, (start, end) in enumerate(uuid_ranges(ranges))
+               if index not in checkpoint.done]
+    progress = ReindexProgress(
+        sum(count_records(start, end) for _, start, end in pending))
+    click.secho('Reindexing {} records in {} ranges ({} already done).'
+                .format(progress.total, len(pending), len(checkpoint.done)),
+                fg='yellow')
+
+    def complete(index, count):
+        checkpoint.complete(index, count)
+        progress.update(count)
+        click.secho('range {} done: {}'.format(index, progress))
+
+    if celery:
+        results = {index: reindex_records_range.delay(start, end,
+                                                      chunk_size=chunk_size)
+                   for index, start, end in pending}
+        while results:
+            for index, result in list(results.items()):
+                if result.ready():
+                    complete(index, result.get())
+                    del results[index]
+            time.sleep(1)
+    else:
+        app = current_app._get_current_object()
+
+        def reindex_in_context(start, end):
+            with app.app_context():
+                return reindex_range(start, end, chunk_size=chunk_size)
+
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            futures = {
+                executor.submit(reindex_in_context, start, end): index
+                for index, start, end in pending
+            }
+            for future in as_completed(futures):
+                complete(futures[future], future.result())
+    click.secho('Reindexed {} records.'.format(progress.indexed), fg='green')
+
+
+@records.command()
+@with_appcontext
+@click.argument('output', type=click.File('wb'), default='-')
+@click.option('-f', '--format', 'export_format', default='json',
+              show_default=True,
+              help='"json" or an OAI-PMH metadata format.')
+@click.option('--gzip', 'compress', is_flag=True, default=False,
+              help='compress the output with gzip.')
+@click.option('--community', default=None,
+              help='export only the records of this community id.')
+@click.option('--created-from', type=click.DateTime(), default=None,
+              help='export only the records created since this date.')
+@click.option('--created-until', type=click.DateTime(), default=None,
+              help='export only the records created before this date.')
+@click.option('--updated-since', type=click.DateTime(), default=None,
+              help='export only the records modified since this date.')
+@click.option('--chunk-size', default=500, show_default=True,
+              help='number of records retrieved per query.')
+def export(output, export_format, compress, community, created_from,
+           created_until, updated_since, chunk_size):
+    """Export the published records as newline delimited JSON.
+
+    The records are written to OUTPUT, by default the standard output.
+    """
+    if export_format not in export_formats():
+        raise click.BadParameter(
+            'must be one of {}.'.format(', '.join(export_formats())),
+            param_hint='format')
+    with current_app.test_request_context('/', base_url=get_base_url()):
+        lines = iter_export_lines(
+            export_format, chunk_size=chunk_size, community=community,
+            created_from=created_from, created_until=created_until,
+            updated_since=updated_since)
+        chunks = gzip_lines(lines) if compress else \
+            (line.encode('utf-8') for line in lines)
+        for chunk in chunks:
+            output.write(chunk)
+
+
 @records.group()
 def manage():
     """B2SHARE record management commands."""
@@ -67,44 +176,57 @@ def update_expired_embargoes():
 @click.option('-u', '--update', is_flag=True, default=False,
               help='updates if necessary')
 @click.option('-v', '--verbose', is_flag=True, default=False)
-def check_and_update_handle_records(update, verbose):
+@click.option('-j', '--jobs', default=1, show_default=True,
+              help='number of records checked in parallel.')
+@click.option('--rate', default=0.0, show_default=True,
+              help='maximum number of PIDs checked per second, 0 for no '
+              'limit.')
+@click.option('-c', '--checkpoint', type=click.Path(dir_okay=False),
+              default=None,
+              help='file storing the last checked record. An interrupted '
+              'check is resumed from it.')
+@click.option('-r', '--report', type=click.File('a'), default=None,
+              help='JSON lines file to which the PIDs to update are '
+              'appended.')
+def check_and_update_handle_records(update, verbose, jobs, rate, checkpoint,
+                                    report):
     """Checks that PIDs of records and files have the mandatory EUDAT entries.
     """
+    if not current_handle.handle_client:
+        raise click.ClickException(
+            'Checking PIDs requires the Handle API, please configure '
+            'PID_HANDLE_CREDENTIALS.')
     update_msg = 'updated' if update else 'to update'
+    checkpoint = HandleAuditCheckpoint(checkpoint)
 
     if verbose:
-        click.secho('checking PIDs for all records')
-
-    for record in list_db_published_records():
-        pid_list = [p.get('value') for p in record['_pid']
-                    if p.get('type') == 'ePIC_PID']
-        if pid_list:
-            pid = pid_list[0]
-            res = current_handle.check_eudat_entries_in_handle_pid(
-                handle=pid, update=update
-            )
-            if verbose:
-                if res:
-                    click.secho('{} record PID {} with {}'.format(
-                        update_msg, pid, ", ".join(res.keys())))
-                else:
-                    click.secho('record PID ok: {}'.format(pid))
-
-        for f in record.get('_files', []):
-            pid = f.get('ePIC_PID')
-            if pid:
-                res = current_handle.check_eudat_entries_in_handle_pid(
-                    handle=pid,
-                    fixed=True,
-                    checksum=f.get('checksum'),
-                    checksum_timestamp_iso=record.get('_oai', {}).get('updated'),
-                    update=update)
-                if verbose:
-                    if res:
-                        click.secho('  {} file PID {} with {}'.format(
-                            update_msg, pid, ", ".join(res.keys())))
-                    elif verbose:
-                        click.secho('  file PID ok: {}'.format(pid))
+        click.secho('checking PIDs for all records{}'.format(
+            ' after {}'.format(checkpoint.last_id)
+            if checkpoint.last_id else ''))
+
+    def on_result(record_id, result):
+        indent = '  ' if result['type'] == 'file' else ''
+        if result.get('error'):
+            click.secho('{}{} PID {} error: {}'.format(
+                indent, result['type'], result['handle'], result['error']),
+                fg='red')
+        elif not verbose:
+            return
+        elif result['missing']:
+            click.secho('{}{} {} PID {} with {}'.format(
+                indent, update_msg, result['type'], result['handle'],
+                ", ".join(result['missing'].keys())))
+        else:
+            click.secho('{}{} PID ok: {}'.format(
+                indent, result['type'], result['handle']))
+
+    summary = run_handle_audit(update=update, jobs=jobs, rate=rate,
+                               checkpoint=checkpoint, report=report,
+                               on_result=on_result)
+    click.secho('checked {pids} PIDs of {records} records: {missing} {0}, '
+                '{errors} errors'.format(update_msg, **{
+                    key: summary[key] for key in
+                    ['pids', 'records', 'missing', 'errors']}))
 
 
 @manage.command()
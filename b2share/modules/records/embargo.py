@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of EUDAT B2Share.
+# Copyright (C) 2016 CERN.
+#
+# B2Share is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of the
+# License, or (at your option) any later version.
+#
+# B2Share is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with B2Share; if not, write to the Free Software Foundation, Inc.,
+# 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+#
+# In applying this license, CERN does not
+# waive the privileges and immunities granted to it by virtue of its status
+# as an Intergovernmental Organization or submit itself to any jurisdiction.
+
+"""Release of the records' embargoes.
+
+The end of the embargo of every closed access record is scheduled in a sorted
+set of the shared cache, see :py:mod:`b2share.cache`, when the record is
+committed. The task :py:func:`b2share.modules.records.tasks.release_embargoes`
+frequently pops the due entries so that embargoes are lifted on time.
+
+The shared cache can lose entries, for example when Redis is restarted or
+unavailable. The published records are thus also checked every night in the
+database by :py:func:`release_expired_embargoes`, which schedules again the
+embargoes which are not finished.
+"""
+
+from __future__ import absolute_import, print_function
+
+import time
+from datetime import datetime, timezone
+
+import pytz
+from dateutil.parser import parse as dateutil_parse
+from flask import current_app
+from invenio_db import db
+from invenio_records_files.api import Record
+
+from b2share.cache import SharedCache
+from b2share.utils import run_after_commit
+
+from .utils import _json_path, iter_published_records
+
+embargo_schedule = SharedCache('embargoes')
+
+_SCHEDULE_KEY = 'schedule'
+
+
+def embargo_end(record):
+    """Return the end of a record's embargo.
+
+    Returns:
+        datetime: the end of the embargo, in UTC, or None if the record is
+            not closed access or has no embargo.
+    """
+    if record.get('open_access', True) or not record.get('embargo_date'):
+        return None
+    end = dateutil_parse(record['embargo_date'])
+    # assume UTC for naive datetime objects, as in is_under_embargo
+    if end.tzinfo is None or end.tzinfo.utcoffset(end) is None:
+        end = end.replace(tzinfo=pytz.UTC)
+    return end.astimezone(timezone.utc)
+
+
+def schedule_embargo(record):
+    """Schedule the release of a record's embargo once it is committed."""
+    end = embargo_end(record)
+    if end is None:
+        return
+    record_id = str(record.id)
+    run_after_commit(lambda: embargo_schedule.zadd(
+        _SCHEDULE_KEY, record_id, end.timestamp()))
+
+
+def _release(records):
+    """Make the records whose embargo is finished open access.
+
+    Returns:
+        int: the number of released records.
+    """
+    now = datetime.now(timezone.utc)
+    released = 0
+    for record in records:
+        end = embargo_end(record)
+        if end is None or end > now:
+            continue
+        current_app.logger.debug(
+            'Making embargoed publication {} public'.format(record.id))
+        record['open_access'] = True
+        record.commit()
+        released += 1
+    # the released records are indexed with one bulk request once the
+    # transaction is committed
+    db.session.commit()
+    return released
+
+
+def release_scheduled_embargoes(chunk_size=100):
+    """Release the embargoes which are due according to the schedule.
+
+    Every entry is removed from the schedule before its record is released
+    so that concurrent runs do not release the same record.
+
+    Returns:
+        int: the number of released records.
+    """
+    released = 0
+    while True:
+        record_ids = embargo_schedule.zrangebyscore(
+            _SCHEDULE_KEY, time.time(), chunk_size)
+        if not record_ids:
+            return released
+        claimed = [record_id for record_id in record_ids
+                   if embargo_schedule.zrem(_SCHEDULE_KEY, record_id)]
+        released += _release(Record.get_records(claimed))
+
+
+def release_expired_embargoes(chunk_size=500):
+    """Release every expired embargo found in the database.
+
+    The embargoes which are not finished are scheduled again.
+
+    Returns:
+        int: the number of released records.
+    """
+    released = 0
+    chunk = []
+    records = iter_published_records(chunk_size=chunk_size, filters=[
+        _json_path('open_access').astext == 'false',
+        _json_path('embargo_date').isnot(None),
+    ])
+    now = datetime.now(timezone.utc)
+    for record in records:
+        end = embargo_end(record)
+        if end is None:
+            continue
+        if end > now:
+            embargo_schedule.zadd(_SCHEDULE_KEY, str(record.id),
+                                  end.timestamp())
+            continue
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            released += _release(chunk)
+            chunk = []
+    if chunk:
+        released += _release(chunk)
+    return released
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of EUDAT B2Share.
+# Copyright (C) 2016 CERN.
+#
+# B2Share is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of the
+# License, or (at your option) any later version.
+#
+# B2Share is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with B2Share; if not, write to the Free Software Foundation, Inc.,
+# 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+#
+# In applying this license, CERN does not
+# waive the privileges and immunities granted to it by virtue of its status
+# as an Intergovernmental Organization or submit itself to any jurisdiction.
+
+"""Bulk export of the published records as newline delimited JSON.
+
+The records are read from the database in chunks ordered by id, see
+:py:func:`b2share.modules.records.utils.iter_published_records`, so that the
+whole repository can be exported without loading it in memory and without
+the Elasticsearch result window limit.
+
+Every line is one record, serialized either like the records REST API
+("json" format) or with one of the OAI-PMH metadata formats.
+"""
+
+from __future__ import absolute_import, print_function
+
+import json
+import zlib
+
+from flask import current_app
+from invenio_pidstore.models import PersistentIdentifier
+from invenio_records.models import RecordMetadata
+from invenio_records_rest.utils import obj_or_import_string
+from lxml import etree
+
+from .fetchers import b2share_record_uuid_fetcher
+from .links import record_links_factory
+from .utils import _json_path, iter_published_records
+
+
+def export_formats():
+    """List the formats in which records can be exported."""
+    return ['json'] + sorted(current_app.config['OAISERVER_METADATA_FORMATS'])
+
+
+def export_filters(community=None, created_from=None, created_until=None,
+                   updated_since=None):
+    """Build the SQL criteria selecting the exported records.
+
+    Args:
+        community (str): id of the records' community.
+        created_from (datetime): minimum creation time, included.
+        created_until (datetime): maximum creation time, excluded.
+        updated_since (datetime): minimum modification time, included.
+
+    Returns:
+        list: criteria on :class:`invenio_records.models.RecordMetadata`.
+    """
+    filters = []
+    if community is not None:
+        filters.append(_json_path('community').astext == str(community))
+    if created_from is not None:
+        filters.append(RecordMetadata.created >= created_from)
+    if created_until is not None:
+        filters.append(RecordMetadata.created < created_until)
+    if updated_since is not None:
+        filters.append(RecordMetadata.updated >= updated_since)
+    return filters
+
+
+def _record_serializer(export_format):
+    """Return a function serializing a record to a JSON serializable value."""
+    if export_format == 'json':
+        from .serializers import json_v1
+
+        def serialize(record):
+            pid = b2share_record_uuid_fetcher(record.id, record)
+            return json_v1.transform_record(
+                pid, record, links_factory=record_links_factory)
+        return serialize
+
+    serializer = obj_or_import_string(
+        current_app.config['OAISERVER_METADATA_FORMATS'][export_format][
+            'serializer'])
+
+    def serialize(record):
+        pid = PersistentIdentifier.get('oai', record['_oai']['id'])
+        return {
+            'id': b2share_record_uuid_fetcher(record.id, record).pid_value,
+            'format': export_format,
+            'metadata': etree.tostring(
+                serializer(pid, {'_source': record}), encoding='unicode'),
+        }
+    return serialize
+
+
+def iter_export_lines(export_format='json', chunk_size=500, **filters):
+    """Serialize the published records as lines of JSON.
+
+    The records are serialized with the permissions of the current user,
+    thus within a request context.
+
+    Args:
+        export_format (str): one of :py:func:`export_formats`.
+        chunk_size (int): number of records retrieved per query.
+        **filters: arguments of :py:func:`export_filters`.
+
+    Returns:
+        generator: the lines, each ending with a newline.
+    """
+    if export_format not in export_formats():
+        raise ValueError('Unknown export format {}.'.format(export_format))
+    serialize = _record_serializer(export_format)
+    for record in iter_published_records(
+            chunk_size=chunk_size, filters=export_filters(**filters)):
+        yield json.dumps(serialize(record), default=str) + '\n'
+
+
+def gzip_lines(lines):
+    """Compress lines of text as a gzip stream.
+
+    Returns:
+        generator: the compressed bytes.
+    """
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for line in lines:
+        data = compressor.compress(line.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
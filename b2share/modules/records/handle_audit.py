@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of EUDAT B2Share.
+# Copyright (C) 2016 CERN.
+#
+# B2Share is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of the
+# License, or (at your option) any later version.
+#
+# B2Share is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with B2Share; if not, write to the Free Software Foundation, Inc.,
+# 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+#
+# In applying this license, CERN does not
+# waive the privileges and immunities granted to it by virtue of its status
+# as an Intergovernmental Organization or submit itself to any jurisdiction.
+
+"""Audit of the Handle PIDs of the published records and their files.
+
+Every Handle PID is checked for the mandatory EUDAT entries and, optionally,
+updated with the missing ones. Records are audited in parallel, in the order
+of their ids, so that an interrupted audit can be resumed after the last
+record whose audit and all preceding ones completed.
+"""
+
+from __future__ import absolute_import, print_function
+
+import json
+import os
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+
+from b2share.modules.handle.errors import EpicPIDError
+from b2share.modules.handle.proxies import current_handle
+
+from .utils import iter_published_records
+
+
+class RateLimiter(object):
+    """Thread-safe limit of the number of operations per second."""
+
+    def __init__(self, rate):
+        """Constructor.
+
+        Args:
+            rate (float): maximum number of operations per second. 0 or None
+                disables the limit.
+        """
+        self.interval = 1.0 / rate if rate else 0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Wait until the next operation is allowed."""
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+class AuditCheckpoint(object):
+    """Id of the last audited record, persisted in a JSON file."""
+
+    def __init__(self, path):
+        """Constructor.
+
+        Args:
+            path (str): path of the checkpoint file. None disables the
+                persistence.
+        """
+        self.path = path
+        self.last_id = None
+        if path and os.path.exists(path):
+            with open(path) as checkpoint_file:
+                self.last_id = json.load(checkpoint_file)['last_id']
+
+    def save(self, last_id):
+        """Store the id of the last audited record."""
+        self.last_id = str(last_id)
+        if self.path:
+            tmp_path = '{}.tmp'.format(self.path)
+            with open(tmp_path, 'w') as checkpoint_file:
+                json.dump({'last_id': self.last_id}, checkpoint_file)
+            os.replace(tmp_path, self.path)
+
+
+def audit_record_handles(record, update=False, rate_limiter=None):
+    """Check the Handle PIDs of a record and of its files.
+
+    Args:
+        record (dict): the record's "_pid", "_files" and "_oai" fields.
+        update (bool): if True the missing EUDAT entries are added.
+        rate_limiter (:class:`RateLimiter`): limit of the Handle requests.
+
+    Returns:
+        list: one dict per checked PID with the "handle", its "type"
+            ("record" or "file"), the file "key" and either the "missing"
+            entries or an "error".
+    """
+    checks = [dict(handle=p.get('value'), type='record')
+              for p in record.get('_pid', [])
+              if p.get('type') == 'ePIC_PID'][:1]
+    checks.extend(dict(
+        handle=f['ePIC_PID'], type='file', key=f.get('key'),
+        kwargs=dict(fixed=True, checksum=f.get('checksum'),
+                    checksum_timestamp_iso=record.get('_oai', {}).get(
+                        'updated')),
+    ) for f in record.get('_files', []) if f.get('ePIC_PID'))
+
+    results = []
+    for check in checks:
+        kwargs = check.pop('kwargs', {})
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        try:
+            check['missing'] = current_handle.check_eudat_entries_in_handle_pid(
+                handle=check['handle'], update=update, **kwargs) or {}
+        except (EpicPIDError, AssertionError) as e:
+            check['error'] = str(e) or e.__class__.__name__
+        results.append(check)
+    return results
+
+
+def run_handle_audit(update=False, jobs=1, rate=None, checkpoint=None,
+                     report=None, on_result=None):
+    """Audit the Handle PIDs of every published record.
+
+    Args:
+        update (bool): if True the missing EUDAT entries are added.
+        jobs (int): number of records audited in parallel.
+        rate (float): maximum number of Handle PIDs checked per second.
+        checkpoint (:class:`AuditCheckpoint`): the audit starts after its
+            last record and updates it as records are audited.
+        report (file): if set, the PIDs with missing entries or errors are
+            written to it as JSON lines.
+        on_result (callable): called with the record id and each of the
+            results of :py:func:`audit_record_handles`.
+
+    Returns:
+        :class:`collections.Counter`: the number of audited "records" and
+            "pids", of PIDs with "missing" entries and of "errors".
+    """
+    app = current_app._get_current_object()
+    rate_limiter = RateLimiter(rate)
+    checkpoint = checkpoint or AuditCheckpoint(None)
+    summary = Counter()
+
+    def audit(record):
+        with app.app_context():
+            return audit_record_handles(record, update=update,
+                                        rate_limiter=rate_limiter)
+
+    def complete(record_id, results):
+        summary['records'] += 1
+        for result in results:
+            summary['pids'] += 1
+            if result.get('error'):
+                summary['errors'] += 1
+            elif result['missing']:
+                summary['missing'] += 1
+            if report is not None and (result.get('error') or
+                                       result['missing']):
+                report.write(json.dumps(dict(
+                    result, record_id=str(record_id), updated=update and
+                    not result.get('error'))) + '\n')
+            if on_result is not None:
+                on_result(record_id, result)
+
+    # futures in record id order, the checkpoint is the last record whose
+    # audit and all the preceding ones are done.
+    pending = deque()
+
+    def complete_done(block=False):
+        while pending and (block or pending[0][1].done()):
+            record_id, future = pending.popleft()
+            complete(record_id, future.result())
+            checkpoint.save(record_id)
+
+    records = iter_published_records(
+        fields=['_pid', '_files', '_oai.updated'], after=checkpoint.last_id,
+        with_ids=True)
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        for record_id, record in records:
+            pending.append((record_id, executor.submit(audit, record)))
+            complete_done()
+            # bound the number of records waiting for a worker
+            while len(pending) >= jobs * 4:
+                pending[0][1].result()
+                complete_done()
+        complete_done(block=True)
+    return summary
@@ -23,12 +23,25 @@
 
 """Record modification prior to indexing."""
 
+import threading
+from contextlib import contextmanager
+from itertools import islice
+
 import pytz
+from elasticsearch.helpers import bulk
+from flask import current_app
 from b2share.modules.access.policies import allow_public_file_metadata
 from b2share.modules.records.fetchers import b2share_parent_pid_fetcher, \
     b2share_record_uuid_fetcher
+from invenio_db import db
+from invenio_indexer.api import RecordIndexer
+from invenio_pidrelations.models import PIDRelation
+from invenio_pidrelations.utils import resolve_relation_type_config
+from invenio_pidstore.models import PersistentIdentifier, PIDStatus
+from invenio_records.api import Record
+from invenio_records.models import RecordMetadata
 from invenio_records_files.models import RecordsBuckets
-from invenio_pidrelations.contrib.versioning import PIDVersioning
+from sqlalchemy.orm import aliased
 
 from .utils import is_deposit, is_publication
 from .providers import RecordUUIDProvider
@@ -45,6 +58,228 @@ def record_to_index(record):
                          ' nor a publication')
 
 
+_prefetched = threading.local()
+
+
+def prefetch_index_data(records):
+    """Compute the data added to the indexed publications.
+
+    The data of all the given records is retrieved with a constant number of
+    queries.
+
+    Args:
+        records: published records whose data is retrieved.
+
+    Returns:
+        dict: record id => {'is_last_version': bool,
+            'files_bucket_id': str or None}.
+    """
+    publications = list(records)
+    if not publications:
+        return {}
+    record_ids = [record.id for record in publications]
+    parent_pids = {
+        str(record.id): b2share_parent_pid_fetcher(None, record).pid_value
+        for record in publications
+    }
+
+    # find the last version of every parent
+    parent = aliased(PersistentIdentifier)
+    child = aliased(PersistentIdentifier)
+    versions = db.session.query(
+        parent.pid_value, child.pid_value, PIDRelation.index
+    ).join(
+        PIDRelation, PIDRelation.parent_id == parent.id
+    ).join(
+        child, PIDRelation.child_id == child.id
+    ).filter(
+        parent.pid_type == RecordUUIDProvider.pid_type,
+        parent.pid_value.in_(set(parent_pids.values())),
+        PIDRelation.relation_type ==
+        resolve_relation_type_config('version').id,
+        PIDRelation.index.isnot(None),
+        child.status == PIDStatus.REGISTERED,
+    )
+    last_versions = {}
+    for parent_pid, child_pid, index in versions:
+        if parent_pid not in last_versions or \
+                last_versions[parent_pid][1] < index:
+            last_versions[parent_pid] = (child_pid, index)
+
+    # insert the bucket id for link generation in search results
+    buckets = {}
+    for record_bucket in RecordsBuckets.query.filter(
+            RecordsBuckets.record_id.in_(record_ids)):
+        buckets.setdefault(str(record_bucket.record_id),
+                           str(record_bucket.bucket_id))
+
+    result = {}
+    for record in publications:
+        record_id = str(record.id)
+        pid = b2share_record_uuid_fetcher(None, record).pid_value
+        last_version = last_versions.get(parent_pids[record_id])
+        result[record_id] = {
+            'is_last_version': (last_version is not None and
+                                last_version[0] == pid),
+            'files_bucket_id': buckets.get(record_id),
+        }
+    return result
+
+
+@contextmanager
+def prefetched_index_data(records, data=None):
+    """Make the indexer receiver use data prefetched for the given records.
+
+    See :py:func:`prefetch_index_data`. If data is given it is used instead
+    of prefetching it. Records missing from the data are enriched one by
+    one.
+    """
+    previous = getattr(_prefetched, 'data', None)
+    _prefetched.data = prefetch_index_data(records) if data is None else data
+    try:
+        yield _prefetched.data
+    finally:
+        _prefetched.data = previous
+
+
+def get_index_data(record):
+    """Return the data added to an indexed publication."""
+    data = getattr(_prefetched, 'data', None) or {}
+    record_data = data.get(str(record.id))
+    if record_data is None:
+        record_data = prefetch_index_data([record])[str(record.id)]
+    if record_data['files_bucket_id'] is None:
+        record_data = dict(record_data)
+        del record_data['files_bucket_id']
+    return record_data
+
+
+class B2ShareRecordIndexer(RecordIndexer):
+    """Record indexer enriching bulk indexed records chunk by chunk.
+
+    Bulk indexing retrieves the queued records and the data added by
+    :py:func:`indexer_receiver` for a whole chunk of messages at once
+    instead of running a few queries per record.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Constructor."""
+        super(B2ShareRecordIndexer, self).__init__(*args, **kwargs)
+        self._records = {}
+        """Records of the chunk being indexed, keyed by id."""
+
+    def _actionsiter(self, message_iterator):
+        """Iterate bulk actions, one chunk of messages at a time."""
+        chunk_size = current_app.config['B2SHARE_INDEXER_BULK_CHUNK_SIZE']
+        message_iterator = iter(message_iterator)
+        while True:
+            messages = list(islice(message_iterator, chunk_size))
+            if not messages:
+                break
+            payloads = [message.decode() for message in messages]
+            ids = [payload['id'] for payload in payloads
+                   if payload['op'] != 'delete']
+            self._records, data = self._prefetch_chunk(ids)
+            with prefetched_index_data(None, data=data):
+                yield from super(B2ShareRecordIndexer, self)._actionsiter(
+                    messages)
+            self._records = {}
+
+    def _prefetch_chunk(self, ids):
+        """Load the records of a chunk of messages and their index data.
+
+        If this fails the records are loaded and enriched message by message,
+        so that a failing record only rejects its own message.
+
+        Returns:
+            tuple: (records keyed by id, prefetched index data).
+        """
+        try:
+            records = {
+                str(model.id): Record(model.json, model=model)
+                for model in RecordMetadata.query.filter(
+                    RecordMetadata.id.in_(ids))
+                if model.json is not None
+            }
+            return records, prefetch_index_data(
+                record for record in records.values()
+                if is_publication(record.model))
+        except Exception:
+            current_app.logger.exception(
+                'Failed to prefetch the records {}, indexing them one by '
+                'one.'.format(', '.join(ids)))
+            # the failed query may have aborted the transaction
+            db.session.rollback()
+            return {}, {}
+
+    def index_records(self, records, **kwargs):
+        """Index records synchronously with one bulk request.
+
+        Args:
+            records: records to index.
+            **kwargs: additional arguments given to
+                :py:func:`elasticsearch.helpers.bulk`.
+
+        Returns:
+            int: number of indexed records.
+        """
+        return self.send_actions(self.record_actions(records), **kwargs)
+
+    def record_actions(self, records):
+        """Build the bulk index actions of the given records.
+
+        Args:
+            records: records to index.
+
+        Returns:
+            list: the bulk actions, see :py:meth:`send_actions`.
+        """
+        records = list(records)
+        self._records = {str(record.id): record for record in records}
+        try:
+            with prefetched_index_data(
+                    record for record in records
+                    if is_publication(record.model)):
+                return [self._index_action({'id': str(record.id)})
+                        for record in records]
+        finally:
+            self._records = {}
+
+    def send_actions(self, actions, **kwargs):
+        """Send bulk actions to Elasticsearch with one bulk request.
+
+        Args:
+            actions (list): actions built by :py:meth:`record_actions`.
+            **kwargs: additional arguments given to
+                :py:func:`elasticsearch.helpers.bulk`.
+
+        Returns:
+            int: number of successful actions.
+        """
+        if not actions:
+            return 0
+        kwargs.setdefault('request_timeout', current_app.config[
+            'INDEXER_BULK_REQUEST_TIMEOUT'])
+        success, _ = bulk(self.client, actions, stats_only=True, **kwargs)
+        return success
+
+    def _index_action(self, payload):
+        """Bulk index action using the prefetched records."""
+        record = self._records.get(payload['id'])
+        if record is None:
+            return super(B2ShareRecordIndexer, self)._index_action(payload)
+        index, doc_type = self.record_to_index(record)
+        return {
+            '_op_type': 'index',
+            '_index': index,
+            '_type': doc_type,
+            '_id': str(record.id),
+            '_version': record.revision_id,
+            '_version_type': self._version_type,
+            '_source': self._prepare_record(record, index, doc_type),
+        }
+
+
 def indexer_receiver(sender, json=None, record=None, index=None,
                      **dummy_kwargs):
     """Connect to before_record_index signal to transform record for ES."""
@@ -63,6 +298,12 @@ def indexer_receiver(sender, json=None, record=None, index=None,
         if (not is_deposit(record.model) and allow_public_file_metadata(json)):
             json['external_pids'] = json['_deposit']['external_pids']
         del json['_deposit']['external_pids']
+    if index.startswith('deposits'):
+        from b2share.modules.deposit.permissions import deposit_read_scope
+        json.setdefault('_internal', {})['read_scopes'] = [
+            deposit_read_scope(json.get('community'),
+                               json.get('publication_state'))
+        ]
     if not index.startswith('records'):
         return
     try:
@@ -76,20 +317,10 @@ def indexer_receiver(sender, json=None, record=None, index=None,
         json['owners'] = record['_deposit']['owners']
         json['_internal'] = dict()
 
-        # add the 'is_last_version' flag
-        parent_pid = b2share_parent_pid_fetcher(None, record).pid_value
-        pid = b2share_record_uuid_fetcher(None, record).pid_value
-        last_version_pid = PIDVersioning(
-            parent=RecordUUIDProvider.get(parent_pid).pid
-        ).last_child
-        json['_internal']['is_last_version'] = \
-            (last_version_pid.pid_value == pid)
-
-        # insert the bucket id for link generation in search results
-        record_buckets = RecordsBuckets.query.filter(
-            RecordsBuckets.record_id == record.id).all()
-        if record_buckets:
-            json['_internal']['files_bucket_id'] = \
-                str(record_buckets[0].bucket_id)
+        json['_internal'].update(get_index_data(record))
+        # precomputed totals used by the community storage statistics
+        files = json.get('_files', [])
+        json['_internal']['files_count'] = len(files)
+        json['_internal']['files_size'] = sum(f.get('size', 0) for f in files)
     except Exception:
         raise
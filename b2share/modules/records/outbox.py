@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of EUDAT B2Share.
+# Copyright (C) 2016 CERN.
+#
+# B2Share is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of the
+# License, or (at your option) any later version.
+#
+# B2Share is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with B2Share; if not, write to the Free Software Foundation, Inc.,
+# 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+#
+# In applying this license, CERN does not
+# waive the privileges and immunities granted to it by virtue of its status
+# as an Intergovernmental Organization or submit itself to any jurisdiction.
+
+"""Transactional indexing of published records.
+
+Indexing a record while its transaction is still open makes the transaction
+last longer and often indexes the same record several times, for example when
+a deposit is published. Instead, the records modified in a transaction are
+collected in an outbox attached to the database transaction, see
+:py:func:`b2share.utils.transaction_data`:
+
+* the outbox deduplicates the record ids.
+* just before the commit the documents of the queued records are built from
+  their final state, with one bulk prefetch of the indexed data.
+* once the transaction is committed they are sent to Elasticsearch with one
+  bulk request. When ``B2SHARE_INDEXER_ASYNC`` is enabled the record ids
+  are instead sent to the bulk indexing queue.
+* their OAI-PMH serializations are then cached in the background, see
+  :py:mod:`b2share.modules.records.serializers.cache`.
+
+Nothing is indexed if the transaction is rolled back. Indexing errors never
+abort the transaction nor fail the request once it is committed: records whose
+documents cannot be built or sent are sent to the bulk indexing queue, and
+records which cannot be queued are logged so that they can be reindexed.
+"""
+
+from __future__ import absolute_import, print_function
+
+from collections import OrderedDict
+
+from flask import current_app
+from invenio_db import db
+from invenio_records.api import Record
+from invenio_records.models import RecordMetadata
+
+from b2share.utils import run_after_commit, run_before_commit, \
+    transaction_data
+
+from .indexer import B2ShareRecordIndexer
+
+_OUTBOX_KEY = 'index_outbox'
+
+
+def queue_record_index(record_id):
+    """Index a record once the current transaction is committed.
+
+    Args:
+        record_id: id (UUID) of the record or deposit to index.
+    """
+    data = transaction_data()
+    outbox = data.get(_OUTBOX_KEY)
+    if outbox is None:
+        outbox = data[_OUTBOX_KEY] = OrderedDict()
+        run_before_commit(_prepare_outbox)
+    outbox[str(record_id)] = None
+
+
+def discard_record_index(record_id):
+    """Cancel the queued indexing of a record, e.g. when it is deleted."""
+    outbox = transaction_data().get(_OUTBOX_KEY)
+    if outbox is not None:
+        outbox.pop(str(record_id), None)
+
+
+def _prepare_outbox():
+    """Build the bulk actions of the queued records before the commit."""
+    outbox = transaction_data().pop(_OUTBOX_KEY, None)
+    if not outbox:
+        return
+    record_ids = list(outbox)
+    if current_app.config['B2SHARE_INDEXER_ASYNC']:
+        run_after_commit(lambda: _queue_bulk_index(record_ids))
+    else:
+        _prepare_actions(record_ids)
+    if current_app.config['B2SHARE_SERIALIZATION_CACHE_WARM']:
+        run_after_commit(lambda: _warm_serializations(record_ids))
+
+
+def _prepare_actions(record_ids):
+    """Build the index documents of records and send them after the commit.
+    """
+    db.session.flush()
+    try:
+        records = [
+            Record(model.json, model=model)
+            for model in RecordMetadata.query.filter(
+                RecordMetadata.id.in_(record_ids))
+            if model.json is not None
+        ]
+        actions = B2ShareRecordIndexer().record_actions(records)
+    except Exception:
+        # an indexing error must not abort the transaction
+        current_app.logger.exception(
+            'Failed to build the index documents of records {}, sending '
+            'them to the bulk indexing queue.'.format(', '.join(record_ids)))
+        run_after_commit(lambda: _queue_bulk_index(record_ids))
+    else:
+        run_after_commit(lambda: _send_actions(record_ids, actions))
+
+
+def _send_actions(record_ids, actions):
+    """Send the prepared records to Elasticsearch."""
+    try:
+        B2ShareRecordIndexer().send_actions(actions)
+    except Exception:
+        current_app.logger.exception(
+            'Failed to index records {}, sending them to the bulk '
+            'indexing queue.'.format(', '.join(record_ids)))
+        _queue_bulk_index(record_ids)
+
+
+def _queue_bulk_index(record_ids):
+    """Send records to the bulk indexing queue and process it."""
+    from .tasks import process_bulk_queue
+    try:
+        B2ShareRecordIndexer().bulk_index(record_ids)
+        process_bulk_queue.delay()
+    except Exception:
+        current_app.logger.exception(
+            'Failed to queue records {} for indexing, they will be indexed '
+            'by the next reindexing.'.format(', '.join(record_ids)))
+
+
+def _warm_serializations(record_ids):
+    """Cache the OAI-PMH serializations of the records in the background."""
+    from .tasks import cache_record_serializations
+    try:
+        cache_record_serializations.delay(record_ids)
+    except Exception:
+        current_app.logger.exception(
+            'Failed to cache the serializations of records {}.'.format(
+                ', '.join(record_ids)))
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of EUDAT B2Share.
+# Copyright (C) 2016 CERN.
+#
+# B2Share is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of the
+# License, or (at your option) any later version.
+#
+# B2Share is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with B2Share; if not, write to the Free Software Foundation, Inc.,
+# 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+#
+# In applying this license, CERN does not
+# waive the privileges and immunities granted to it by virtue of its status
+# as an Intergovernmental Organization or submit itself to any jurisdiction.
+
+"""Full reindexing of records and deposits.
+
+The record ids (UUIDs) are split in ranges of equal size. Each range is
+reindexed independently so that ranges can be processed in parallel and a
+run can be resumed from the ranges which were not completed.
+"""
+
+from __future__ import absolute_import, print_function
+
+import json
+import os
+import time
+import uuid
+
+from elasticsearch.exceptions import TransportError
+from elasticsearch.helpers import BulkIndexError
+from flask import current_app
+from invenio_db import db
+from invenio_records.api import Record
+from invenio_records.models import RecordMetadata
+
+from .indexer import B2ShareRecordIndexer
+
+
+def uuid_ranges(count):
+    """Split the UUID space in ranges of equal size.
+
+    Args:
+        count (int): number of ranges.
+
+    Returns:
+        list: (start, end) UUID strings. The start is included, the end is
+            excluded. The end of the last range is None.
+    """
+    step = (1 << 128) // count
+    bounds = [str(uuid.UUID(int=step * index)) for index in range(count)]
+    return list(zip(bounds, bounds[1:] + [None]))
+
+
+def count_records(start=None, end=None):
+    """Count the records which are not deleted in a range of ids."""
+    query = RecordMetadata.query.filter(RecordMetadata.json.isnot(None))
+    if start is not None:
+        query = query.filter(RecordMetadata.id >= start)
+    if end is not None:
+        query = query.filter(RecordMetadata.id < end)
+    return query.count()
+
+
+def _is_back_pressure(error):
+    """Check if an Elasticsearch error means that the cluster is overloaded.
+    """
+    if isinstance(error, BulkIndexError):
+        return any(status == 429 for item in error.errors
+                   for status in [list(item.values())[0].get('status')])
+    return getattr(error, 'status_code', None) == 429
+
+
+def reindex_range(start, end=None, chunk_size=500, max_retries=8):
+    """Reindex the records and deposits whose id is in the given range.
+
+    Records are indexed chunk by chunk, each with one bulk request. A chunk
+    rejected because the Elasticsearch cluster is overloaded is retried with
+    an exponential backoff.
+
+    Args:
+        start (str): first UUID of the range, included.
+        end (str): last UUID of the range, excluded. None means no limit.
+        chunk_size (int): number of records indexed per bulk request.
+        max_retries (int): number of retries of a rejected chunk.
+
+    Returns:
+        int: the number of indexed records.
+    """
+    indexer = B2ShareRecordIndexer()
+    indexed = 0
+    last_id = None
+    while True:
+        query = RecordMetadata.query.filter(RecordMetadata.json.isnot(None))
+        if last_id is None:
+            query = query.filter(RecordMetadata.id >= start)
+        else:
+            query = query.filter(RecordMetadata.id > last_id)
+        if end is not None:
+            query = query.filter(RecordMetadata.id < end)
+        models = query.order_by(RecordMetadata.id).limit(chunk_size).all()
+        if not models:
+            break
+        records = [Record(model.json, model=model) for model in models]
+        for retry in range(max_retries + 1):
+            try:
+                indexed += indexer.index_records(records)
+                break
+            except (TransportError, BulkIndexError) as e:
+                if retry == max_retries or not _is_back_pressure(e):
+                    raise
+                delay = 2 ** retry
+                current_app.logger.warning(
+                    'Elasticsearch is overloaded, retrying in {}s.'.format(
+                        delay))
+                time.sleep(delay)
+        last_id = models[-1].id
+        # release the indexed records
+        db.session.expunge_all()
+    return indexed
+
+
+class ReindexCheckpoint(object):
+    """Ranges already reindexed, persisted in a JSON file."""
+
+    def __init__(self, path, ranges_count):
+        """Constructor.
+
+        Args:
+            path (str): path of the checkpoint file. None disables the
+                persistence.
+            ranges_count (int): number of ranges of the run.
+        """
+        self.path = path
+        self.ranges_count = ranges_count
+        self.done = {}
+        """Range index => number of indexed records."""
+        if path and os.path.exists(path):
+            with open(path) as checkpoint_file:
+                state = json.load(checkpoint_file)
+            if state['ranges_count'] != ranges_count:
+                raise ValueError(
+                    'Checkpoint {} was created with {} ranges.'.format(
+                        path, state['ranges_count']))
+            self.done = {int(index): count
+                         for index, count in state['done'].items()}
+
+    def complete(self, index, count):
+        """Mark a range as reindexed."""
+        self.done[index] = count
+        if self.path:
+            tmp_path = '{}.tmp'.format(self.path)
+            with open(tmp_path, 'w') as checkpoint_file:
+                json.dump({'ranges_count': self.ranges_count,
+                           'done': self.done}, checkpoint_file)
+            os.replace(tmp_path, self.path)
+
+
+class ReindexProgress(object):
+    """Throughput and estimated remaining time of a reindexing run."""
+
+    def __init__(self, total):
+        """Constructor.
+
+        Args:
+            total (int): number of records to reindex.
+        """
+        self.total = total
+        self.indexed = 0
+        self.started = time.time()
+
+    def update(self, count):
+        """Add reindexed records."""
+        self.indexed += count
+
+    @property
+    def rate(self):
+        """Indexed records per second."""
+        elapsed = time.time() - self.started
+        return self.indexed / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self):
+        """Estimated remaining seconds or None if unknown."""
+        if not self.rate:
+            return None
+        return max(self.total - self.indexed, 0) / self.rate
+
+    def __str__(self):
+        eta = self.eta
+        return '{}/{} records, {:.1f} docs/s, ETA {}'.format(
+            self.indexed, self.total, self.rate,
+            time.strftime('%H:%M:%S', time.gmtime(eta))
+            if eta is not None else 'unknown')
@@ -31,7 +31,7 @@ from invenio_access.permissions import (
     superuser_access, ParameterizedActionNeed
 )
 from b2share.modules.access.permissions import StrictDynamicPermission
-from b2share.modules.deposit.permissions import list_readable_communities
+from b2share.modules.deposit.permissions import list_readable_scopes
 
 from .errors import AnonymousDepositSearch
 
@@ -78,16 +78,12 @@ class B2ShareRecordsSearch(RecordsSearch):
 
             filters = [Q('term', **{'_deposit.owners': current_user.id})]
 
-            readable_communities = list_readable_communities(current_user.id)
-            for publication_state in readable_communities.all:
-                filters.append(Q('term', publication_state=publication_state))
-            for community, publication_states in readable_communities.communities.items():
-                for publication_state in publication_states:
-                    filters.append(Bool(
-                        must=[Q('term', publication_state=publication_state),
-                              Q('term', community=str(community))],
-                    ))
-
+            # deposits store the read scope of their community and
+            # publication state, see deposit_read_scope.
+            readable_scopes = list_readable_scopes(current_user.id)
+            if readable_scopes:
+                filters.append(Q('terms', **{
+                    '_internal.read_scopes': readable_scopes}))
 
             # otherwise filter returned deposits
             self.query = Bool(
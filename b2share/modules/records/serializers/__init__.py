@@ -39,6 +39,7 @@ from b2share.modules.records.serializers.schemas.datacite import DataCiteSchemaV
 from b2share.modules.records.serializers.schemas.eudatcore import EudatCoreSchema
 from b2share.modules.records.serializers.schemas.eudatextended import EudatExtendedSchema
 from .xmlserializer import XMLSerializer
+from .cache import CachedOAIPMHSerializer
 
 from b2share.modules.records.serializers.schemas.datacite import DataCiteSchemaV1, DataCiteSchemaV2
 from b2share.modules.records.serializers.schemas.eudatcore import EudatCoreSchema
@@ -55,10 +56,15 @@ json_v1_search = search_responsify(json_v1, 'application/json')
 # OAI-PMH record serializers.
 dc_v1 = DublinCoreSerializer(RecordSchemaDublinCoreV1, replace_refs=True)
 marcxml_v1 = MARCXMLSerializer(to_marc21, schema_class=RecordSchemaMarcXMLV1, replace_refs=True)
-oaipmh_oai_dc = dc_v1.serialize_oaipmh
-oaipmh_marc21_v1 = marcxml_v1.serialize_oaipmh
-eudatcore_v1 = XMLSerializer(EudatCoreSchema, replace_refs=True).serialize_oaipmh
-eudatextended_v1 = XMLSerializer(EudatExtendedSchema, replace_refs=True).serialize_oaipmh
+oaipmh_oai_dc = CachedOAIPMHSerializer(dc_v1.serialize_oaipmh, 'oai_dc')
+oaipmh_marc21_v1 = CachedOAIPMHSerializer(marcxml_v1.serialize_oaipmh,
+                                          'marc21_v1')
+eudatcore_v1 = CachedOAIPMHSerializer(
+    XMLSerializer(EudatCoreSchema, replace_refs=True).serialize_oaipmh,
+    'eudatcore_v1')
+eudatextended_v1 = CachedOAIPMHSerializer(
+    XMLSerializer(EudatExtendedSchema, replace_refs=True).serialize_oaipmh,
+    'eudatextended_v1')
 
 # DOI record serializers.
 datacite_v31 = DataCite31Serializer(DataCiteSchemaV1, replace_refs=True)
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of EUDAT B2Share.
+# Copyright (C) 2016 CERN.
+#
+# B2Share is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of the
+# License, or (at your option) any later version.
+#
+# B2Share is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with B2Share; if not, write to the Free Software Foundation, Inc.,
+# 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+#
+# In applying this license, CERN does not
+# waive the privileges and immunities granted to it by virtue of its status
+# as an Intergovernmental Organization or submit itself to any jurisdiction.
+
+"""Cache of the OAI-PMH serializations of records.
+
+Harvesters repeatedly request the same records in every metadata format.
+The serialized XML of a record is cached in the shared cache per record,
+record revision and format. The revision is identified by the record's last
+modification time, which is available both from the database and from the
+search index used by OAI-PMH ListRecords.
+"""
+
+from __future__ import absolute_import, print_function
+
+import pytz
+from flask import current_app
+from invenio_pidstore.models import PersistentIdentifier
+from invenio_records.api import Record
+from invenio_records_rest.utils import obj_or_import_string
+from lxml import etree
+
+from b2share.cache import SharedCache
+
+serialization_cache = SharedCache('serializations')
+
+
+def record_version(record):
+    """Return the last modification time of a serialized record.
+
+    Args:
+        record: a :class:`invenio_records.api.Record`, a dict with the record
+            as "_source" or a search hit.
+
+    Returns:
+        str: ISO formatted modification time, as indexed in "_updated", or
+            None if unknown.
+    """
+    source = record
+    if not isinstance(record, Record):
+        source = record.get('_source', record)
+    if isinstance(source, Record):
+        if source.updated is None:
+            return None
+        return pytz.utc.localize(source.updated).isoformat()
+    return source.get('_updated')
+
+
+class CachedOAIPMHSerializer(object):
+    """OAI-PMH serializer whose output is cached per record revision."""
+
+    def __init__(self, serializer, metadata_format):
+        """Constructor.
+
+        Args:
+            serializer: function serializing (pid, record) to an XML element.
+            metadata_format (str): name of the format in the cache keys.
+        """
+        self.serializer = serializer
+        self.metadata_format = metadata_format
+
+    def cache_key(self, pid, version):
+        """Build the cache key of a record revision."""
+        return '{}:{}:{}'.format(pid.object_uuid, version,
+                                 self.metadata_format)
+
+    def __call__(self, pid, record):
+        """Serialize a record or retrieve its cached serialization."""
+        version = record_version(record)
+        if version is None:
+            return self.serializer(pid, record)
+        key = self.cache_key(pid, version)
+        cached = serialization_cache.get(key)
+        if cached is not None:
+            return etree.fromstring(cached)
+        return self._serialize(key, pid, record)
+
+    def warm(self, pid, record):
+        """Serialize a record and cache the result.
+
+        Args:
+            pid: the record's OAI persistent identifier.
+            record (:class:`invenio_records.api.Record`): the record.
+        """
+        version = record_version(record)
+        if version is not None:
+            self._serialize(self.cache_key(pid, version), pid,
+                            {'_source': record})
+
+    def _serialize(self, key, pid, record):
+        element = self.serializer(pid, record)
+        serialization_cache.set(
+            key, etree.tostring(element, encoding='unicode'),
+            timeout=current_app.config['B2SHARE_SERIALIZATION_CACHE_TTL'])
+        return element
+
+
+def warm_record_serializations(records):
+    """Cache the serializations of published records in every OAI-PMH format.
+
+    Args:
+        records: the published records.
+    """
+    serializers = [
+        serializer for serializer in (
+            obj_or_import_string(metadata_format['serializer'])
+            for metadata_format in
+            current_app.config['OAISERVER_METADATA_FORMATS'].values()
+        ) if isinstance(serializer, CachedOAIPMHSerializer)
+    ]
+    for record in records:
+        oai_id = record.get('_oai', {}).get('id')
+        if oai_id is None:
+            continue
+        pid = PersistentIdentifier.get('oai', oai_id)
+        for serializer in serializers:
+            try:
+                serializer.warm(pid, record)
+            except Exception:
+                # the record is serialized again when it is requested
+                current_app.logger.exception(
+                    'Failed to cache the {} serialization of record {}.'
+                    .format(serializer.metadata_format, record.id))
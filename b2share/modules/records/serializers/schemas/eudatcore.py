@@ -1,7 +1,7 @@
 from marshmallow import Schema
 from lxml import etree
 from lxml.builder import E
-from b2share.modules.communities.api import Community
+from b2share.modules.communities.proxies import current_community_registry
 from b2share.modules.communities.errors import CommunityDoesNotExistError
 from invenio_files_rest.models import Bucket, ObjectVersion, FileInstance
 from invenio_records_files.models import RecordsBuckets
@@ -45,7 +45,7 @@ class EudatCoreSchema(object):
 
     def community(self, metadata, root):
         try:
-            c = Community.get(id=metadata['community'])
+            c = current_community_registry.get(id=metadata['community'])
             root.append(E.community(c.name))
         except CommunityDoesNotExistError:
             root.append(E.community('unknown'))
@@ -25,47 +25,100 @@
 
 from __future__ import absolute_import, print_function
 
-from datetime import datetime, timezone
-
 from flask import current_app
 from celery import shared_task
 from invenio_db import db
-from invenio_indexer.api import RecordIndexer
 from invenio_records_files.api import Record
-from invenio_search import current_search_client
 
-from .search import B2ShareRecordsSearch
+from .embargo import release_expired_embargoes, \
+    release_scheduled_embargoes
+from .indexer import B2ShareRecordIndexer
+from .reindex import reindex_range
+from .utils import is_publication
 from b2share.utils import get_base_url
 
 
 @shared_task(ignore_result=True)
-def update_expired_embargoes():
-    """Release expired embargoes every midnight."""
-    logger = current_app.logger
+def process_bulk_queue():
+    """Index the records queued for bulk indexing.
+
+    Replaces :py:func:`invenio_indexer.tasks.process_bulk_queue` so that the
+    queued records are enriched chunk by chunk.
+    """
+    B2ShareRecordIndexer().process_bulk_queue()
+
+
+@shared_task()
+def reindex_records_range(start, end=None, chunk_size=500):
+    """Reindex the records whose id is in the given range.
+
+    See :py:func:`b2share.modules.records.reindex.reindex_range`.
+
+    Returns:
+        int: the number of indexed records.
+    """
+    return reindex_range(start, end, chunk_size=chunk_size)
+
+
+@shared_task(ignore_result=True)
+def release_embargoes():
+    """Release the embargoes which are due, see
+    :py:func:`b2share.modules.records.embargo.release_scheduled_embargoes`.
+    """
     # The task needs to run in a request context as JSON Schema validation
     # will use url_for.
     with current_app.test_request_context('/', base_url=get_base_url()):
-        s = B2ShareRecordsSearch(
-            using=current_search_client,
-            index='records'
-        ).query(
-            'query_string',
-            query='open_access:false AND embargo_date:{{* TO {0}}}'.format(
-                datetime.now(timezone.utc).isoformat()
-            ),
-            allow_leading_wildcard=False
-        ).fields([])
-        record_ids = [hit.meta.id for hit in s.scan()]
-        if record_ids:
-            logger.info('Changing access of {} embargoed publications'
-                        ' to public.'.format(len(record_ids)))
-        for record in Record.get_records(record_ids):
-            logger.debug('Making embargoed publication {} public'.format(
-                record.id))
-            record['open_access'] = True
-            record.commit()
-        db.session.commit()
-
-        indexer = RecordIndexer()
-        indexer.bulk_index(record_ids)
-        indexer.process_bulk_queue()
+        released = release_scheduled_embargoes()
+    if released:
+        current_app.logger.info('Changed access of {} embargoed publications'
+                                ' to public.'.format(released))
+
+
+@shared_task(ignore_result=True)
+def update_expired_embargoes():
+    """Release expired embargoes every midnight.
+
+    This checks every closed access publication in the database, see
+    :py:func:`b2share.modules.records.embargo.release_expired_embargoes`.
+    """
+    with current_app.test_request_context('/', base_url=get_base_url()):
+        released = release_expired_embargoes()
+    if released:
+        current_app.logger.info('Changed access of {} embargoed publications'
+                                ' to public.'.format(released))
+
+
+@shared_task(bind=True, ignore_result=True, max_retries=5)
+def create_record_file_pids(self, record_id):
+    """Create the file PIDs of a record published without them.
+
+    See :py:data:`b2share.modules.handle.config.B2SHARE_HANDLE_DEFERRED_FILE_PIDS`.
+    The task is retried with an exponential backoff if some PIDs could not
+    be created.
+    """  # noqa
+    from b2share.modules.deposit.api import create_file_pids
+    record = Record.get_record(record_id)
+    if record['_deposit'].get('file_pids_status') not in {'pending',
+                                                          'failed'}:
+        return
+    # url_for is used to generate the files URLs.
+    with current_app.test_request_context('/', base_url=get_base_url()):
+        create_file_pids(record)
+        record.commit()
+    db.session.commit()
+    if record['_deposit'].get('file_pids_status') == 'failed':
+        raise self.retry(countdown=60 * 2 ** self.request.retries)
+
+
+@shared_task(ignore_result=True)
+def cache_record_serializations(record_ids):
+    """Cache the OAI-PMH serializations of the given published records.
+
+    See :py:mod:`b2share.modules.records.serializers.cache`.
+    """
+    from .serializers.cache import warm_record_serializations
+    # url_for is used by the serializers.
+    with current_app.test_request_context('/', base_url=get_base_url()):
+        warm_record_serializations(
+            record for record in Record.get_records(record_ids)
+            if is_publication(record.model))
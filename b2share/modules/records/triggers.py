@@ -35,8 +35,10 @@ from invenio_records.signals import (
 )
 from invenio_indexer.api import RecordIndexer
 from invenio_rest.errors import FieldError
+from .embargo import schedule_embargo
 from .errors import AlteredRecordError
 from .indexer import is_publication
+from .outbox import discard_record_index, queue_record_index
 
 
 def register_triggers(app):
@@ -60,16 +62,21 @@ def check_record_immutable_fields(record):
 
 
 def index_record_trigger(record):
-    """Index the given record if it is a publication."""
+    """Index the given record if it is a publication.
+
+    The record is indexed once the transaction is committed, see
+    :py:mod:`b2share.modules.records.outbox`. The end of its embargo is
+    also scheduled, see :py:mod:`b2share.modules.records.embargo`.
+    """
     if is_publication(record.model):
-        # index the record synchronously as an asynchronous task will not
-        # find the record if it runs before this transaction's commit.
-        RecordIndexer().index(record)
+        queue_record_index(record.id)
+        schedule_embargo(record)
 
 
 def unindex_record_trigger(record):
     """Unindex the given record if it is a publication."""
     if is_publication(record.model):
+        discard_record_index(record.id)
         # The indexer requires that the record still exists in the database
         # when it is removed from the search index. Thus we have to unindex it
         # synchonously.
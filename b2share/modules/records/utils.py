@@ -23,7 +23,10 @@
 
 """Record utils."""
 from flask import abort
+from sqlalchemy import type_coerce
+from sqlalchemy.dialects.postgresql import JSON
 
+from invenio_db import db
 from invenio_records.models import RecordMetadata
 from invenio_records_files.api import Record
 from invenio_pidstore.resolver import Resolver
@@ -55,13 +58,77 @@ def is_deposit(record):
     return record.json['$schema'].endswith('#/draft_json_schema')
 
 
+def _json_path(path):
+    """Build the SQL expression selecting a dotted path in the records JSON.
+    """
+    json_column = type_coerce(RecordMetadata.json, JSON)
+    keys = path.split('.')
+    return json_column[keys[0]] if len(keys) == 1 else json_column[tuple(keys)]
+
+
+def iter_published_records(fields=None, chunk_size=500, after=None,
+                           with_ids=False, filters=None):
+    """Iterate over the published records without loading them all at once.
+
+    The published records are selected in SQL via their "$schema" and
+    retrieved in chunks ordered by id. Every chunk is a separate query so
+    that the caller can commit the session while iterating.
+
+    Args:
+        fields (list): if set, only these dotted JSON paths are retrieved,
+            for example ``['_pid', '_oai.updated']``.
+        chunk_size (int): number of records retrieved per query.
+        after (str): if set, only the records whose id is greater than this
+            one are retrieved. Used to resume an interrupted iteration.
+        with_ids (bool): if True, (record id, record) tuples are generated.
+        filters (list): additional SQLAlchemy criteria on
+            :class:`invenio_records.models.RecordMetadata`.
+
+    Returns:
+        generator: the records as :class:`invenio_records_files.api.Record`
+            or, if fields are given, as dicts containing only the given
+            paths.
+    """
+    columns = [_json_path(path).label('field_{}'.format(index))
+               for index, path in enumerate(fields or [])]
+    last_id = after
+    while True:
+        if fields:
+            query = db.session.query(RecordMetadata.id, *columns)
+        else:
+            query = RecordMetadata.query
+        query = query.filter(
+            RecordMetadata.json.isnot(None),
+            _json_path('$schema').astext.like('%#/json_schema'),
+            *(filters or [])
+        )
+        if last_id is not None:
+            query = query.filter(RecordMetadata.id > last_id)
+        rows = query.order_by(RecordMetadata.id).limit(chunk_size).all()
+        if not rows:
+            return
+        for row in rows:
+            if not fields:
+                record = Record(row.json, model=row)
+                yield (row.id, record) if with_ids else record
+                continue
+            data = {}
+            for index, path in enumerate(fields):
+                value = getattr(row, 'field_{}'.format(index))
+                if value is None:
+                    continue
+                keys = path.split('.')
+                parent = data
+                for key in keys[:-1]:
+                    parent = parent.setdefault(key, {})
+                parent[keys[-1]] = value
+            yield (row.id, data) if with_ids else data
+        last_id = rows[-1].id
+
+
 def list_db_published_records():
     """A generator for all the published records"""
-    query = RecordMetadata.query.filter(RecordMetadata.json is not None)
-    for obj in query.all():
-        record = Record(obj.json, model=obj)
-        if record.model.json and is_publication(record.model):
-            yield record
+    return iter_published_records()
 
 
 def get_parent_ownership(pid):
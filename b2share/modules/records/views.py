@@ -28,12 +28,14 @@ from functools import partial, wraps
 
 from sqlalchemy import and_
 from sqlalchemy.orm import aliased
+from dateutil.parser import parse as dateutil_parse
 from flask import Blueprint, abort, request, url_for, make_response, after_this_request
+from flask import Response, stream_with_context
 from flask import jsonify, Flask, current_app
 from invenio_db import db
 from invenio_pidstore.resolver import Resolver
 from invenio_pidstore.errors import PIDDoesNotExistError, PIDRedirectedError
-from invenio_pidstore.models import PersistentIdentifier
+from invenio_pidstore.models import PersistentIdentifier, PIDStatus
 from invenio_pidrelations.contrib.versioning import PIDVersioning
 from invenio_pidrelations.models import PIDRelation
 from invenio_records_files.api import Record
@@ -49,7 +51,7 @@ from invenio_records_rest.views import (pass_record,
                                         need_record_permission)
 from invenio_records_rest.links import default_links_factory
 from invenio_records_rest.query import default_search_factory
-from invenio_records_rest.utils import obj_or_import_string
+from invenio_records_rest.utils import allow_all, obj_or_import_string
 from invenio_records_rest.errors import InvalidDataRESTError, PatchJSONFailureRESTError
 from invenio_rest.decorators import require_content_types
 from invenio_mail import InvenioMail
@@ -57,6 +59,7 @@ from flask_mail import Message
 from invenio_mail.tasks import send_email
 from invenio_rest import ContentNegotiatedMethodView
 from invenio_accounts.models import User
+from invenio_access.permissions import superuser_access
 
 from b2share.modules.records.providers import RecordUUIDProvider
 from b2share.modules.deposit.serializers import json_v1_response as \
@@ -65,6 +68,9 @@ from b2share.modules.deposit.api import Deposit, copy_data_from_previous
 from b2share.modules.deposit.errors import RecordNotFoundVersioningError, \
     IncorrectRecordVersioningError
 from b2share.modules.records.permissions import DeleteRecordPermission
+from b2share.modules.records.export import export_formats, gzip_lines, \
+    iter_export_lines
+from b2share.modules.access.permissions import StrictDynamicPermission
 from jsonpatch import JsonPatchException, JsonPointerException
 from invenio_pidstore.providers.datacite import DataCiteProvider
 from invenio_records_ui.signals import record_viewed
@@ -107,9 +113,50 @@ def create_blueprint(endpoints):
         """Catch validation errors."""
         return RESTValidationError().get_response()
 
+    blueprint.add_url_rule('/records/export', 'b2share_records_export',
+                           export_records)
+
     return blueprint
 
 
+def export_records():
+    """Stream all the published records as newline delimited JSON.
+
+    Only administrators can export records. The query arguments are:
+
+    * ``format``: "json" (default) or an OAI-PMH metadata format.
+    * ``community``: id of the exported records' community.
+    * ``created_from``, ``created_until``: creation time range.
+    * ``updated_since``: minimum modification time.
+    * ``gzip``: if set, the response is gzip compressed.
+    """
+    if not StrictDynamicPermission(superuser_access).can():
+        from flask_login import current_user
+        if not current_user.is_authenticated:
+            abort(401)
+        abort(403)
+    export_format = request.args.get('format', 'json')
+    if export_format not in export_formats():
+        abort(400, 'Unknown export format {}.'.format(export_format))
+    filters = {}
+    for arg in ['created_from', 'created_until', 'updated_since']:
+        if request.args.get(arg):
+            try:
+                filters[arg] = dateutil_parse(request.args[arg])
+            except (ValueError, OverflowError):
+                abort(400, 'Invalid date {}.'.format(arg))
+    lines = iter_export_lines(export_format,
+                              community=request.args.get('community'),
+                              **filters)
+    headers = {'Content-Disposition': 'attachment; filename=records.jsonl'}
+    if request.args.get('gzip'):
+        headers['Content-Disposition'] += '.gz'
+        return Response(stream_with_context(gzip_lines(lines)),
+                        mimetype='application/gzip', headers=headers)
+    return Response(stream_with_context(lines),
+                    mimetype='application/x-ndjson', headers=headers)
+
+
 def create_url_rules(endpoint, list_route=None, item_route=None,
                      pid_type=None, pid_minter=None, pid_fetcher=None,
                      read_permission_factory_imp=None,
@@ -370,37 +417,85 @@ class B2ShareRecordsListResource(RecordsListResource):
         return response
 
 
+def _add_linkset_header(pid_value):
+    """Add the linkset "Link" header to the current request's response."""
+    @after_this_request
+    def add_header(response):
+        try:
+            linkset_url = url_for('b2share_linkset.linkset',
+                        record_id=pid_value, _external=True)
+            response.headers['Link'] = '<{linkset_url}> ; rel="linkset" ; type="application/linkset+json"'.format(linkset_url=linkset_url)
+        except:
+            pass
+        return response
+
+
+def get_record_revision(pid_type, pid_value):
+    """Read the revision of a record without loading its metadata.
+
+    :param pid_type: type of the record's persistent identifier.
+    :param pid_value: value of the record's persistent identifier.
+    :returns: a (revision_id, updated) tuple or None if the persistent
+        identifier is not registered or the record is deleted.
+    """
+    row = db.session.query(
+        RecordMetadata.version_id, RecordMetadata.updated
+    ).join(
+        PersistentIdentifier,
+        PersistentIdentifier.object_uuid == RecordMetadata.id
+    ).filter(
+        PersistentIdentifier.pid_type == pid_type,
+        PersistentIdentifier.pid_value == pid_value,
+        PersistentIdentifier.object_type == 'rec',
+        PersistentIdentifier.status == PIDStatus.REGISTERED,
+        RecordMetadata.json.isnot(None),
+    ).one_or_none()
+    if row is None:
+        return None
+    # same as invenio_records.api.RecordBase.revision_id
+    return row.version_id - 1, row.updated
+
+
 class B2ShareRecordResource(RecordResource):
     """B2Share resource for records."""
 
-    @pass_record
-    @need_record_permission('read_permission_factory')
-    def get(self, pid, record, **kwargs):
+    def get(self, pid_value, **kwargs):
         """Get a record.
 
         Procedure description:
 
+        #. Conditional requests are answered from the record's revision,
+           without loading the record, if the record is readable by anyone.
+
         #. The record is resolved reading the pid value from the url.
 
         #. The ETag and If-Modifed-Since is checked.
 
         #. The HTTP response is built with the help of the link factory.
 
-        :param pid: Persistent identifier for record.
-        :param record: Record object.
+        :param pid_value: Lazy persistent identifier value of the record.
         :returns: The requested record.
         """
+        _add_linkset_header(pid_value.value)
+        if (request.if_none_match or request.if_modified_since) and \
+                self.read_permission_factory is allow_all:
+            revision = get_record_revision(pid_value.resolver.pid_type,
+                                           pid_value.value)
+            if revision is not None:
+                etag = str(revision[0])
+                self.check_etag(etag)
+                self.check_if_modified_since(revision[1], etag=etag)
+        return self._get(pid_value, **kwargs)
 
-        @after_this_request
-        def add_header(response):
-            try:
-                linkset_url = url_for('b2share_linkset.linkset',
-                            record_id=pid.pid_value, _external=True)
-                response.headers['Link'] = '<{linkset_url}> ; rel="linkset" ; type="application/linkset+json"'.format(linkset_url=linkset_url)
-            except:
-                pass
-            return response
+    @pass_record
+    @need_record_permission('read_permission_factory')
+    def _get(self, pid, record, **kwargs):
+        """Get a record once it is resolved and its permissions checked.
 
+        :param pid: Persistent identifier for record.
+        :param record: Record object.
+        :returns: The requested record.
+        """
         etag = str(record.revision_id)
         self.check_etag(str(record.revision_id))
         self.check_if_modified_since(record.updated, etag=etag)
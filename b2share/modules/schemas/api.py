@@ -35,6 +35,8 @@ from sqlalchemy.orm.exc import NoResultFound
 from b2share.modules.communities import Community
 from b2share.modules.communities.helpers import get_community_by_name_or_id
 from b2share.modules.schemas.helpers import validate_json_schema
+from b2share.modules.schemas.validators import \
+    invalidate_community_schema_validators
 
 from jsonpatch import apply_patch
 from .errors import BlockSchemaDoesNotExistError, BlockSchemaIsDeprecated, \
@@ -181,7 +183,9 @@ class RootSchema(Schema):
                 version=version)
             root_schema = cls(model)
             db.session.merge(model)
-            return root_schema
+        # every community schema is built from a root schema
+        invalidate_community_schema_validators()
+        return root_schema
 
     @classmethod
     def get_root_schema(cls, version):
@@ -708,6 +712,7 @@ class CommunitySchema(object):
                                             separators=(',', ':')),
                 version=new_version)
             db.session.add(model)
+        invalidate_community_schema_validators(community_id)
         return cls(model)
 
     def build_json_schema(self):
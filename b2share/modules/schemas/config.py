@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of EUDAT B2Share.
+# Copyright (C) 2016 CERN.
+#
+# B2Share is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of the
+# License, or (at your option) any later version.
+#
+# B2Share is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with B2Share; if not, write to the Free Software Foundation, Inc.,
+# 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+#
+# In applying this license, CERN does not
+# waive the privileges and immunities granted to it by virtue of its status
+# as an Intergovernmental Organization or submit itself to any jurisdiction.
+
+"""B2Share Schemas module configuration."""
+
+from __future__ import absolute_import, print_function
+
+B2SHARE_SCHEMAS_RESOLVER_CACHE_SIZE = 1000
+"""Maximum number of resolved JSON Schemas kept in memory by each process."""
+
+B2SHARE_SCHEMAS_RESOLVER_TTL = 24 * 3600
+"""Seconds during which a resolved remote JSON Schema is considered fresh.
+
+A "max-age" sent by the remote server takes precedence.
+"""
+
+B2SHARE_SCHEMAS_RESOLVER_STALE_TTL = 24 * 3600
+"""Seconds during which an expired JSON Schema is kept in the shared cache.
+
+The expired schema is revalidated with its ETag instead of being downloaded
+again.
+"""
+
+B2SHARE_SCHEMAS_RESOLVER_TIMEOUT = 10
+"""Timeout in seconds of remote JSON Schema requests."""
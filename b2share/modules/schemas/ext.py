@@ -25,6 +25,25 @@ from __future__ import absolute_import, print_function
 from .cli import schemas as schemas_cmd
 from .views import blueprint
 from .errors import register_error_handlers
+from .resolver import JSONSchemaResolver
+from .validators import CommunitySchemaValidatorCache
+from . import config
+
+
+class _B2ShareSchemasState(object):
+    """B2Share schemas extension state."""
+
+    def __init__(self, app):
+        """Constructor.
+
+        Args:
+            app: the Flask application.
+        """
+        self.app = app
+        self.validators = CommunitySchemaValidatorCache()
+        """Cache of compiled community schema validators."""
+        self.resolver = JSONSchemaResolver(app)
+        """Cached JSON Schema resolver."""
 
 
 class B2ShareSchemas(object):
@@ -40,9 +59,11 @@ class B2ShareSchemas(object):
         self.init_config(app)
         app.register_blueprint(blueprint)
         app.cli.add_command(schemas_cmd)
-        app.extensions['b2share-schemas'] = self
+        app.extensions['b2share-schemas'] = _B2ShareSchemasState(app)
         register_error_handlers(app)
 
     def init_config(self, app):
         """Initialize configuration."""
-        pass
+        for k in dir(config):
+            if k.startswith('B2SHARE_SCHEMAS_'):
+                app.config.setdefault(k, getattr(config, k))
@@ -22,13 +22,10 @@
 import json
 import re
 import os
-from functools import lru_cache
 from urllib.error import URLError
-from urllib.request import urlopen, Request
 
 from invenio_db import db
 from jsonschema import validate
-import chardet
 import jsonschema
 from flask import current_app
 from doschema.validation import JSONSchemaValidator
@@ -37,20 +34,12 @@ from .errors import InvalidJSONSchemaError, RootSchemaDoesNotExistError, \
     RootSchemaAlreadyExistsError, MissingRequiredFieldSchemaError, MissingPresentationFieldSchemaError
 
 
-@lru_cache(maxsize=1000)
 def resolve_json(url):
-    """Load the given URL as a JSON."""
-    req = Request(
-            url=url,
-            headers={'User-Agent': current_app.config.get('DEFAULT_USER_AGENT','Mozilla/5.0')}
-    )
-    resource = urlopen(req)
-    encoding = resource.headers.get_content_charset()
-    schema_bytes = resource.read()
-    if encoding is None:
-        encoding = chardet.detect(schema_bytes)['encoding']
-    json_schema = json.loads(schema_bytes.decode(encoding))
-    return json_schema
+    """Load the given URL as a JSON.
+
+    See :py:class:`b2share.modules.schemas.resolver.JSONSchemaResolver`.
+    """
+    return current_app.extensions['b2share-schemas'].resolver.resolve(url)
 
 
 def validate_json_schema(new_json_schema, prev_schemas, options={}):
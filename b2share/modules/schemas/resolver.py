@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of EUDAT B2Share.
+# Copyright (C) 2016 CERN.
+#
+# B2Share is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of the
+# License, or (at your option) any later version.
+#
+# B2Share is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with B2Share; if not, write to the Free Software Foundation, Inc.,
+# 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+#
+# In applying this license, CERN does not
+# waive the privileges and immunities granted to it by virtue of its status
+# as an Intergovernmental Organization or submit itself to any jurisdiction.
+
+"""Resolution of JSON Schema URLs.
+
+JSON Schemas are resolved in this order:
+
+* from the process memory.
+* from B2Share's database if the URL is one of this B2Share instance's
+  schemas. This is done with the Invenio-Records JSON resolver, see
+  :py:mod:`b2share.modules.schemas.jsonresolver`, thus without any HTTP
+  request.
+* from the shared cache, see :py:mod:`b2share.cache`.
+* by requesting the URL. Expired entries are revalidated with their ETag.
+"""
+
+from __future__ import absolute_import
+
+import json
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from urllib.error import HTTPError
+from urllib.parse import urldefrag, urlsplit
+from urllib.request import Request, urlopen
+
+import chardet
+from flask import current_app
+from werkzeug.exceptions import NotFound
+
+from b2share.cache import SharedCache
+
+_max_age_regex = re.compile(r'max-age=(\d+)')
+
+
+class JSONSchemaResolver(object):
+    """Cached JSON Schema resolver."""
+
+    def __init__(self, app):
+        """Constructor.
+
+        Args:
+            app: the Flask application.
+        """
+        self.app = app
+        self.shared = SharedCache('schemas')
+        self.stats = Counter()
+        """Number of resolutions per tier: "memory_hits", "local_hits",
+        "shared_hits", "revalidated" and "misses"."""
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _memory_get(self, url):
+        with self._lock:
+            entry = self._memory.get(url)
+            if entry is not None:
+                self._memory.move_to_end(url)
+            return entry
+
+    def _memory_set(self, url, entry):
+        with self._lock:
+            self._memory[url] = entry
+            self._memory.move_to_end(url)
+            while len(self._memory) > \
+                    self.app.config['B2SHARE_SCHEMAS_RESOLVER_CACHE_SIZE']:
+                self._memory.popitem(last=False)
+
+    def clear(self):
+        """Remove all the schemas stored in memory."""
+        with self._lock:
+            self._memory.clear()
+
+    def is_local(self, url):
+        """Check if a URL is one of this B2Share instance's schemas."""
+        return urlsplit(url).netloc == self.app.config.get('JSONSCHEMAS_HOST')
+
+    def resolve(self, url):
+        """Load the given URL as a JSON.
+
+        Args:
+            url (str): URL of the JSON Schema. The fragment is ignored.
+
+        Returns:
+            dict: the loaded JSON.
+        """
+        url = urldefrag(url)[0]
+        entry = self._memory_get(url)
+        if entry is not None and entry['expires'] > time.time():
+            self.stats['memory_hits'] += 1
+            return entry['json']
+
+        if self.is_local(url):
+            try:
+                json_schema = current_app.extensions['invenio-records'] \
+                    .resolver.resolve(url)
+            except NotFound:
+                pass
+            else:
+                self.stats['local_hits'] += 1
+                self._memory_set(url, {
+                    'json': json_schema,
+                    'etag': None,
+                    'expires': time.time() +
+                    self.app.config['B2SHARE_SCHEMAS_RESOLVER_TTL'],
+                })
+                return json_schema
+
+        shared_entry = self.shared.get(url)
+        if shared_entry is not None:
+            if shared_entry['expires'] > time.time():
+                self.stats['shared_hits'] += 1
+                self._memory_set(url, shared_entry)
+                return shared_entry['json']
+            # keep the expired entry for its ETag
+            entry = shared_entry
+
+        entry = self._fetch(url, entry)
+        self._memory_set(url, entry)
+        # keep the entry after it expires so that it can be revalidated
+        fresh = max(int(entry['expires'] - time.time()), 0)
+        self.shared.set(url, entry, timeout=fresh + 1 + self.app.config[
+            'B2SHARE_SCHEMAS_RESOLVER_STALE_TTL'])
+        return entry['json']
+
+    def _fetch(self, url, previous=None):
+        """Request a JSON Schema, revalidating the previous entry if any."""
+        headers = {
+            'User-Agent': current_app.config.get('DEFAULT_USER_AGENT',
+                                                 'Mozilla/5.0'),
+        }
+        if previous is not None and previous.get('etag'):
+            headers['If-None-Match'] = previous['etag']
+        req = Request(url=url, headers=headers)
+        try:
+            resource = urlopen(
+                req,
+                timeout=self.app.config['B2SHARE_SCHEMAS_RESOLVER_TIMEOUT'])
+        except HTTPError as e:
+            if e.code != 304 or previous is None:
+                raise
+            self.stats['revalidated'] += 1
+            return dict(previous, expires=self._expires(e.headers))
+        self.stats['misses'] += 1
+        encoding = resource.headers.get_content_charset()
+        schema_bytes = resource.read()
+        if encoding is None:
+            encoding = chardet.detect(schema_bytes)['encoding']
+        return {
+            'json': json.loads(schema_bytes.decode(encoding)),
+            'etag': resource.headers.get('ETag'),
+            'expires': self._expires(resource.headers),
+        }
+
+    def _expires(self, headers):
+        """Compute the expiration time of a response."""
+        ttl = self.app.config['B2SHARE_SCHEMAS_RESOLVER_TTL']
+        match = _max_age_regex.search(headers.get('Cache-Control') or '')
+        if match is not None:
+            ttl = int(match.group(1))
+        return time.time() + ttl
@@ -0,0 +1,326 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of EUDAT B2Share.
+# Copyright (C) 2016 CERN.
+#
+# B2Share is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of the
+# License, or (at your option) any later version.
+#
+# B2Share is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with B2Share; if not, write to the Free Software Foundation, Inc.,
+# 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+#
+# In applying this license, CERN does not
+# waive the privileges and immunities granted to it by virtue of its status
+# as an Intergovernmental Organization or submit itself to any jurisdiction.
+
+"""Cache of compiled community schema validators.
+
+A released community schema version never changes. Building its JSON Schema,
+resolving its ``$ref`` and creating the corresponding validator classes is
+thus done only once per process and reused by every record validation.
+"""
+
+from __future__ import absolute_import
+
+import copy
+import re
+import threading
+from urllib.parse import urldefrag, urljoin
+
+import jsonschema
+from flask import current_app
+from invenio_db import db
+from jsonschema.validators import validator_for
+from sqlalchemy import func
+
+from .errors import CommunitySchemaDoesNotExistError
+
+
+_schema_url_regex = re.compile(
+    r'/communities/(?P<community_id>[^/]+)/schemas/(?P<version>\d+)/?$'
+)
+
+
+def parse_community_schema_url(url):
+    """Extract the community id and schema version from a "$schema" URL.
+
+    Args:
+        url (str): a community schema URL, with or without JSON pointer.
+
+    Returns:
+        tuple: (community_id, version) or (None, None) if the URL is not a
+            community schema URL.
+    """
+    if not url:
+        return None, None
+    match = _schema_url_regex.search(urldefrag(url)[0])
+    if match is None:
+        return None, None
+    return match.group('community_id'), int(match.group('version'))
+
+
+def _iter_remote_refs(document, base_url):
+    """Yield the absolute URL of every remote "$ref" in a JSON document."""
+    if isinstance(document, dict):
+        for key, value in document.items():
+            if key == '$ref' and isinstance(value, str):
+                if not value.startswith('#'):
+                    yield urldefrag(urljoin(base_url, value))[0]
+            else:
+                yield from _iter_remote_refs(value, base_url)
+    elif isinstance(document, list):
+        for item in document:
+            yield from _iter_remote_refs(item, base_url)
+
+
+# Keywords of an object schema which constrain each property independently of
+# the other properties.
+_independent_keywords = {
+    '$schema', 'id', 'title', 'description', 'type', 'definitions',
+    'properties', 'patternProperties', 'additionalProperties', 'required',
+    'b2share',
+}
+
+
+def _validates_properties_independently(schema):
+    """Check if an object schema validates each property on its own.
+
+    In this case the draft validation of a document containing only some of
+    the properties is the same as the draft validation of these properties in
+    the full document, as "required" is ignored for drafts.
+    """
+    if not isinstance(schema, dict):
+        return False
+    subschemas = schema['allOf'] if set(schema) == {'allOf'} else [schema]
+    return all(isinstance(subschema, dict) and
+               set(subschema) <= _independent_keywords
+               for subschema in subschemas)
+
+
+def _pointer_tokens(pointer):
+    """Split a JSON pointer in unescaped tokens. None for the root."""
+    if not pointer or not pointer.startswith('/'):
+        return None
+    return [token.replace('~1', '/').replace('~0', '~')
+            for token in pointer.split('/')[1:]]
+
+
+class CompiledCommunitySchema(object):
+    """Validators of one community schema version."""
+
+    def __init__(self, community_id, version, json_schema):
+        """Constructor.
+
+        Args:
+            community_id (str): id of the community.
+            version (int): version of the community schema.
+            json_schema (dict): JSON Schema built from the community schema.
+        """
+        self.community_id = community_id
+        self.version = version
+        self.json_schema = json_schema
+        self.store = {}
+        """Documents of the resolved "$ref", keyed by URL."""
+        self._lock = threading.Lock()
+
+        self.validator = validator_for(json_schema)
+        if 'required' not in self.validator.VALIDATORS:
+            raise NotImplementedError('B2Share does not support schemas '
+                                      'which have no "required" keyword.')
+        self.draft_validator = type(
+            'DraftDepositValidator',
+            (self.validator,),
+            dict(VALIDATORS=copy.deepcopy(self.validator.VALIDATORS))
+        )
+        # function ignoring the validation of the given keyword
+        ignore = lambda *args, **kwargs: None
+        self.draft_validator.VALIDATORS['required'] = ignore
+        self.draft_validator.VALIDATORS['minItems'] = ignore
+
+        self.partial_fields = _validates_properties_independently(json_schema)
+        """True if drafts can be validated field by field."""
+        try:
+            community_specific = json_schema['allOf'][1]['properties'][
+                'community_specific']
+        except (KeyError, IndexError, TypeError):
+            community_specific = None
+        self.partial_blocks = self.partial_fields and \
+            _validates_properties_independently(community_specific)
+        """True if "community_specific" can be validated block by block."""
+
+    def _resolve_refs(self, schema_url):
+        """Resolve once every document referenced from the given schema."""
+        base_url = urldefrag(schema_url)[0]
+        if base_url in self.store:
+            return
+        resolver = current_app.extensions['b2share-schemas'].resolver
+        store = {}
+        pending = [base_url]
+        while pending:
+            url = pending.pop()
+            if url in store or url in self.store:
+                continue
+            store[url] = resolver.resolve(url)
+            pending.extend(_iter_remote_refs(store[url], url))
+        with self._lock:
+            self.store.update(store)
+
+    def validate(self, data, schema_url, draft=False, **kwargs):
+        """Validate data against a schema of this community schema version.
+
+        This does the same as
+        :py:meth:`invenio_records.api.Record.validate` except that the
+        "$ref" are resolved from the cache.
+
+        Args:
+            data (dict): the record metadata.
+            schema_url (str): URL of the JSON Schema, i.e. the record's
+                "$schema".
+            draft (bool): if True the "required" and "minItems" keywords
+                are ignored.
+            **kwargs: additional arguments given to
+                :py:func:`jsonschema.validate`.
+        """
+        self._resolve_refs(schema_url)
+        kwargs.pop('validator', None)
+        kwargs['cls'] = self.draft_validator if draft else self.validator
+        schema = {'$ref': schema_url}
+        resolver = current_app.extensions['invenio-records'] \
+            .ref_resolver_cls.from_schema(schema, store=self.store)
+        return jsonschema.validate(
+            data, schema, resolver=resolver,
+            types=current_app.config.get('RECORDS_VALIDATION_TYPES', {}),
+            **kwargs)
+
+    def partial_document(self, data, pointers):
+        """Extract the parts of a document containing the given pointers.
+
+        The parts are the top level fields, or the blocks of
+        "community_specific", containing the pointers.
+
+        Args:
+            data (dict): the record metadata.
+            pointers (list): JSON pointers, e.g. of a JSON patch.
+
+        Returns:
+            dict: document sharing its values with data, or None if the
+                schema requires validating the whole document.
+        """
+        if not self.partial_fields:
+            return None
+        tokens_list = [_pointer_tokens(pointer) for pointer in pointers]
+        if any(tokens is None for tokens in tokens_list):
+            return None
+        partial = {}
+        blocks = {}
+        for tokens in tokens_list:
+            field = tokens[0]
+            if field not in data:
+                continue
+            if (field == 'community_specific' and len(tokens) > 1 and
+                    self.partial_blocks and isinstance(data[field], dict)):
+                if tokens[1] in data[field]:
+                    blocks[tokens[1]] = data[field][tokens[1]]
+            else:
+                partial[field] = data[field]
+        if blocks and 'community_specific' not in partial:
+            partial['community_specific'] = blocks
+        return partial
+
+    def validate_draft_paths(self, data, schema_url, pointers, **kwargs):
+        """Validate only the parts of a draft containing the given pointers.
+
+        See :py:meth:`partial_document`. The whole draft is validated if
+        the schema does not allow a partial validation.
+        """
+        partial = self.partial_document(data, pointers)
+        return self.validate(data if partial is None else partial,
+                             schema_url, draft=True, **kwargs)
+
+
+class CommunitySchemaValidatorCache(object):
+    """Process wide cache of :class:`CompiledCommunitySchema`.
+
+    Entries are keyed by (community id, schema version).
+    """
+
+    def __init__(self):
+        """Constructor."""
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, community_id, version=None):
+        """Retrieve the validators of a community schema version.
+
+        Args:
+            community_id (ID): community id.
+            version (int): version of the schema. If None, the last version
+                is used.
+
+        Returns:
+            :class:`CompiledCommunitySchema`: the compiled schema.
+
+        Raises:
+            :class:`b2share.modules.schemas.errors.CommunitySchemaDoesNotExistError`:
+                the requested community schema does not exist.
+        """  # noqa
+        from .api import CommunitySchema
+        from .models import CommunitySchemaVersion
+        community_id = str(community_id)
+        if version is None:
+            # only the version number is queried, this is cheap.
+            version = db.session.query(
+                func.max(CommunitySchemaVersion.version)
+            ).filter(
+                CommunitySchemaVersion.community == community_id
+            ).scalar()
+            if version is None:
+                raise CommunitySchemaDoesNotExistError(community_id)
+        key = (community_id, version)
+        compiled = self._entries.get(key)
+        if compiled is None:
+            community_schema = CommunitySchema.get_community_schema(
+                community_id, version)
+            compiled = CompiledCommunitySchema(
+                community_id, version, community_schema.build_json_schema())
+            with self._lock:
+                compiled = self._entries.setdefault(key, compiled)
+        return compiled
+
+    def invalidate(self, community_id=None):
+        """Remove cached entries.
+
+        Args:
+            community_id (ID): community whose entries are removed. If None
+                every entry is removed.
+        """
+        with self._lock:
+            if community_id is None:
+                self._entries.clear()
+            else:
+                community_id = str(community_id)
+                for key in [key for key in self._entries
+                            if key[0] == community_id]:
+                    del self._entries[key]
+
+
+def invalidate_community_schema_validators(community_id=None):
+    """Invalidate the current application's cached validators.
+
+    Args:
+        community_id (ID): community whose validators are removed. If None
+            every validator and every resolved schema is removed.
+    """
+    state = current_app.extensions.get('b2share-schemas')
+    if state is not None:
+        state.validators.invalidate(community_id)
+        if community_id is None:
+            state.resolver.clear()
@@ -22,7 +22,9 @@
 This module works with invenio-stats. It adds a processor
 which is applied to new events in order to filter out events
 coming from deposits. This way the download statistics are
-calculated only for files of published records."""
+calculated only for files of published records. Another processor adds
+the community of the downloaded file's record to the events so that
+community download statistics are computed with a single query."""
 
 from __future__ import absolute_import, print_function
 
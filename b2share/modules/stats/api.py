@@ -26,10 +26,17 @@
 
 import os, shutil
 
+from elasticsearch.helpers import bulk, scan
+from elasticsearch_dsl import Search
 from flask import current_app
 
 from invenio_files_rest.models import Location
 from invenio_accounts.models import User
+from invenio_records.models import RecordMetadata
+from invenio_records_files.models import RecordsBuckets
+from invenio_search import current_search_client
+
+from .cache import stats_cache
 
 def get_quota():
     total_quota = 0
@@ -52,4 +59,95 @@ def users_list():
     """List all known users"""
     userdata_query = User.query.order_by(User.id)
     userdata={u.id:{"email":u.email} for u in userdata_query}
-    return userdata
\ No newline at end of file
+    return userdata
+
+
+def community_storage_totals():
+    """Compute the storage used by each community.
+
+    The totals are read from the files count and size precomputed when the
+    records are indexed, see :py:func:`b2share.modules.records.indexer.indexer_receiver`,
+    with a single aggregation. They are cached during
+    ``B2SHARE_STATS_CACHE_TIMEOUT`` seconds.
+
+    Returns:
+        dict: community id => dict with the number of "records", "files"
+            and "bytes" of its published records.
+    """  # noqa
+    totals = stats_cache.get('community-storage-totals')
+    if totals is not None:
+        return totals
+    search = Search(using=current_search_client, index='records')[0:0]
+    search.aggs.bucket(
+        'communities', 'terms', field='community', size=0
+    ).metric(
+        'files', 'sum', field='_internal.files_count'
+    ).metric(
+        'bytes', 'sum', field='_internal.files_size'
+    )
+    result = search.execute().to_dict()
+    totals = {
+        bucket['key']: {
+            'records': bucket['doc_count'],
+            'files': int(bucket['files']['value'] or 0),
+            'bytes': int(bucket['bytes']['value'] or 0),
+        } for bucket in result['aggregations']['communities']['buckets']
+    }
+    stats_cache.set('community-storage-totals', totals,
+                    timeout=current_app.config['B2SHARE_STATS_CACHE_TIMEOUT'])
+    return totals
+
+
+def backfill_file_download_communities(chunk_size=500):
+    """Add the community to the file download aggregations missing it.
+
+    File download aggregations created before the events contained the
+    community are updated so that they are counted in the community
+    download statistics.
+
+    Args:
+        chunk_size (int): number of aggregations updated per bulk request.
+
+    Returns:
+        int: the number of updated aggregations.
+    """
+    hits = scan(
+        current_search_client,
+        index='stats-file-download',
+        doc_type='file-download-day-aggregation',
+        query={'query': {'bool': {'must_not': {
+            'exists': {'field': 'community'}}}}},
+        fields=['bucket_id'],
+    )
+    updated = 0
+    chunk = []
+
+    def update_chunk(chunk):
+        bucket_ids = set(hit['fields']['bucket_id'][0] for hit in chunk)
+        communities = dict(
+            (str(bucket_id), json.get('community'))
+            for bucket_id, json in RecordMetadata.query.join(
+                RecordsBuckets, RecordsBuckets.record_id == RecordMetadata.id
+            ).filter(
+                RecordsBuckets.bucket_id.in_(bucket_ids),
+                RecordMetadata.json.isnot(None),
+            ).with_entities(RecordsBuckets.bucket_id, RecordMetadata.json)
+        )
+        actions = [{
+            '_op_type': 'update',
+            '_index': hit['_index'],
+            '_type': hit['_type'],
+            '_id': hit['_id'],
+            'doc': {'community': communities[hit['fields']['bucket_id'][0]]},
+        } for hit in chunk if communities.get(hit['fields']['bucket_id'][0])]
+        return bulk(current_search_client, actions, stats_only=True)[0]
+
+    for hit in hits:
+        if hit.get('fields', {}).get('bucket_id'):
+            chunk.append(hit)
+        if len(chunk) >= chunk_size:
+            updated += update_chunk(chunk)
+            chunk = []
+    if chunk:
+        updated += update_chunk(chunk)
+    return updated
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of EUDAT B2Share.
+# Copyright (C) 2016 CERN.
+#
+# B2Share is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of the
+# License, or (at your option) any later version.
+#
+# B2Share is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with B2Share; if not, write to the Free Software Foundation, Inc.,
+# 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+#
+# In applying this license, CERN does not
+# waive the privileges and immunities granted to it by virtue of its status
+# as an Intergovernmental Organization or submit itself to any jurisdiction.
+
+"""Cache of statistics query results.
+
+Query results are stored in the shared cache, see :py:mod:`b2share.cache`,
+keyed by query name and arguments. Statistics only change when events are
+aggregated, thus every result is tagged with a generation number which is
+incremented after each aggregation.
+
+An outdated result is still returned during
+``B2SHARE_STATS_CACHE_STALE_TIMEOUT`` seconds while a Celery task
+recomputes it.
+"""
+
+from __future__ import absolute_import, print_function
+
+import json
+import time
+
+from flask import current_app
+
+from b2share.cache import SharedCache
+
+stats_cache = SharedCache('stats')
+
+
+def query_cache_key(query_name, kwargs):
+    """Build the cache key of a query result from its normalized arguments.
+    """
+    return '{}:{}'.format(query_name,
+                          json.dumps(kwargs, sort_keys=True, default=str))
+
+
+def get_stats_generation():
+    """Return the current generation of the statistics."""
+    return stats_cache.get('generation') or 0
+
+
+def invalidate_stats_cache():
+    """Mark every cached statistics query result as outdated."""
+    stats_cache.incr('generation')
+
+
+def cache_query_result(query_name, kwargs, result):
+    """Store a query result for the current statistics generation."""
+    stats_cache.set(query_cache_key(query_name, kwargs), {
+        'result': result,
+        'generation': get_stats_generation(),
+        'created': time.time(),
+    }, timeout=current_app.config['B2SHARE_STATS_CACHE_STALE_TIMEOUT'])
+
+
+class CachedQueryMixin(object):
+    """Cache the results of an invenio-stats query class."""
+
+    def run_uncached(self, *args, **kwargs):
+        """Run the query without using the cache."""
+        return super(CachedQueryMixin, self).run(*args, **kwargs)
+
+    def run(self, *args, **kwargs):
+        """Run the query or return its cached result."""
+        if args:
+            # only keyword arguments are used by the stats REST API
+            return self.run_uncached(*args, **kwargs)
+        key = query_cache_key(self.query_name, kwargs)
+        entry = stats_cache.get(key)
+        if entry is not None:
+            age = time.time() - entry['created']
+            if entry['generation'] == get_stats_generation() and \
+                    age < current_app.config['B2SHARE_STATS_CACHE_TIMEOUT']:
+                return entry['result']
+            # refresh the outdated result only once
+            if stats_cache.add('refresh:{}'.format(key), True, timeout=60):
+                from .tasks import refresh_stats_query
+                refresh_stats_query.delay(self.query_name, kwargs)
+            return entry['result']
+        result = self.run_uncached(**kwargs)
+        cache_query_result(self.query_name, kwargs, result)
+        return result
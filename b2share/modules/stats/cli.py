@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of EUDAT B2Share.
+# Copyright (C) 2016 CERN.
+#
+# B2Share is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of the
+# License, or (at your option) any later version.
+#
+# B2Share is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with B2Share; if not, write to the Free Software Foundation, Inc.,
+# 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+#
+# In applying this license, CERN does not
+# waive the privileges and immunities granted to it by virtue of its status
+# as an Intergovernmental Organization or submit itself to any jurisdiction.
+
+"""B2Share cli commands for statistics."""
+
+from __future__ import absolute_import, print_function
+
+import click
+from flask.cli import with_appcontext
+
+from .api import backfill_file_download_communities
+
+
+@click.group()
+def stats():
+    """Statistics commands."""
+
+
+@stats.command('backfill-download-communities')
+@with_appcontext
+@click.option('--chunk-size', default=500, show_default=True,
+              help='number of aggregations updated per bulk request.')
+def backfill_download_communities(chunk_size):
+    """Add the community to file download aggregations missing it."""
+    updated = backfill_file_download_communities(chunk_size=chunk_size)
+    click.secho('Updated {} file download aggregations.'.format(updated),
+                fg='green')
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of EUDAT B2Share.
+# Copyright (C) 2016 CERN.
+#
+# B2Share is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of the
+# License, or (at your option) any later version.
+#
+# B2Share is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with B2Share; if not, write to the Free Software Foundation, Inc.,
+# 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+#
+# In applying this license, CERN does not
+# waive the privileges and immunities granted to it by virtue of its status
+# as an Intergovernmental Organization or submit itself to any jurisdiction.
+
+"""B2Share Statistics module configuration."""
+
+from __future__ import absolute_import, print_function
+
+B2SHARE_STATS_CACHE_TIMEOUT = 15 * 60
+"""Seconds during which a cached statistics query result is fresh.
+
+Results are also refreshed when new events are aggregated.
+"""
+
+B2SHARE_STATS_CACHE_STALE_TIMEOUT = 24 * 3600
+"""Seconds during which an outdated result is still returned while it is
+recomputed in the background."""
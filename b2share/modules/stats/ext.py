@@ -22,7 +22,9 @@
 
 from __future__ import absolute_import, print_function
 
+from .cli import stats as stats_cmd
 from .views import blueprint
+from . import config
 
 
 class _B2ShareStatistics(object):
@@ -48,8 +50,12 @@ class B2ShareStatistics(object):
     def init_app(self, app):
         """Flask application initialization."""
         self.init_config(app)
+        app.cli.add_command(stats_cmd)
         app.extensions['b2share-statistics'] =_B2ShareStatistics(app)
         app.register_blueprint(blueprint)
 
     def init_config(self, app):
-        pass
+        """Initialize configuration."""
+        for k in dir(config):
+            if k.startswith('B2SHARE_STATS_'):
+                app.config.setdefault(k, getattr(config, k))
@@ -19,15 +19,24 @@
 
 """Statistics event preprocessors."""
 
-from invenio_records_files.models import RecordsBuckets
-from invenio_records.models import RecordMetadata
-from b2share.modules.records.utils import is_deposit
+from b2share.modules.files.proxies import current_bucket_records
 
 
 def skip_deposit(doc):
     """Check if event is coming from deposit file and skip."""
-    rb = RecordsBuckets.query.filter_by(bucket_id=doc['bucket_id']).first()
-    record = RecordMetadata.query.filter_by(id=rb.record_id).first()
-    if is_deposit(record):
+    bucket_record = current_bucket_records.get(doc['bucket_id'])
+    if bucket_record is not None and bucket_record['type'] == 'deposit':
         return None
     return doc
+
+
+def add_community(doc):
+    """Add the community of the downloaded file's record to the event.
+
+    The community is copied in the file download aggregations so that
+    community download statistics are computed with a single query.
+    """
+    bucket_record = current_bucket_records.get(doc['bucket_id'])
+    if bucket_record is not None:
+        doc['community'] = bucket_record['community']
+    return doc
@@ -25,13 +25,15 @@ from invenio_stats.errors import InvalidRequestInputError
 from invenio_search import current_search_client
 import six
 
+from .cache import CachedQueryMixin
+
 """Statistics queries."""
 
 def register_queries():
    return [
        dict(
            query_name='record-views-total',
-           query_class=ESTermsQuery,
+           query_class=CachedESTermsQuery,
            query_config=dict(
                index='stats-record-view',
                doc_type='record-view-day-aggregation',
@@ -51,7 +53,7 @@ def register_queries():
        ),
        dict(
            query_name='community-record-views-total',
-           query_class=ESDualQuery,
+           query_class=CachedESDualQuery,
            query_config=dict(
                index_2='stats-record-view',
                #doc_type='record-view-day-aggregation',
@@ -72,9 +74,8 @@ def register_queries():
        ),
         dict(
             query_name='community-file-download-total',
-            query_class=ESDualQuery,
+            query_class=CachedESDualQuery,
             query_config=dict(
-                index_1='records',
                 index_2='stats-file-download',
                 doc_type='file-download-day-aggregation',
                 copy_fields=dict(
@@ -83,6 +84,11 @@ def register_queries():
                 metric_fields=dict(
                     total=('sum', 'count', 'field', {}),
                 ),
+                # the community is copied in the aggregations, see
+                # b2share.modules.stats.processors.add_community
+                required_filters=dict(
+                    community='community'
+                ),
                 required_filters_1=dict(
                     community='community'
                 ),
@@ -91,7 +97,7 @@ def register_queries():
         ),
         dict(
            query_name='community-file-size-total',
-           query_class=ESDualQuery,
+           query_class=CachedESDualQuery,
            query_config=dict(
                #index_1='records-records',
                index_2='records',
@@ -100,7 +106,7 @@ def register_queries():
                    #community='community'
                ),
                metric_fields=dict(
-                   total=('sum', '_files.size', 'field', {}),
+                   total=('sum', '_internal.files_size', 'field', {}),
                ),
                required_filters=dict(
                    community='community'
@@ -113,7 +119,7 @@ def register_queries():
        ),
         dict(
            query_name='community-file-amount-total',
-           query_class=ESDualQuery,
+           query_class=CachedESDualQuery,
            query_config=dict(
                #index_1='records-records',
                index_2='records',
@@ -122,7 +128,7 @@ def register_queries():
                    #length='length'
                ),
                metric_fields=dict(
-                   total=('sum', 'return _source._files.size()', 'script', {}),
+                   total=('sum', '_internal.files_count', 'field', {}),
                ),
                required_filters=dict(
                    community='community'
@@ -309,9 +315,17 @@ class ESDualQuery(ESQuery):
                     break
                 hits = loop_res.get('hits', {}).get('hits', [])
                 loop_buckets = [hit.get('fields', {}).get('_files.bucket', [])[0] for hit in hits if hit.get('fields', None)]
-                buckets = [*buckets, *loop_buckets]
+                buckets.extend(loop_buckets)
 
         agg_query = self.build_query(start_date, end_date, buckets, **kwargs)
         query_result = agg_query.execute().to_dict()
         res = self.process_query_result(query_result, start_date, end_date, community=kwargs['community'])
         return res
+
+
+class CachedESTermsQuery(CachedQueryMixin, ESTermsQuery):
+    """Elasticsearch terms query whose results are cached."""
+
+
+class CachedESDualQuery(CachedQueryMixin, ESDualQuery):
+    """Elasticsearch dual query whose results are cached."""
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of EUDAT B2Share.
+# Copyright (C) 2016 CERN.
+#
+# B2Share is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of the
+# License, or (at your option) any later version.
+#
+# B2Share is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with B2Share; if not, write to the Free Software Foundation, Inc.,
+# 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+#
+# In applying this license, CERN does not
+# waive the privileges and immunities granted to it by virtue of its status
+# as an Intergovernmental Organization or submit itself to any jurisdiction.
+
+"""Statistics Celery tasks."""
+
+from __future__ import absolute_import, print_function
+
+from celery import shared_task
+from invenio_stats.proxies import current_stats
+from invenio_stats.tasks import aggregate_events as invenio_aggregate_events
+
+from .cache import cache_query_result, invalidate_stats_cache, \
+    query_cache_key, stats_cache
+
+
+@shared_task(ignore_result=True)
+def aggregate_events(aggregations, *args, **kwargs):
+    """Aggregate the events and mark the cached query results as outdated.
+
+    Takes the same arguments as
+    :py:func:`invenio_stats.tasks.aggregate_events`.
+    """
+    invenio_aggregate_events(aggregations, *args, **kwargs)
+    invalidate_stats_cache()
+
+
+@shared_task(ignore_result=True)
+def refresh_stats_query(query_name, kwargs):
+    """Recompute the cached result of a statistics query.
+
+    Args:
+        query_name (str): name of the query, as configured in
+            ``STATS_QUERIES``.
+        kwargs (dict): arguments of the query.
+    """
+    try:
+        # the query is configured the same way as in the statistics views.
+        query_cfg = current_stats.queries.get(query_name)
+        if query_cfg is not None:
+            query = query_cfg.query_class(**query_cfg.query_config)
+            cache_query_result(query_name, kwargs,
+                               query.run_uncached(**kwargs))
+    finally:
+        stats_cache.delete(
+            'refresh:{}'.format(query_cache_key(query_name, kwargs)))
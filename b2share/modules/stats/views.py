@@ -34,7 +34,7 @@ from b2share.modules.access.permissions import admin_only
 from invenio_access.permissions import superuser_access
 from b2share.modules.access.permissions import StrictDynamicPermission
 
-from .api import get_quota, users_list
+from .api import community_storage_totals, get_quota, users_list
 
 
 blueprint = Blueprint('b2share_statistics', __name__)
@@ -42,7 +42,8 @@ blueprint = Blueprint('b2share_statistics', __name__)
 def switch_queries(value):
     actions = {
         'quota': get_quota,
-        'users': users_list
+        'users': users_list,
+        'storage': community_storage_totals,
         # add more keys and values as needed
     }
     try:
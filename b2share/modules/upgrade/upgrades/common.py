@@ -30,8 +30,8 @@ import click
 from flask import current_app
 from invenio_search import current_search, current_search_client
 from invenio_pidstore.models import PersistentIdentifier, PIDStatus
-from invenio_indexer.api import RecordIndexer
-from invenio_indexer.tasks import process_bulk_queue
+from b2share.modules.records.indexer import B2ShareRecordIndexer
+from b2share.modules.records.tasks import process_bulk_queue
 from invenio_queues.proxies import current_queues
 from celery.messaging import establish_connection
 from b2share.modules.schemas.helpers import load_root_schemas
@@ -77,7 +77,7 @@ def elasticsearch_index_reindex(alembic, verbose):
         ).values(
             PersistentIdentifier.object_uuid
         ))
-    RecordIndexer().bulk_index(query)
+    B2ShareRecordIndexer().bulk_index(query)
     process_bulk_queue.delay()
 
 
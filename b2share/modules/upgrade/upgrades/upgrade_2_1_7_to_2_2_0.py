@@ -41,14 +41,15 @@ def delete_indices(alembic, verbose):
 
 def reindex_records(alembic, verbose):
     """reindex records"""
-    from invenio_indexer.api import RecordIndexer
+    from b2share.modules.records.indexer import B2ShareRecordIndexer
     from invenio_records.models import RecordMetadata
     def records():
         """Record iterator."""
         for record in RecordMetadata.query.values(RecordMetadata.id):
             yield record[0]
-    RecordIndexer().bulk_index(records())
-    RecordIndexer().process_bulk_queue()
+    indexer = B2ShareRecordIndexer()
+    indexer.bulk_index(records())
+    indexer.process_bulk_queue()
 
 
 for step in [schemas_init, delete_indices, elasticsearch_index_init, reindex_records]:
@@ -31,13 +31,13 @@ from urllib.parse import urlunsplit
 from tabulate import tabulate
 
 
-from sqlalchemy import UniqueConstraint, PrimaryKeyConstraint
+from sqlalchemy import UniqueConstraint, PrimaryKeyConstraint, event
 
-from flask import current_app, jsonify, request
+from flask import current_app, g, jsonify, request
 
 from elasticsearch_dsl.query import QueryString
 
-from invenio_search import RecordsSearch, current_search
+from invenio_search import RecordsSearch, current_search_client
 from invenio_accounts.models import User
 from invenio_db import db
 
@@ -86,6 +86,88 @@ def add_to_db(instance, skip_if_exists=False, **fields):
     return instance
 
 
+_TRANSACTION_KEY = 'b2share_transaction'
+
+
+def _is_savepoint(session):
+    return session.transaction.nested or \
+        session.transaction.parent is not None
+
+
+def _run_before_commit_callbacks(session):
+    if _is_savepoint(session):
+        # savepoint release, the transaction is not committed yet
+        return
+    callbacks = session.info.get(_TRANSACTION_KEY, {}).get('before_commit')
+    # callbacks can register other callbacks
+    while callbacks:
+        callbacks.pop(0)()
+
+
+def _mark_committed(session):
+    if _is_savepoint(session):
+        return
+    data = session.info.get(_TRANSACTION_KEY)
+    if data is not None:
+        data['committed'] = True
+
+
+def _end_transaction(session, transaction):
+    if transaction.parent is not None:
+        return
+    data = session.info.pop(_TRANSACTION_KEY, None)
+    if data is None or not data.get('committed'):
+        return
+    for callback in data.get('after_commit', []):
+        try:
+            callback()
+        except Exception:
+            # the transaction is committed, the request has to succeed.
+            current_app.logger.exception(
+                'Failed to run an after commit callback.')
+
+
+def transaction_data():
+    """Return the data attached to the current database transaction.
+
+    The data is discarded once the transaction is committed or rolled back.
+    Savepoints share the data of their transaction.
+
+    :returns: a dict.
+    """
+    session = db.session()
+    if not event.contains(session, 'before_commit',
+                          _run_before_commit_callbacks):
+        event.listen(session, 'before_commit', _run_before_commit_callbacks)
+        event.listen(session, 'after_commit', _mark_committed)
+        event.listen(session, 'after_transaction_end', _end_transaction)
+    return session.info.setdefault(_TRANSACTION_KEY, {})
+
+
+def run_before_commit(callback):
+    """Call a function just before the current database transaction commits.
+
+    Releasing a savepoint does not call the function. The function can still
+    modify the database, an exception aborts the commit.
+
+    :param callback: function called without argument.
+    """
+    transaction_data().setdefault('before_commit', []).append(callback)
+
+
+def run_after_commit(callback):
+    """Call a function once the current database transaction is committed.
+
+    The function is never called if the transaction is rolled back. This is
+    needed to start Celery tasks which read what the transaction wrote.
+    The function is called once the transaction has ended, it can thus read
+    the database but must not commit. Its exceptions are logged.
+
+    :param callback: function called without argument.
+    """
+    transaction_data().setdefault('after_commit', []).append(callback)
+
+
 def is_valid_uuid(val):
     try:
         uuid.UUID(str(val))
@@ -102,6 +184,27 @@ def get_base_url():
     ))
 
 
+def get_user_emails(user_ids):
+    """Retrieve the emails of users with one query.
+
+    The emails are memoized in the current application context, i.e. for
+    the duration of a request or of a CLI command.
+
+    :param user_ids: ids of the users.
+    :returns: a dict user id => email, None for the unknown users.
+    """
+    user_ids = list(user_ids)
+    emails = getattr(g, 'b2share_user_emails', None)
+    if emails is None:
+        emails = g.b2share_user_emails = {}
+    missing = set(user_ids) - set(emails)
+    if missing:
+        emails.update(dict.fromkeys(missing))
+        emails.update(db.session.query(User.id, User.email).filter(
+            User.id.in_(missing)))
+    return {user_id: emails[user_id] for user_id in user_ids}
+
+
 def jsonify_keeporder(json_schema):
     dosort = current_app.config['JSON_SORT_KEYS']
     current_app.config['JSON_SORT_KEYS'] = False
@@ -120,16 +223,13 @@ class ESSearch():
         self.query = ''
         self.raw_results = {}
         self.results = []
-        self.index = ['*']
+        self.index = ['records', 'deposits']
 
     def _reset_(self):
         self.query = ''
         self.raw_results = {}
         self.results = []
-        self.index = ['*']
-        # if we do not flush and refresh we get cached data for the next query
-        search = current_search
-        search.flush_and_refresh("_all")
+        self.index = ['records', 'deposits']
 
 
     def search(self, query, index=None):
@@ -139,9 +239,13 @@ class ESSearch():
         '''
         self._reset_()
         index = index or self.index
+        # if we do not refresh we get cached data for the next query. Only
+        # the searched indices are refreshed and nothing is flushed to disk
+        # as flushing every index would stall the whole cluster.
+        current_search_client.indices.refresh(index=','.join(index))
         # check both deposits and records
         with current_app.app_context():
-            search = RecordsSearch()
+            search = RecordsSearch(index=index)
             # record -> owners , deposit -> _deposit.owners
             search = search.query(QueryString(query=query))
             results = search.execute().to_dict()
@@ -189,16 +293,25 @@ class ESSearch():
         if self.raw_results['total'] > 0:
             INFO = sorted(self.results, key=lambda x: (
                 x['vb2rec'], x['b2rec']))
+            # resolve the emails of every owner at once
+            emails = get_user_emails(
+                {w for i in INFO for w in self._owners(i)})
             for k, v in groupby(INFO, key=lambda x: (x['vb2rec'], x['b2rec'])):
                 for i in list(v):
-                    owners = i.get('_source').get('_deposit').get('owners') if i.get(
-                        '_type') == 'deposit' else i.get('_source').get('owners')
-                    owners_emails = [User.query.filter(
-                        User.id.in_([w])).one_or_none() for w in owners]
+                    owners = self._owners(i)
                     info[i.get('_id')] = {'id': i.get('_id'), 'vb2rec': i.get('vb2rec'), 'b2rec': i.get('b2rec'), 'type': i.get('_type'), 'publication_state': i.get(
-                        'publication_state'), 'owners': "\n".join([str(_) for _ in owners]), "owners_emails": "\n".join([e.email if e is not None else "Unknown user" for e in owners_emails])}
+                        'publication_state'), 'owners': "\n".join([str(_) for _ in owners]), "owners_emails": "\n".join([emails[w] or "Unknown user" for w in owners])}
         return info
 
+    @staticmethod
+    def _owners(hit):
+        '''
+        returns the owners of a deposit/record hit
+        '''
+        if hit.get('_type') == 'deposit':
+            return hit.get('_source').get('_deposit').get('owners')
+        return hit.get('_source').get('owners')
+
     def get_record_info(self):
         '''
         returns main info about deposits/records
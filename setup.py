@@ -40,7 +40,6 @@ install_requires = [
     'dojson>=1.2.1',
     'easywebdav2>=1.3.0',
     'Flask-Login<0.4,>=0.3.2',
-    'httplib2>=0.9.2',
     'invenio-access>=1.0.0a11,<1.1.0',
     'invenio-accounts>=1.0.0b9,<1.1.0',
     'invenio-accounts-rest>=1.0.0a4,<1.1.0',
@@ -67,6 +66,7 @@ install_requires = [
     'invenio-logging>=1.0.0a3',
     'invenio-indexer>=1.0.0a9',
     'jsonresolver[jsonschema]>=0.2.1',
+    'requests>=2.20.0',
 ]
 
 if sys.version_info < (3, 4):
@@ -237,6 +237,7 @@ setup(
         'invenio_celery.tasks': [
             'b2share_records = b2share.modules.records.tasks',
             'b2share_files = b2share.modules.files.tasks',
+            'b2share_stats = b2share.modules.stats.tasks',
         ],
         'invenio_access.actions': [
             'create_deposit_need = '
@@ -43,3 +43,26 @@ def test_b2share_stats_permissions(app, login_user, test_users):
         test_access(403)  # anonymous user
         test_access(403,user) 
         test_access(200,admin) 
+
+
+def test_community_storage_totals(app, test_records):
+    """Test computing the storage used by each community."""
+    from invenio_records.api import Record
+    from invenio_search import current_search_client
+    from b2share.modules.stats.api import community_storage_totals
+    from b2share.modules.stats.cache import stats_cache
+
+    with app.app_context():
+        current_search_client.indices.flush('*')
+        stats_cache.delete('community-storage-totals')
+        totals = community_storage_totals()
+        records = [Record.get_record(rec.record_id) for rec in test_records]
+        for community in set(rec['community'] for rec in records):
+            files = [f for rec in records if rec['community'] == community
+                     for f in rec.get('_files', [])]
+            assert totals[community] == {
+                'records': len([rec for rec in records
+                                if rec['community'] == community]),
+                'files': len(files),
+                'bytes': sum(f['size'] for f in files),
+            }
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of EUDAT B2Share.
+# Copyright (C) 2023 CSC - IT Center for Science Ltd.
+#
+# B2Share is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of the
+# License, or (at your option) any later version.
+#
+# B2Share is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with B2Share; if not, write to the Free Software Foundation, Inc.,
+# 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+
+"""Test B2Share statistics query results cache."""
+
+from b2share.modules.stats.cache import CachedQueryMixin, \
+    invalidate_stats_cache, query_cache_key, stats_cache
+
+
+class CountingQuery(object):
+    """Query counting how many times it is run."""
+
+    query_name = 'test-counting-query'
+
+    def __init__(self):
+        self.calls = 0
+
+    def run(self, **kwargs):
+        self.calls += 1
+        return {'value': self.calls}
+
+
+class CachedCountingQuery(CachedQueryMixin, CountingQuery):
+    """Cached query counting how many times it is run."""
+
+
+def test_stats_query_cache(app):
+    """Test caching statistics query results."""
+    with app.app_context():
+        stats_cache.delete(query_cache_key(CountingQuery.query_name,
+                                           {'community': 'abc'}))
+        query = CachedCountingQuery()
+        assert query.run(community='abc') == {'value': 1}
+        assert query.run(community='abc') == {'value': 1}
+        assert query.calls == 1
+        # other arguments are cached separately
+        assert query.run(community='def') == {'value': 2}
+        # the outdated result is returned while it is refreshed
+        invalidate_stats_cache()
+        assert query.run(community='abc') == {'value': 1}
+        assert query.run_uncached(community='abc') == {'value': 3}
+
+
+def test_refresh_stats_query(app):
+    """Test that refreshed queries use the invenio-stats configuration."""
+    from collections import namedtuple
+    from b2share.modules.stats.tasks import refresh_stats_query
+
+    QueryConfig = namedtuple('QueryConfig', ['query_class', 'query_config'])
+
+    class ConfiguredQuery(CachedQueryMixin, object):
+        def __init__(self, query_name, value):
+            self.query_name = query_name
+            self.value = value
+
+        def run(self, **kwargs):
+            return {'value': self.value}
+
+    with app.app_context():
+        state = app.extensions['invenio-stats']
+        queries = state.__dict__.get('queries')
+        # queries is a cached property of the invenio-stats state
+        state.__dict__['queries'] = {
+            'test-configured-query': QueryConfig(
+                ConfiguredQuery,
+                {'query_name': 'test-configured-query', 'value': 42}),
+        }
+        try:
+            refresh_stats_query('test-configured-query', {'community': 'abc'})
+            cached = stats_cache.get(query_cache_key('test-configured-query',
+                                                     {'community': 'abc'}))
+            assert cached['result'] == {'value': 42}
+        finally:
+            if queries is None:
+                del state.__dict__['queries']
+            else:
+                state.__dict__['queries'] = queries
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of EUDAT B2Share.
+# Copyright (C) 2023 CSC - IT Center for Science Ltd.
+#
+# B2Share is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of the
+# License, or (at your option) any later version.
+#
+# B2Share is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with B2Share; if not, write to the Free Software Foundation, Inc.,
+# 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+
+"""Test B2Share statistics event preprocessors."""
+
+from b2share.modules.stats.processors import add_community, skip_deposit
+from b2share_unit_tests.helpers import create_deposit, create_user
+
+
+def test_file_download_preprocessors(app, test_records_data):
+    """Test the file download events preprocessors."""
+    with app.app_context():
+        creator = create_user('creator')
+        deposit = create_deposit(test_records_data[0], creator)
+        deposit_event = {'bucket_id': str(deposit.files.bucket.id)}
+        assert skip_deposit(dict(deposit_event)) is None
+        deposit.submit()
+        deposit.publish()
+        _, record = deposit.fetch_published()
+        record_event = {'bucket_id': str(record.files.bucket.id)}
+        assert skip_deposit(dict(record_event)) == record_event
+        assert add_community(dict(record_event)) == dict(
+            record_event, community=record['community'])
+
+
+def test_file_download_aggregator_config(app):
+    """Test that the file download aggregator accepts its configuration."""
+    from invenio_stats.proxies import current_stats
+    with app.app_context():
+        aggregation = current_stats.aggregations['file-download-agg']
+        aggregator = aggregation.aggregator_class(
+            **aggregation.aggregator_config)
+        assert aggregator.copy_fields['community'] == 'community'
@@ -197,3 +197,41 @@ def test_delete(app):
         assert deleted_community.deleted
         for field, value in community_metadata.items():
             assert getattr(deleted_community, field) == value
+
+
+def test_community_registry(app):
+    """Test that the community registry follows the committed changes."""
+    from b2share.modules.communities.proxies import current_community_registry
+    with app.app_context():
+        created_community = Community.create_community(**community_metadata)
+        community_id = created_community.id
+        # uncommitted communities are retrieved from the database
+        assert current_community_registry.get(id=community_id).id == \
+            community_id
+        db.session.commit()
+
+    with app.app_context():
+        registered = current_community_registry.get(id=community_id)
+        assert current_community_registry.get(
+            name=community_metadata['name']) is registered
+        for field, value in community_metadata.items():
+            assert getattr(registered, field) == value
+        assert registered in current_community_registry.get_all()
+        assert current_community_registry.get_all(0, 1) == \
+            current_community_registry.get_all()[:1]
+        # registered communities are read-only
+        with pytest.raises(AttributeError):
+            registered.update({'description': 'new description'})
+
+        Community.get(id=community_id).update(
+            {'description': 'new description'})
+        db.session.commit()
+        assert current_community_registry.get(
+            id=community_id).description == 'new description'
+
+        Community.get(id=community_id).delete()
+        db.session.commit()
+        with pytest.raises(CommunityDeletedError):
+            current_community_registry.get(id=community_id)
+        assert current_community_registry.get(
+            id=community_id, with_deleted=True).deleted
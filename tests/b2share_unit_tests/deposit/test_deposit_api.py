@@ -297,3 +297,124 @@ def test_patch_deposit_with_external_pids_errors(app,
                 }
             ])
             deposit.commit()
+
+
+def test_deposit_validation_uses_cached_validators(app, draft_deposits):
+    """Test that deposit validation reuses the compiled community schema."""
+    from b2share.modules.schemas.proxies import current_schema_validators
+    from b2share.modules.schemas.validators import parse_community_schema_url
+    with app.app_context():
+        deposit = Deposit.get_record(draft_deposits[0].deposit_id)
+        community_id, version = parse_community_schema_url(deposit['$schema'])
+        assert community_id == deposit['community']
+        deposit.commit()
+        compiled = current_schema_validators.get(community_id, version)
+        # the referenced schemas have been resolved and stored
+        assert compiled.store
+        deposit.commit()
+        assert current_schema_validators.get(community_id, version) \
+            is compiled
+        assert current_schema_validators.get(community_id) is compiled
+
+        current_schema_validators.invalidate(community_id)
+        assert current_schema_validators.get(community_id, version) \
+            is not compiled
+
+        # the draft validator still ignores the required fields
+        del deposit['titles']
+        deposit.commit()
+
+
+def test_patched_deposit(app, draft_deposits, deposit_with_external_pids):
+    """Test that a patch copies and compares only the fields it touches."""
+    from b2share.modules.deposit.api import PatchedDeposit
+    with app.app_context():
+        deposit = Deposit.get_record(draft_deposits[0].deposit_id)
+        original = deepcopy(dict(deposit))
+        patched = PatchedDeposit(deposit, [
+            {'op': 'replace', 'path': '/titles/0/title', 'value': 'New'},
+            {'op': 'replace', 'path': '/publication_state',
+             'value': PublicationStates.submitted.name},
+        ])
+        assert patched.fields == {'titles', 'publication_state'}
+        assert patched.data['titles'][0]['title'] == 'New'
+        # the deposit is not modified and untouched fields are shared
+        assert dict(deposit) == original
+        assert patched.data['_deposit'] is deposit['_deposit']
+        assert 'external_pids' not in patched.data
+        assert patched.changed_fields == {'titles', 'publication_state'}
+        assert patched.metadata_changed
+        assert not patched.external_pids_changed
+
+        patched = PatchedDeposit(deposit, [
+            {'op': 'replace', 'path': '/publication_state',
+             'value': PublicationStates.submitted.name},
+            {'op': 'test', 'path': '/titles', 'value': deposit['titles']},
+        ])
+        assert not patched.metadata_changed
+
+        deposit = deposit_with_external_pids.get_deposit()
+        patched = PatchedDeposit(deposit, [
+            {'op': 'remove', 'path': '/external_pids/0'},
+        ])
+        assert patched.external_pids
+        assert patched.external_pids_changed
+        assert not patched.metadata_changed
+        patched = deposit.patch([
+            {'op': 'replace', 'path': '/titles/0/title', 'value': 'New'},
+        ])
+        assert 'external_pids' not in patched
+
+
+def test_deposit_incremental_validation(app, draft_deposits):
+    """Test that patched drafts are validated only where they changed."""
+    from b2share.modules.schemas.proxies import current_schema_validators
+    with app.app_context():
+        deposit = Deposit.get_record(draft_deposits[0].deposit_id)
+        compiled = current_schema_validators.get(deposit['community'])
+        assert compiled.partial_fields
+        block_id = list(deposit['community_specific'])[0]
+        assert compiled.partial_document(deposit, [
+            '/titles/0', '/unknown', '/community_specific/{}/x'.format(
+                block_id)
+        ]) == {
+            'titles': deposit['titles'],
+            'community_specific': {
+                block_id: deposit['community_specific'][block_id]
+            },
+        }
+        assert compiled.partial_document(deposit, ['']) is None
+
+        # invalid value which is not modified by the following patches
+        deposit['open_access'] = 'invalid'
+
+        patched = deposit.patch([
+            {'op': 'replace', 'path': '/titles/0/title', 'value': 'New'},
+        ])
+        assert patched.patched_pointers == ['/titles/0/title']
+        patched.commit()
+        assert patched.patched_pointers is None
+
+        patched = deposit.patch([
+            {'op': 'replace', 'path': '/titles', 'value': 'invalid'},
+        ])
+        with pytest.raises(ValidationError):
+            patched.commit()
+
+        # a submitted deposit is fully validated
+        patched = deposit.patch([
+            {'op': 'replace', 'path': '/publication_state',
+             'value': PublicationStates.submitted.name},
+        ])
+        with pytest.raises(ValidationError):
+            patched.commit()
+
+        app.config['B2SHARE_DEPOSIT_INCREMENTAL_VALIDATION'] = False
+        try:
+            patched = deposit.patch([
+                {'op': 'replace', 'path': '/titles/0/title', 'value': 'New'},
+            ])
+            with pytest.raises(ValidationError):
+                patched.commit()
+        finally:
+            app.config['B2SHARE_DEPOSIT_INCREMENTAL_VALIDATION'] = True
@@ -39,7 +39,7 @@ from invenio_access.models import ActionUsers, ActionRoles
 from b2share.modules.records.providers import RecordUUIDProvider
 from six import BytesIO
 from b2share.modules.deposit.permissions import create_deposit_need_factory, \
-    read_deposit_need_factory
+    read_deposit_need_factory, list_readable_scopes, deposit_read_scope
 from b2share.modules.communities.api import Community
 from invenio_db import db
 from b2share.modules.deposit.loaders import IMMUTABLE_PATHS
@@ -88,6 +88,54 @@ def test_deposit_create(app, test_records_data, test_users, login_user):
                                   client)
 
 
+def test_deposit_bulk_create(app, test_records_data, test_users, login_user):
+    """Test the creation of a batch of deposits."""
+    headers = [('Content-Type', 'application/x-ndjson'),
+               ('Accept', 'application/json')]
+    # passes the permission check but fails the schema validation
+    invalid = deepcopy(test_records_data[0])
+    invalid['titles'] = 'not a list of titles'
+    batch = [test_records_data[0], invalid, test_records_data[0]]
+    body = '\n'.join(json.dumps(data) for data in batch)
+
+    with app.app_context():
+        url = url_for('b2share_deposit_rest.bulk_create')
+        with app.test_client() as client:
+            res = client.post(url, data=body, headers=headers)
+            assert res.status_code == 401
+
+        with app.test_client() as client:
+            user = test_users['normal']
+            login_user(user, client)
+            res = client.post(url, data='{"titles"', headers=headers)
+            assert res.status_code == 400
+
+            res = client.post(url, data=body, headers=headers)
+            assert res.status_code == 200
+            res_data = json.loads(res.get_data(as_text=True))
+            assert res_data['created'] == 2
+            assert res_data['failed'] == 1
+            assert [result['status'] for result in res_data['results']] == \
+                [201, 400, 201]
+            for result in [res_data['results'][0], res_data['results'][2]]:
+                assert result['publication_state'] == \
+                    PublicationStates.draft.name
+                draft_res = client.get(result['links']['self'])
+                assert draft_res.status_code == 200
+                draft_data = json.loads(draft_res.get_data(as_text=True))
+                assert draft_data['metadata']['owners'] == [user.id]
+
+            res = client.post(url_for('b2share_deposit_rest.bulk_create',
+                                      submit='true'),
+                              data=json.dumps(test_records_data[0]),
+                              headers=headers)
+            assert res.status_code == 200
+            result = json.loads(res.get_data(as_text=True))['results'][0]
+            assert result['status'] == 201
+            assert result['publication_state'] != \
+                PublicationStates.draft.name
+
+
 def test_deposit_patch_immutable_fields(app, draft_deposits, test_users,
                                         login_user):
     """Test invalid modification of record draft with HTTP PATCH."""
@@ -654,6 +702,23 @@ def test_deposit_search_permissions(app, draft_deposits, submitted_deposits,
         test_search(200, community2_deposits, com_admin)
 
 
+def test_readable_scopes_invalidation(app, test_communities):
+    """Test that the readable deposit scopes follow the access rights."""
+    with app.app_context():
+        community_id = str(test_communities['MyTestCommunity2'])
+        user = create_user('scoped-user')
+        db.session.commit()
+        assert list_readable_scopes(user.id) == []
+
+        db.session.add(ActionUsers.allow(
+            read_deposit_need_factory(community=community_id,
+                                      publication_state='submitted'),
+            user_id=user.id))
+        db.session.commit()
+        assert list_readable_scopes(user.id) == [
+            deposit_read_scope(community_id, 'submitted')]
+
+
 def test_deposit_delete_permissions(app, test_records_data,
                                     login_user, test_users):
     """Test deposit delete with HTTP DELETE."""
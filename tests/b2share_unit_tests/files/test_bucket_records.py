@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of EUDAT B2Share.
+# Copyright (C) 2017 CERN.
+#
+# B2Share is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of the
+# License, or (at your option) any later version.
+#
+# B2Share is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with B2Share; if not, write to the Free Software Foundation, Inc.,
+# 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+#
+# In applying this license, CERN does not
+# waive the privileges and immunities granted to it by virtue of its status
+# as an Intergovernmental Organization or submit itself to any jurisdiction.
+
+"""Test the cache of the records owning file buckets."""
+
+from invenio_db import db
+
+from b2share.modules.files.proxies import current_bucket_records
+from b2share_unit_tests.helpers import create_deposit, create_user
+
+
+def test_bucket_record_cache(app, test_records_data):
+    """Test that the cached bucket records are updated with their record."""
+    with app.app_context():
+        creator = create_user('creator')
+        deposit = create_deposit(test_records_data[0], creator)
+        db.session.commit()
+        bucket_id = deposit.files.bucket.id
+        bucket_record = current_bucket_records.get(bucket_id)
+        assert bucket_record['type'] == 'deposit'
+        assert bucket_record['record_id'] == str(deposit.id)
+        assert bucket_record['publication_state'] == 'draft'
+        assert bucket_record['owners'] == [creator.id]
+
+        deposit.submit()
+        db.session.commit()
+        assert current_bucket_records.get(bucket_id)['publication_state'] \
+            == 'submitted'
+
+        deposit.publish()
+        db.session.commit()
+        _, record = deposit.fetch_published()
+        assert current_bucket_records.get(bucket_id)['publication_state'] \
+            == 'published'
+        record_bucket = current_bucket_records.get(record.files.bucket.id)
+        assert record_bucket['type'] == 'publication'
+        assert record_bucket['community'] == record['community']
+        assert record_bucket['open_access'] == record['open_access']
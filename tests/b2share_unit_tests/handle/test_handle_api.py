@@ -59,3 +59,104 @@ def test_b2handle_pid_creation(app):
                 location='mylocation', checksum='mychecksum',
                 prefix='myprefix', **entries
             )
+
+
+def test_create_handles(app):
+    """Test the parallel creation of handles with retries."""
+    from b2share.modules.handle.errors import EpicPIDError
+    app.config.update(dict(B2SHARE_HANDLE_RETRY_BACKOFF=0))
+    calls = []
+
+    def create_handle(location, checksum=None, fixed=False):
+        calls.append(location)
+        if location == 'broken' or \
+                (location == 'flaky' and calls.count('flaky') == 1):
+            raise EpicPIDError('creation error')
+        return 'pid/{}'.format(location)
+
+    with app.app_context():
+        with patch.object(current_handle._get_current_object(),
+                          'create_handle', side_effect=create_handle):
+            results = current_handle.create_handles([
+                dict(location='ok'), dict(location='flaky'),
+                dict(location='broken'),
+            ])
+        assert results[:2] == ['pid/ok', 'pid/flaky']
+        assert isinstance(results[2], EpicPIDError)
+        assert calls.count('broken') == \
+            app.config['B2SHARE_HANDLE_RETRIES'] + 1
+
+
+@pytest.fixture()
+def epic_stub_server():
+    """Local ePIC API server creating handles on POST requests."""
+    import threading
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+
+    class EpicStubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers['Content-Length']))
+            self.server.connections.add(self.client_address)
+            self.server.created += 1
+            self.send_response(201)
+            self.send_header('Location', '{}{}'.format(
+                self.path, self.server.created))
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    class EpicStubServer(ThreadingMixIn, HTTPServer):
+        daemon_threads = True
+
+    server = EpicStubServer(('127.0.0.1', 0), EpicStubHandler)
+    server.connections = set()
+    server.created = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_epic_client(app, epic_stub_server):
+    """Test that the ePIC client reuses its connections."""
+    from b2share.modules.handle.api import EpicClient
+    client = EpicClient(
+        baseurl='http://127.0.0.1:{}/api/handles'.format(
+            epic_stub_server.server_address[1]),
+        prefix='1234', username='user', password='password')
+    with app.app_context():
+        handles = [client.create_handle('http://example.com/{}'.format(i),
+                                        checksum='abc')
+                   for i in range(5)]
+    assert handles == ['1234/{}'.format(i) for i in range(1, 6)]
+    # the keep-alive connection is reused
+    assert len(epic_stub_server.connections) == 1
+    assert client.metrics['requests'] == 5
+    assert client.metrics['errors'] == 0
+    assert client.mean_latency > 0
+
+
+def test_run_after_commit(app):
+    """Test that deferred tasks are started only by the real commit."""
+    from invenio_db import db
+    from b2share.utils import run_after_commit
+    with app.app_context():
+        called = []
+        run_after_commit(lambda: called.append('committed'))
+        with db.session.begin_nested():
+            pass
+        # releasing a savepoint does not commit the transaction
+        assert called == []
+        db.session.commit()
+        assert called == ['committed']
+
+        run_after_commit(lambda: called.append('rolled back'))
+        db.session.rollback()
+        db.session.commit()
+        assert called == ['committed']
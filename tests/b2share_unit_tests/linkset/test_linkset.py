@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of EUDAT B2Share.
+# Copyright (C) 2017 CERN.
+#
+# B2Share is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of the
+# License, or (at your option) any later version.
+#
+# B2Share is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with B2Share; if not, write to the Free Software Foundation, Inc.,
+# 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+#
+# In applying this license, CERN does not
+# waive the privileges and immunities granted to it by virtue of its status
+# as an Intergovernmental Organization or submit itself to any jurisdiction.
+
+"""Test B2Share linksets."""
+
+import json
+
+from flask import url_for
+from invenio_db import db
+from invenio_files_rest.models import ObjectVersion
+from invenio_records.api import Record
+
+from b2share_unit_tests.helpers import create_record
+from b2share.modules.linkset.api import build_linkset, \
+    get_files_mimetypes, get_record_linkset_state, linkset_cache, \
+    linkset_cache_key, linkset_files_visible, warm_linksets
+
+
+def test_files_mimetypes(app, test_records_data, test_users):
+    """Check that the files mimetypes are retrieved with one query."""
+    with app.app_context():
+        creator = test_users['deposits_creator']
+        records = [
+            create_record(test_records_data[0], creator,
+                          files={'data.txt': b'data', 'image.png': b'png'})[2],
+            create_record(test_records_data[0], creator,
+                          files={'table.csv': b'a,b'})[2],
+        ]
+        mimetypes = get_files_mimetypes(records)
+        files = [file for record in records for file in record['_files']]
+        assert files
+        assert mimetypes == {
+            file['version_id']: ObjectVersion.get(
+                file['bucket'], file['key'], file['version_id']).mimetype
+            for file in files
+        }
+
+
+def test_linkset_etag(app, test_records):
+    """Check that linksets are served with an ETag."""
+    with app.app_context():
+        record = Record.get_record(test_records[0].record_id)
+        url = url_for('b2share_linkset.linkset',
+                      record_id=test_records[0].pid)
+        with app.test_client() as client:
+            headers = [('Accept', 'application/json')]
+            res = client.get(url, headers=headers)
+            assert res.status_code == 200
+            linkset = json.loads(res.get_data(as_text=True))
+            assert linkset == build_linkset(test_records[0].pid, record,
+                                            False, {})
+            etag = res.headers['ETag']
+
+            res = client.get(url, headers=headers + [
+                ('If-None-Match', etag)])
+            assert res.status_code == 304
+
+            record['titles'] = [{'title': 'new linkset title'}]
+            record.commit()
+            db.session.commit()
+            res = client.get(url, headers=headers + [
+                ('If-None-Match', etag)])
+            assert res.status_code == 200
+            assert res.headers['ETag'] != etag
+
+
+def test_warm_linksets(app, test_records):
+    """Check that warmed linksets are cached with the view's key."""
+    with app.app_context():
+        record = Record.get_record(test_records[0].record_id)
+        with app.test_request_context():
+            revision_id, bucket_id = get_record_linkset_state(record.id)
+            # the files of a readable bucket are listed even if it is empty
+            with_files = linkset_files_visible(bucket_id)
+            assert with_files
+            key = linkset_cache_key(record.id, revision_id, with_files)
+            linkset_cache.delete(key)
+            assert warm_linksets([record]) == 1
+            assert linkset_cache.get(key) == build_linkset(
+                test_records[0].pid, record, with_files, {})
@@ -112,3 +112,121 @@ def test_record_ownership_remove_cli(app,test_records):
             for record_v in all_records:
                 assert new_owner.id not in record_v['_deposit']['owners']
                 assert len(record_v['_deposit']['owners']) == 1
+
+
+def test_record_ownership_transfer_cli(app, test_records, test_users):
+    """Test adding and removing an owner of all the objects of a user."""
+    from invenio_records.models import RecordMetadata
+    from b2share.modules.management.ownership.api import find_owned_objects
+
+    runner = CliRunner()
+    script_info = ScriptInfo(create_app=lambda info: app)
+    with app.app_context():
+        creator = test_users['deposits_creator']
+        new_owner = create_user('new_owner')
+        owned_ids = [model.id for model in find_owned_objects(creator.id)]
+        # both the published records and their deposits are owned
+        assert len(owned_ids) == 2 * len(test_records)
+        assert len(find_owned_objects(creator.id, type='record')) == \
+            len(test_records)
+        versions = {model.id: model.version_id
+                    for model in RecordMetadata.query.filter(
+                        RecordMetadata.id.in_(owned_ids))}
+
+        result = runner.invoke(ownership_cli.transfer_add,
+                               [creator.email, new_owner.email],
+                               obj=script_info)
+        if result.exit_code != 0:
+            print(result.output)
+        assert result.exit_code == 0
+        for model in RecordMetadata.query.filter(
+                RecordMetadata.id.in_(owned_ids)):
+            assert model.json['_deposit']['owners'] == [creator.id,
+                                                        new_owner.id]
+            assert model.version_id == versions[model.id] + 1
+
+        result = runner.invoke(ownership_cli.transfer_remove,
+                               [creator.email], obj=script_info)
+        if result.exit_code != 0:
+            print(result.output)
+        assert result.exit_code == 0
+        assert find_owned_objects(creator.id) == []
+        assert [model.id for model in find_owned_objects(new_owner.id)] == \
+            owned_ids
+
+        # the last owner of an object is never removed
+        result = runner.invoke(ownership_cli.transfer_remove,
+                               [new_owner.email], obj=script_info)
+        assert result.exit_code == 0
+        assert [model.id for model in find_owned_objects(new_owner.id)] == \
+            owned_ids
+
+
+def test_get_user_emails(app, test_users):
+    """Test that owner emails are resolved with one memoized query."""
+    from sqlalchemy import event
+    from invenio_db import db
+    from b2share.utils import get_user_emails
+
+    with app.app_context():
+        normal = test_users['normal']
+        admin = test_users['admin']
+        statements = []
+        def count_statements(*args, **kwargs):
+            statements.append(args)
+        event.listen(db.engine, 'before_cursor_execute', count_statements)
+        try:
+            emails = get_user_emails([normal.id, admin.id, 999999])
+            assert emails == {normal.id: normal.email,
+                              admin.id: admin.email, 999999: None}
+            assert len(statements) == 1
+            # known and unknown users are memoized
+            assert get_user_emails([admin.id, 999999]) == \
+                {admin.id: admin.email, 999999: None}
+            assert len(statements) == 1
+        finally:
+            event.remove(db.engine, 'before_cursor_execute',
+                         count_statements)
+
+
+def test_record_ownership_transfer_file_access(app, test_records_data,
+                                               login_user):
+    """Test that removed owners lose access to the files of their drafts."""
+    from flask import url_for
+    from invenio_db import db
+    from b2share_unit_tests.helpers import create_deposit
+
+    runner = CliRunner()
+    script_info = ScriptInfo(create_app=lambda info: app)
+    with app.app_context():
+        creator = create_user('creator')
+        new_owner = create_user('new_owner')
+        deposit = create_deposit(test_records_data[0], creator,
+                                 files={'myfile': b'my file content'})
+        db.session.commit()
+        with app.test_request_context():
+            file_url = url_for('invenio_files_rest.object_api',
+                               bucket_id=deposit.files.bucket.id,
+                               key='myfile')
+
+        result = runner.invoke(ownership_cli.transfer_add,
+                               [creator.email, new_owner.email],
+                               obj=script_info)
+        assert result.exit_code == 0
+
+    with app.test_client() as client:
+        login_user(creator, client)
+        # caches the bucket's record with both owners
+        assert client.get(file_url).status_code == 200
+
+    with app.app_context():
+        result = runner.invoke(ownership_cli.transfer_remove,
+                               [creator.email], obj=script_info)
+        assert result.exit_code == 0
+
+    with app.test_client() as client:
+        login_user(creator, client)
+        assert client.get(file_url).status_code in (403, 404)
+    with app.test_client() as client:
+        login_user(new_owner, client)
+        assert client.get(file_url).status_code == 200
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of EUDAT B2Share.
+# Copyright (C) 2016 CERN.
+#
+# B2Share is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of the
+# License, or (at your option) any later version.
+#
+# B2Share is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with B2Share; if not, write to the Free Software Foundation, Inc.,
+# 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+#
+# In applying this license, CERN does not
+# waive the privileges and immunities granted to it by virtue of its status
+# as an Intergovernmental Organization or submit itself to any jurisdiction.
+
+"""Test the audit of the records' Handle PIDs."""
+
+import io
+import json
+
+from mock import patch
+
+from b2share.modules.handle.proxies import current_handle
+from b2share.modules.records.handle_audit import AuditCheckpoint, \
+    run_handle_audit
+
+
+def test_handle_audit(app, test_records, tmpdir):
+    """Test auditing the handles in parallel and resuming the audit."""
+    checkpoint_path = str(tmpdir.join('audit.json'))
+    checked = []
+
+    def check(handle, update=False, fixed=False, **kwargs):
+        checked.append(handle)
+        # pretend that file PIDs miss an entry
+        return {'EUDAT/FIXED_CONTENT': 'True'} if fixed else {}
+
+    with app.app_context():
+        with patch.object(current_handle._get_current_object(),
+                          'check_eudat_entries_in_handle_pid',
+                          side_effect=check):
+            report = io.StringIO()
+            results = []
+            summary = run_handle_audit(
+                jobs=2, checkpoint=AuditCheckpoint(checkpoint_path),
+                report=report,
+                on_result=lambda record_id, result: results.append(result))
+            assert summary['records'] == len(test_records)
+            assert summary['pids'] == len(checked)
+            # the PIDs which are ok are passed to on_result too
+            assert len(results) == len(checked)
+            lines = [json.loads(line)
+                     for line in report.getvalue().splitlines()]
+            assert len(lines) == summary['missing']
+            assert all(line['type'] == 'file' and not line['updated']
+                       for line in lines)
+
+            # every record is audited, resuming does nothing
+            summary = run_handle_audit(
+                checkpoint=AuditCheckpoint(checkpoint_path))
+            assert summary['records'] == 0
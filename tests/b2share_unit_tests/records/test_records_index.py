@@ -31,6 +31,7 @@ from invenio_search import current_search_client, current_search
 from invenio_indexer import cli
 from invenio_indexer.tasks import process_bulk_queue
 from invenio_indexer.api import RecordIndexer
+from invenio_db import db
 from invenio_records.api import Record
 from b2share.modules.deposit.api import Deposit
 
@@ -181,6 +182,7 @@ def test_record_index_after_update(app, test_users, test_records, script_info,
         rec = Record.get_record(test_records[0].record_id)
         pid = test_records[0].pid
         rec.update({'title': 'my modified title'})
+        db.session.commit()
         # execute scheduled tasks synchronously
         process_bulk_queue.delay()
         # flush the indices so that indexed records are searchable
@@ -202,3 +204,191 @@ def test_record_index_after_update(app, test_users, test_records, script_info,
         found_rec = [rec for rec in record_search_data['hits']['hits']
                      if rec['id'] == pid][0]
         assert rec['title'] == 'my modified title'
+
+
+def test_index_outbox(app, test_records):
+    """Check that modified records are indexed once, after the commit."""
+    from b2share.modules.records.outbox import _OUTBOX_KEY
+    from b2share.utils import transaction_data
+    with app.app_context():
+        record_id = test_records[0].record_id
+        rec = Record.get_record(record_id)
+        rec['titles'] = [{'title': 'rolled back title'}]
+        rec.commit()
+        rec['titles'] = [{'title': 'other rolled back title'}]
+        rec.commit()
+        # the record is queued only once
+        assert list(transaction_data()[_OUTBOX_KEY]) == [str(record_id)]
+        db.session.rollback()
+        assert _OUTBOX_KEY not in transaction_data()
+
+        rec = Record.get_record(record_id)
+        rec['titles'] = [{'title': 'committed title'}]
+        rec.commit()
+        db.session.commit()
+        assert _OUTBOX_KEY not in transaction_data()
+        current_search_client.indices.flush('*')
+        indexed = current_search_client.get(index='records',
+                                            id=str(record_id))
+        assert indexed['_source']['titles'] == [{'title': 'committed title'}]
+        assert indexed['_version'] == rec.revision_id
+
+
+def test_index_outbox_savepoints(app, test_records):
+    """Check that savepoints do not send the outbox before the commit."""
+    from b2share.modules.records.outbox import _OUTBOX_KEY
+    from b2share.utils import transaction_data
+    with app.app_context():
+        records = [Record.get_record(rec.record_id)
+                   for rec in test_records[:2]]
+        for index, rec in enumerate(records):
+            rec['titles'] = [{'title': 'savepoint title {}'.format(index)}]
+            # each commit opens and releases a savepoint
+            rec.commit()
+            with db.session.begin_nested():
+                pass
+        assert list(transaction_data()[_OUTBOX_KEY]) == \
+            [str(rec.id) for rec in records]
+        db.session.commit()
+        assert _OUTBOX_KEY not in transaction_data()
+        current_search_client.indices.flush('*')
+        for index, rec in enumerate(records):
+            indexed = current_search_client.get(index='records',
+                                                id=str(rec.id))
+            assert indexed['_source']['titles'] == \
+                [{'title': 'savepoint title {}'.format(index)}]
+
+
+def test_index_outbox_errors(app, test_records):
+    """Check that indexing errors never fail a write."""
+    from mock import patch
+    from b2share.modules.records.indexer import B2ShareRecordIndexer
+    with app.app_context():
+        record_id = test_records[0].record_id
+        rec = Record.get_record(record_id)
+        rec['titles'] = [{'title': 'title without document'}]
+        rec.commit()
+        with patch.object(B2ShareRecordIndexer, 'record_actions',
+                          side_effect=KeyError('_pid')), \
+                patch('b2share.modules.records.outbox._queue_bulk_index') \
+                as queue_bulk_index:
+            db.session.commit()
+        # the record is queued instead
+        queue_bulk_index.assert_called_once_with([str(record_id)])
+        assert Record.get_record(record_id)['titles'] == \
+            [{'title': 'title without document'}]
+
+        rec = Record.get_record(record_id)
+        rec['titles'] = [{'title': 'title without broker'}]
+        rec.commit()
+        with patch.object(B2ShareRecordIndexer, 'send_actions',
+                          side_effect=Exception('search unavailable')), \
+                patch.object(B2ShareRecordIndexer, 'bulk_index',
+                             side_effect=Exception('broker unavailable')):
+            db.session.commit()
+        assert Record.get_record(record_id)['titles'] == \
+            [{'title': 'title without broker'}]
+
+
+def test_prefetch_index_data(app, test_records):
+    """Check that prefetched data matches the per record indexing data."""
+    from b2share.modules.records.indexer import prefetch_index_data, \
+        prefetched_index_data, get_index_data
+    with app.app_context():
+        records = [Record.get_record(rec.record_id) for rec in test_records]
+        expected = {str(rec.id): prefetch_index_data([rec])[str(rec.id)]
+                    for rec in records}
+        assert prefetch_index_data(records) == expected
+        for data in expected.values():
+            assert data['is_last_version']
+            assert data['files_bucket_id'] is not None
+        with prefetched_index_data(records) as prefetched:
+            assert prefetched == expected
+            assert get_index_data(records[0]) == expected[str(records[0].id)]
+
+
+def test_bulk_reindex(app, test_users, test_records, login_user):
+    """Check that the b2share bulk indexer reindexes every record."""
+    from b2share.modules.records.indexer import B2ShareRecordIndexer
+    creator = test_users['deposits_creator']
+
+    with app.app_context():
+        for deleted in current_search.delete(ignore=[404]):
+            pass
+        for created in current_search.create(None):
+            pass
+        indexer = B2ShareRecordIndexer()
+        indexer.bulk_index([rec.record_id for rec in test_records] +
+                           [rec.deposit_id for rec in test_records])
+        indexer.process_bulk_queue()
+        current_search_client.indices.flush('*')
+    subtest_record_search(app, creator, test_records, test_records,
+                          login_user)
+
+
+def test_bulk_reindex_prefetch_error(app, test_users, test_records,
+                                    login_user):
+    """Check that a failing chunk prefetch indexes records one by one."""
+    from mock import patch
+    from b2share.modules.records import indexer as indexer_module
+    creator = test_users['deposits_creator']
+    prefetch_index_data = indexer_module.prefetch_index_data
+
+    def prefetch_one_by_one(records):
+        records = list(records)
+        if len(records) > 1:
+            raise KeyError('_pid')
+        return prefetch_index_data(records)
+
+    with app.app_context():
+        for deleted in current_search.delete(ignore=[404]):
+            pass
+        for created in current_search.create(None):
+            pass
+        indexer = indexer_module.B2ShareRecordIndexer()
+        indexer.bulk_index([rec.record_id for rec in test_records] +
+                           [rec.deposit_id for rec in test_records])
+        with patch.object(indexer_module, 'prefetch_index_data',
+                          side_effect=prefetch_one_by_one):
+            indexer.process_bulk_queue()
+        current_search_client.indices.flush('*')
+    subtest_record_search(app, creator, test_records, test_records,
+                          login_user)
+
+
+def test_reindex_cli(app, test_users, test_records, script_info, login_user,
+                     tmpdir):
+    """Check that the reindex command reindexes and resumes from checkpoint.
+    """
+    from b2share.modules.records.cli import reindex
+    from b2share.modules.records.reindex import uuid_ranges
+    creator = test_users['deposits_creator']
+    checkpoint = str(tmpdir.join('reindex.json'))
+
+    assert uuid_ranges(4)[0][0] == '00000000-0000-0000-0000-000000000000'
+    assert uuid_ranges(4)[1][0] == '40000000-0000-0000-0000-000000000000'
+    assert uuid_ranges(4)[-1][1] is None
+
+    with app.app_context():
+        for deleted in current_search.delete(ignore=[404]):
+            pass
+        for created in current_search.create(None):
+            pass
+        runner = CliRunner()
+        res = runner.invoke(reindex, ['-r', '4', '-j', '2', '-c', checkpoint],
+                            obj=script_info)
+        assert 0 == res.exit_code
+        current_search_client.indices.flush('*')
+        with open(checkpoint) as checkpoint_file:
+            state = json.load(checkpoint_file)
+        assert len(state['done']) == 4
+        # every record and deposit is counted once
+        assert sum(state['done'].values()) == 2 * len(test_records)
+
+        # all ranges are done, nothing is reindexed
+        res = runner.invoke(reindex, ['-r', '4', '-c', checkpoint],
+                            obj=script_info)
+        assert 0 == res.exit_code
+        assert 'Reindexed 0 records.' in res.output
+    subtest_record_search(app, creator, test_records, test_records,
+                          login_user)
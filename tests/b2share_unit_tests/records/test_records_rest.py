@@ -266,6 +266,74 @@ def test_record_put_is_disabled(app, test_records, test_users,
 
 
 
+def test_record_conditional_get(app, test_records):
+    """Test conditional requests answered without loading the record."""
+    with app.app_context():
+        record = Record.get_record(test_records[0].record_id)
+        url = url_for('b2share_records_rest.b2rec_item',
+                      pid_value=test_records[0].pid)
+        with app.test_client() as client:
+            headers = [('Accept', 'application/json')]
+            res = client.get(url, headers=headers)
+            assert res.status_code == 200
+            etag = res.headers['ETag']
+            assert etag == '"{}"'.format(record.revision_id)
+
+            res = client.get(url, headers=headers + [
+                ('If-None-Match', etag)])
+            assert res.status_code == 304
+            assert res.headers['ETag'] == etag
+            assert 'linkset' in res.headers['Link']
+
+            res = client.get(url, headers=headers + [
+                ('If-None-Match', '"{}"'.format(record.revision_id + 1))])
+            assert res.status_code == 200
+
+            res = client.get(url, headers=headers + [
+                ('If-Modified-Since', res.headers['Last-Modified'])])
+            assert res.status_code == 304
+
+
+def test_records_export(app, test_records, test_users, login_user):
+    """Test the streaming export of the published records."""
+    import gzip
+    with app.app_context():
+        url = url_for('b2share_records_rest.b2share_records_export')
+        with app.test_client() as client:
+            assert client.get(url).status_code == 401
+            login_user(test_users['normal'], client)
+            assert client.get(url).status_code == 403
+
+        with app.test_client() as client:
+            login_user(test_users['admin'], client)
+            res = client.get(url)
+            assert res.status_code == 200
+            exported = [json.loads(line)
+                        for line in res.get_data(as_text=True).splitlines()]
+            assert sorted(rec['id'] for rec in exported) == \
+                sorted(rec.pid for rec in test_records)
+            assert all('metadata' in rec and 'links' in rec
+                       for rec in exported)
+
+            res = client.get(url, query_string={'gzip': 1,
+                                                'format': 'oai_dc'})
+            assert res.status_code == 200
+            lines = gzip.decompress(res.get_data()).decode('utf-8') \
+                .splitlines()
+            assert len(lines) == len(test_records)
+            assert all('oai_dc' in json.loads(line)['metadata']
+                       for line in lines)
+
+            res = client.get(url, query_string={
+                'updated_since': '2999-01-01'})
+            assert res.status_code == 200
+            assert res.get_data() == b''
+
+            res = client.get(url, query_string={'format': 'unknown'})
+            assert res.status_code == 400
+
+
+
 ######################
 #  Test permissions  #
 ######################
@@ -403,3 +403,53 @@ def test_records_serializers_eudatcore(app, test_records_data):
         )[0].text == '1994-04-02'
         assert xml.xpath('//temporalCoverages/temporalCoverage/endDate')[0].text == '1994-04-03'
         assert xml.xpath('//temporalCoverages/temporalCoverage/span')[0].text == '1994-2021'
+
+
+def test_records_serialization_cache(app, test_records_data):
+    """Check that cached serializations match the serialized record."""
+    from lxml import etree
+    from invenio_pidstore.models import PersistentIdentifier
+    from invenio_records.api import Record
+    from b2share.modules.records.indexer import B2ShareRecordIndexer
+    from b2share.modules.records.serializers.cache import (
+        record_version, warm_record_serializations)
+    with app.app_context():
+        _, record = make_record(test_records_data)
+        record = Record.get_record(record.id)
+        oai_pid = PersistentIdentifier.get('oai', record['_oai']['id'])
+        # the version computed from the database matches the indexed one
+        indexed = B2ShareRecordIndexer().record_actions([record])[0]
+        assert record_version(record) == indexed['_source']['_updated']
+        assert record_version({'_source': indexed['_source']}) == \
+            record_version(record)
+
+        expected = etree.tostring(
+            oaipmh_oai_dc.serializer(oai_pid, {'_source': record}))
+        warm_record_serializations([record])
+        for _ in range(2):
+            assert etree.tostring(
+                oaipmh_oai_dc(oai_pid, {'_source': record})) == expected
+
+
+def test_records_serialization_cache_warm(app, test_records_data):
+    """Check that publishing a record caches its serializations."""
+    from lxml import etree
+    from invenio_db import db
+    from invenio_pidstore.models import PersistentIdentifier
+    from invenio_records.api import Record
+    from b2share.modules.records.serializers.cache import (
+        record_version, serialization_cache)
+    with app.app_context():
+        app.config['B2SHARE_SERIALIZATION_CACHE_WARM'] = True
+        creator = create_user('creator')
+        _, _, record = create_record(test_records_data[0], creator)
+        # the serializations are cached once the transaction has ended
+        db.session.commit()
+        record = Record.get_record(record.id)
+        oai_pid = PersistentIdentifier.get('oai', record['_oai']['id'])
+        cached = serialization_cache.get(
+            oaipmh_oai_dc.cache_key(oai_pid, record_version(record)))
+        assert cached is not None
+        assert cached == etree.tostring(
+            oaipmh_oai_dc.serializer(oai_pid, {'_source': record}),
+            encoding='unicode')
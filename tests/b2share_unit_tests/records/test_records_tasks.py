@@ -30,7 +30,8 @@ from b2share_unit_tests.helpers import (
     create_record, generate_record_data, subtest_file_bucket_permissions,
     create_user,
 )
-from b2share.modules.records.tasks import update_expired_embargoes
+from b2share.modules.records.tasks import update_expired_embargoes, \
+    release_embargoes
 # from invenio_records_files.api import Record
 from invenio_db import db
 from invenio_search import current_search
@@ -111,3 +112,36 @@ def test_update_expired_embargo(app, test_communities, login_user, cli_cmd):
     # check that only the released record is not under embargo
     check_embargo(released_record_id, is_embargoed=False)
     check_embargo(closed_record_id, is_embargoed=True)
+
+
+def test_release_scheduled_embargoes(app, test_communities):
+    """Test the release of the embargoes scheduled on publication."""
+    from b2share.modules.records.embargo import embargo_schedule, \
+        _SCHEDULE_KEY
+    with app.app_context():
+        creator = create_user('creator')
+        _, _, released_record = create_record(generate_record_data(
+            open_access=False,
+            embargo_date=datetime.utcnow().isoformat(),
+        ), creator)
+        _, _, closed_record = create_record(generate_record_data(
+            open_access=False,
+            embargo_date=(datetime.utcnow() + timedelta(days=1)).isoformat(),
+        ), creator)
+        released_record_id = released_record.id
+        closed_record_id = closed_record.id
+        db.session.commit()
+
+        scheduled = embargo_schedule.zrangebyscore(
+            _SCHEDULE_KEY, float('inf'), 100)
+        assert str(released_record_id) in scheduled
+        assert str(closed_record_id) in scheduled
+
+        release_embargoes.delay()
+
+        assert Record.get_record(released_record_id)['open_access']
+        assert not Record.get_record(closed_record_id)['open_access']
+        scheduled = embargo_schedule.zrangebyscore(
+            _SCHEDULE_KEY, float('inf'), 100)
+        assert str(released_record_id) not in scheduled
+        assert str(closed_record_id) in scheduled
@@ -24,7 +24,8 @@
 """Test B2Share record module utils."""
 
 from b2share_unit_tests.helpers import create_deposit
-from b2share.modules.records.utils import is_publication, is_deposit
+from b2share.modules.records.utils import is_publication, is_deposit, \
+    iter_published_records
 from b2share_unit_tests.helpers import create_user
 
 def test_records_type_helpers(app, test_records_data):
@@ -39,3 +40,28 @@ def test_records_type_helpers(app, test_records_data):
         assert not is_deposit(record.model)
         assert is_publication(record.model)
         assert not is_publication(deposit.model)
+
+
+def test_iter_published_records(app, test_records_data):
+    """Test iterating over the published records chunk by chunk."""
+    with app.app_context():
+        creator = create_user('creator')
+        published_ids = set()
+        for data in test_records_data[:3]:
+            deposit = create_deposit(data, creator)
+            deposit.submit()
+            deposit.publish()
+            _, record = deposit.fetch_published()
+            published_ids.add(record.id)
+        # an unpublished deposit is not listed
+        create_deposit(test_records_data[0], creator)
+
+        records = list(iter_published_records(chunk_size=2))
+        assert set(record.id for record in records) == published_ids
+
+        projections = list(iter_published_records(
+            fields=['_pid', '_deposit.id'], chunk_size=2))
+        assert len(projections) == len(published_ids)
+        for projection in projections:
+            assert set(projection.keys()) == {'_pid', '_deposit'}
+            assert set(projection['_deposit'].keys()) == {'id'}
@@ -277,6 +277,85 @@ def test_block_schemas_versions(app):
             )
 
 
+def test_resolve_local_block_schema(app):
+    """Test that local schemas are resolved without any HTTP request."""
+    from b2share.modules.schemas.helpers import resolve_json
+    from b2share.modules.schemas.serializers import \
+        block_schema_version_self_link
+    with app.app_context():
+        new_community = Community.create_community(**communities_metadata[0])
+        block_schema = BlockSchema.create_block_schema(
+            community_id=new_community.id, name="schema 1"
+        )
+        version = block_schema.create_version(
+            json_schema=block_schemas_json_schemas[0][0])
+        db.session.commit()
+
+        resolver = app.extensions['b2share-schemas'].resolver
+        resolver.clear()
+        resolver.stats.clear()
+        url = block_schema_version_self_link(version, _external=True)
+        resolved = resolve_json('{}#/json_schema'.format(url))
+        assert resolved['json_schema'] == block_schemas_json_schemas[0][0]
+        assert resolver.stats['local_hits'] == 1
+        assert resolve_json(url) == resolved
+        assert resolver.stats['memory_hits'] == 1
+        assert resolver.stats['misses'] == 0
+
+
+def test_resolve_revalidated_schema(app):
+    """Test that expired shared schemas are revalidated with their ETag."""
+    import threading
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from b2share.modules.schemas.helpers import resolve_json
+
+    schema = json.dumps({'type': 'object'}).encode('utf-8')
+
+    class SchemaHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.headers.get('If-None-Match') == '"v1"':
+                self.server.revalidations += 1
+                self.send_response(304)
+                self.send_header('Cache-Control', 'max-age=0')
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type',
+                             'application/json; charset=utf-8')
+            self.send_header('Cache-Control', 'max-age=0')
+            self.send_header('ETag', '"v1"')
+            self.send_header('Content-Length', str(len(schema)))
+            self.end_headers()
+            self.wfile.write(schema)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), SchemaHandler)
+    server.revalidations = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        with app.app_context():
+            resolver = app.extensions['b2share-schemas'].resolver
+            url = 'http://127.0.0.1:{}/schema.json'.format(
+                server.server_address[1])
+            resolver.shared.delete(url)
+            resolver.clear()
+            resolver.stats.clear()
+            assert resolve_json(url) == {'type': 'object'}
+            assert resolver.stats['misses'] == 1
+            # another worker finds the expired entry in the shared cache
+            resolver.clear()
+            assert resolve_json(url) == {'type': 'object'}
+            assert resolver.stats['revalidated'] == 1
+            assert resolver.stats['misses'] == 1
+            assert server.revalidations == 1
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
 def test_block_schema_version_errors(app):
     """Test invalid usage of the BlockSchemaVersion API."""
     with app.app_context():
@@ -41,6 +41,7 @@ import pytest
 import responses
 from jsonpatch import apply_patch
 from b2share_unit_tests.helpers import authenticated_user, create_user
+from b2share.cache import clear_shared_cache
 from b2share.modules.deposit.api import Deposit as B2ShareDeposit
 from b2share.modules.schemas.helpers import load_root_schemas
 from b2share_demo.helpers import resolve_community_id, resolve_block_schema_id
@@ -125,6 +126,9 @@ def clean_app(request, base_app):
         except ProgrammingError:
             pass
         create_database(db.engine.url)
+        # reset the caches, which contain data of the dropped database
+        clear_shared_cache()
+        base_app.extensions['b2share-communities'].registry.invalidate()
         # reset elasticsearch
         for deleted in current_search.delete(ignore=[404]):
             pass